@@ -85,6 +85,40 @@ CHATBOT_RESPONSE_TIMEOUT_SECONDS = env.float("CHATBOT_RESPONSE_TIMEOUT_SECONDS",
 CHATBOT_UNANSWERED_MAX_ITEMS = env.int("CHATBOT_UNANSWERED_MAX_ITEMS", default=10000)
 CHATBOT_UNANSWERED_CACHE_TTL_SECONDS = env.int("CHATBOT_UNANSWERED_CACHE_TTL_SECONDS", default=7 * 24 * 3600)
 
+# Shared spaCy model (core.nlp): load it when the WSGI app starts instead of on first use.
+NLP_PRELOAD = env.bool("NLP_PRELOAD", default=False)
+
+# DocDiff: extracted blocks are cached by upload SHA-256 (0 disables the cache).
+DOCDIFF_EXTRACTION_CACHE_TTL_SECONDS = env.int("DOCDIFF_EXTRACTION_CACHE_TTL_SECONDS", default=24 * 3600)
+# DocDiff: runs of at least this many unchanged blocks are collapsed in streamed
+# reports and loaded on demand (0 disables).
+DOCDIFF_REPORT_COLLAPSE_MIN_RUN = env.int("DOCDIFF_REPORT_COLLAPSE_MIN_RUN", default=50)
+# DocDiff jobs: "thread" (in-process pool), "worker" (manage.py docdiff_worker) or "eager".
+DOCDIFF_JOBS_BACKEND = env("DOCDIFF_JOBS_BACKEND", default="thread")
+DOCDIFF_JOBS_WORKERS = env.int("DOCDIFF_JOBS_WORKERS", default=1)
+DOCDIFF_JOB_TTL_SECONDS = env.int("DOCDIFF_JOB_TTL_SECONDS", default=24 * 3600)
+# DocDiff jobs queued or running longer than this are failed (no worker, or it died); 0 disables.
+DOCDIFF_JOB_TIMEOUT_SECONDS = env.int("DOCDIFF_JOB_TIMEOUT_SECONDS", default=30 * 60)
+# DocDiff: AI analyses of changed blocks of earlier comparisons are reused by
+# later ones until unused for this long (0 disables the history).
+DOCDIFF_HISTORY_TTL_SECONDS = env.int("DOCDIFF_HISTORY_TTL_SECONDS", default=30 * 24 * 3600)
+# DocDiff: upload pairs of at least this many bytes are parsed in parallel processes.
+DOCDIFF_PARALLEL_MIN_BYTES = env.int("DOCDIFF_PARALLEL_MIN_BYTES", default=256 * 1024)
+# DocDiff limits (see `python -m docdiff.benchmarks.pipeline_stages --budget-seconds`).
+DOCDIFF_MAX_FILE_SIZE_MB = env.int("DOCDIFF_MAX_FILE_SIZE_MB", default=10)
+DOCDIFF_MAX_CHANGED_BLOCKS = env.int("DOCDIFF_MAX_CHANGED_BLOCKS", default=300)
+# DocDiff: docx extraction, "python-docx", "stream" (body only, lxml without python-docx
+# objects) or "structure" (all stories, scoped blocks).
+DOCDIFF_DOCX_MODE = env("DOCDIFF_DOCX_MODE", default="python-docx")
+# DocDiff: "flat" diffs all blocks as one sequence, "sections" aligns sections by heading
+# before diffing their blocks; section diffs of documents with at least
+# DOCDIFF_SECTION_PARALLEL_MIN_BLOCKS blocks run in the extraction process pool.
+DOCDIFF_DIFF_MODE = env("DOCDIFF_DIFF_MODE", default="flat")
+DOCDIFF_SECTION_PARALLEL_MIN_BLOCKS = env.int("DOCDIFF_SECTION_PARALLEL_MIN_BLOCKS", default=20000)
+# DocDiff: xlsx sheets are split into table blocks of about this many rows, so unchanged
+# chunks are skipped by hash and only changed ones are diffed (0 keeps one block per sheet).
+DOCDIFF_XLSX_CHUNK_ROWS = env.int("DOCDIFF_XLSX_CHUNK_ROWS", default=0)
+
 # Security & Session settings
 if not DEBUG:
     # Enforce HTTPS and related security features
@@ -259,6 +293,7 @@ if _testing:
     # django_ratelimit.checks.check_caches ignores RATELIMIT_ENABLE and
     # unconditionally raises E003 for LocMemCache. Silence it explicitly.
     SILENCED_SYSTEM_CHECKS = ["django_ratelimit.E003", "django_ratelimit.W001"]
+    DOCDIFF_JOBS_BACKEND = "eager"  # run jobs inside the request under test
 
 # JWT configuration
 SIMPLE_JWT = {
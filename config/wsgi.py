@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Load the shared spaCy model at start-up; with `gunicorn --preload` this runs
+# in the master, so workers share it copy-on-write (see core.nlp)
+from django.conf import settings  # noqa: E402
+
+if settings.NLP_PRELOAD:
+    from core.nlp import preload  # noqa: E402
+
+    preload()
@@ -0,0 +1,138 @@
+"""
+Shared spaCy model service.
+
+One pl_core_news_sm instance per process, used by docdiff (heuristics_ai)
+and the tonguetwister chatbot. Callers pick a component profile instead of
+loading their own trimmed copy: the profile only lists pipes to disable for
+that call, the model itself is shared.
+
+With NLP_PRELOAD the model is loaded while importing the WSGI application;
+under `gunicorn --preload` that happens in the master before fork, so the
+workers share the model memory copy-on-write and no user request pays the
+load time. Load time and RSS growth are logged and available from stats().
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import logging
+import os
+import sys
+import threading
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+MODEL_NAME = "pl_core_news_sm"
+
+# Pipes disabled per caller profile (names missing from the model are ignored)
+PROFILES: Dict[str, Sequence[str]] = {
+    "full": (),
+    # chatbot: lemmas only
+    "lemma": ("parser", "ner", "senter"),
+    # docdiff: entities and tok2vec vectors for labels, similarity and clustering
+    "ner": ("parser", "lemmatizer", "morphologizer", "tagger", "attribute_ruler", "senter"),
+}
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, KB elsewhere
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return None
+
+
+def _spacy_load(name: str):
+    import spacy
+    return spacy.load(name)
+
+
+class NLPService:
+    """Loads the model once (thread-safe) and applies caller profiles."""
+
+    def __init__(self, model_name: str = MODEL_NAME, loader: Callable[[str], Any] = _spacy_load):
+        self.model_name = model_name
+        self._loader = loader
+        self._nlp = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"model": model_name, "loaded": False}
+
+    def get(self):
+        """Returns the shared model, or None if it cannot be loaded (failure is not retried)."""
+        if self._nlp is not None or self._failed:
+            return self._nlp
+        with self._lock:
+            if self._nlp is None and not self._failed:
+                self._load()
+        return self._nlp
+
+    def _load(self) -> None:
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        try:
+            self._nlp = self._loader(self.model_name)
+        except Exception as e:
+            self._failed = True
+            self._stats["error"] = str(e)
+            _LOGGER.warning("spaCy model %s failed to load: %s", self.model_name, e)
+            return
+        rss_after = rss_mb()
+        self._stats.update({
+            "loaded": True,
+            "pid": os.getpid(),
+            "load_seconds": round(time.perf_counter() - start, 3),
+            "rss_mb": round(rss_after, 1) if rss_after is not None else None,
+            "rss_delta_mb": round(rss_after - rss_before, 1) if None not in (rss_before, rss_after) else None,
+            "pipes": list(getattr(self._nlp, "pipe_names", ())),
+        })
+        _LOGGER.info(
+            "spaCy model %s loaded in %.2fs (RSS +%s MB)",
+            self.model_name, self._stats["load_seconds"], self._stats["rss_delta_mb"],
+        )
+
+    def disabled_pipes(self, profile: str, nlp=None) -> List[str]:
+        """Pipes of the model to disable for `profile`."""
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown NLP profile: {profile}")
+        nlp = nlp if nlp is not None else self.get()
+        pipe_names = getattr(nlp, "pipe_names", ())
+        return [name for name in PROFILES[profile] if name in pipe_names]
+
+    def process(self, text: str, profile: str = "full"):
+        """Runs one text through the model with the profile's pipes disabled."""
+        nlp = self.get()
+        if nlp is None:
+            raise RuntimeError(f"spaCy model {self.model_name} is not available")
+        disable = self.disabled_pipes(profile, nlp)
+        return nlp(text, disable=disable) if disable else nlp(text)
+
+    def pipe(self, texts: Iterable[str], profile: str = "full", batch_size: int = 64):
+        """Batched variant of process()."""
+        nlp = self.get()
+        if nlp is None:
+            raise RuntimeError(f"spaCy model {self.model_name} is not available")
+        return nlp.pipe(texts, batch_size=batch_size, disable=self.disabled_pipes(profile, nlp))
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+
+service = NLPService()
+
+
+def get_nlp():
+    """The process-wide model (None when spaCy or the model is unavailable)."""
+    return service.get()
+
+
+def preload() -> Dict[str, Any]:
+    """Loads the model now (e.g. in the gunicorn master) and returns load stats."""
+    service.get()
+    return service.stats()
@@ -0,0 +1,84 @@
+"""
+Unit tests for the shared spaCy service (core.nlp).
+The model loader is replaced by a stub; spaCy is never imported.
+"""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from core import nlp as nlp_mod
+from core.nlp import NLPService
+
+
+class StubModel:
+    pipe_names = ["tok2vec", "morphologizer", "parser", "lemmatizer", "ner"]
+
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def _doc(text):
+        return [SimpleNamespace(text=w, lemma_=w.upper()) for w in text.split()]
+
+    def __call__(self, text, disable=()):
+        self.calls.append((text, list(disable)))
+        return self._doc(text)
+
+    def pipe(self, texts, batch_size=64, disable=()):
+        texts = list(texts)
+        self.calls.append((texts, list(disable)))
+        return [self._doc(t) for t in texts]
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    """Replace the process-wide service with one backed by a stub loader."""
+    loader = MagicMock(side_effect=lambda name: StubModel())
+    service = NLPService(loader=loader)
+    monkeypatch.setattr(nlp_mod, "service", service)
+    return service, loader
+
+
+def test_model_loaded_once_and_shared_by_docdiff_and_chatbot(shared, monkeypatch):
+    import tonguetwister.chatbot as chatbot_mod
+    from docdiff.heuristics_ai import get_nlp
+
+    service, loader = shared
+    monkeypatch.setattr(chatbot_mod, "nlp_service", service)
+    chatbot = chatbot_mod.Chatbot.__new__(chatbot_mod.Chatbot)  # skip loading keyword pickles
+
+    assert get_nlp() is service.get() is chatbot.nlp
+    assert chatbot.lemmatize_input("Ala") == "ALA"
+    assert loader.call_count == 1
+
+
+def test_profiles_disable_only_existing_pipes(shared):
+    service, _ = shared
+    assert service.disabled_pipes("lemma") == ["parser", "ner"]
+    assert service.disabled_pipes("full") == []
+    with pytest.raises(ValueError):
+        service.disabled_pipes("nope")
+
+
+def test_process_applies_profile(shared):
+    service, _ = shared
+    assert [t.lemma_ for t in service.process("ala", profile="lemma")] == ["ALA"]
+    assert service.get().calls[-1] == ("ala", ["parser", "ner"])
+
+
+def test_load_failure_is_not_retried():
+    loader = MagicMock(side_effect=OSError("no model"))
+    service = NLPService(loader=loader)
+    assert service.get() is None
+    assert service.get() is None
+    assert loader.call_count == 1
+    assert service.stats()["loaded"] is False and "no model" in service.stats()["error"]
+
+
+def test_stats_report_load_time_and_memory(shared):
+    service, _ = shared
+    stats = nlp_mod.preload()
+    assert stats["loaded"] is True
+    assert stats["load_seconds"] >= 0
+    assert "rss_delta_mb" in stats and stats["pipes"][0] == "tok2vec"
@@ -0,0 +1,312 @@
+"""
+Sequence alignment for document blocks.
+
+Every block is hashed once to a fixed-size digest and the digest arrays are
+aligned with Myers' O(ND) algorithm (default) or patience diff.
+SequenceMatcher is kept only as a fallback for very dissimilar inputs.
+All engines return opcodes in the same format as SequenceMatcher.get_opcodes().
+"""
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import hashlib
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+DIGEST_SIZE = 16
+
+# Above this edit distance Myers is slower than SequenceMatcher on digests
+MYERS_MAX_COST = 1000
+
+Opcode = Tuple[str, int, int, int, int]
+MatchingBlock = Tuple[int, int, int]
+
+_CELL_SEP = b"\x1f"
+_ROW_SEP = b"\x1e"
+
+
+# ---------------------------------------------------------------------
+# Block digests
+# ---------------------------------------------------------------------
+
+
+def _text_bytes(value: Any) -> bytes:
+    if value is None:
+        return b""
+    if not isinstance(value, str):
+        value = str(value)
+    return value.encode("utf-8", "surrogatepass")
+
+
+def row_digest(row: Sequence[Any]) -> bytes:
+    """Returns a fixed-size digest of a single table row."""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for cell in row:
+        h.update(_text_bytes(cell))
+        h.update(_CELL_SEP)
+    return h.digest()
+
+
+def block_digest(block: Dict[str, Any]) -> bytes:
+    """
+    Returns a fixed-size digest identifying the block content.
+    Two blocks are considered equal by the alignment when their digests match.
+    """
+    t = block.get("type", "")
+    h = hashlib.blake2b(_text_bytes(t), digest_size=DIGEST_SIZE)
+    h.update(_ROW_SEP)
+    if t == "paragraph":
+        h.update(_text_bytes(block.get("text")))
+    elif t == "table":
+        # Include the sheet name (xlsx) for better identification
+        h.update(_text_bytes(block.get("sheet")))
+        h.update(_ROW_SEP)
+        chunk_hash = block.get("chunk_hash")
+        if chunk_hash:
+            # Streamed xlsx chunks already carry a hash of their rows
+            h.update(_text_bytes(chunk_hash))
+            return h.digest()
+        for row in block.get("table") or []:
+            for cell in row:
+                h.update(_text_bytes(cell))
+                h.update(_CELL_SEP)
+            h.update(_ROW_SEP)
+    elif t == "image":
+        h.update(_text_bytes(block.get("sha1") or block.get("rel_id", "")))
+    return h.digest()
+
+
+# ---------------------------------------------------------------------
+# Alignment engines (return matching blocks like SequenceMatcher)
+# ---------------------------------------------------------------------
+
+
+def myers_matching_blocks(a: Sequence[Any], b: Sequence[Any], max_cost: int = MYERS_MAX_COST) -> Optional[List[MatchingBlock]]:
+    """
+    Myers' greedy O(ND) diff. Returns matching blocks (i, j, size)
+    or None when the edit distance exceeds `max_cost`.
+    """
+    n, m = len(a), len(b)
+    limit = min(n + m, max_cost)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace: List[List[int]] = []
+
+    found = False
+    for d in range(limit + 1):
+        # v values from the previous round, only the [-d, d] window is needed
+        trace.append(v[offset - d: offset + d + 1])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                found = True
+                break
+        if found:
+            break
+
+    if not found:
+        return None
+
+    # Backtrack through the stored rounds, collecting diagonal snakes
+    blocks: List[MatchingBlock] = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        prev = trace[d]
+        k = x - y
+        if k == -d or (k != d and prev[k - 1 + d] < prev[k + 1 + d]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = prev[prev_k + d]
+        prev_y = prev_x - prev_k
+        # start of the snake after the single insert/delete step
+        mid_x, mid_y = (prev_x, prev_y + 1) if prev_k == k + 1 else (prev_x + 1, prev_y)
+        if x > mid_x:
+            blocks.append((mid_x, mid_y, x - mid_x))
+        x, y = prev_x, prev_y
+    if x > 0:
+        blocks.append((0, 0, x))
+
+    blocks.reverse()
+    return blocks
+
+
+def difflib_matching_blocks(a: Sequence[Any], b: Sequence[Any]) -> List[MatchingBlock]:
+    """SequenceMatcher fallback."""
+    sm = SequenceMatcher(None, a, b, autojunk=False)
+    return [tuple(mb) for mb in sm.get_matching_blocks() if mb[2]]
+
+
+def _unique_positions(seq: Sequence[Any], lo: int, hi: int) -> Dict[Any, int]:
+    seen: Dict[Any, int] = {}
+    dup = set()
+    for i in range(lo, hi):
+        item = seq[i]
+        if item in seen:
+            dup.add(item)
+        else:
+            seen[item] = i
+    for item in dup:
+        del seen[item]
+    return seen
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Patience sorting: longest run of pairs increasing in the second element."""
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    back: List[int] = []
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = idx
+        back.append(tail_idx[pos - 1] if pos else -1)
+
+    result: List[Tuple[int, int]] = []
+    idx = tail_idx[-1] if tail_idx else -1
+    while idx != -1:
+        result.append(pairs[idx])
+        idx = back[idx]
+    result.reverse()
+    return result
+
+
+def patience_matching_blocks(a: Sequence[Any], b: Sequence[Any]) -> List[MatchingBlock]:
+    """
+    Patience diff: anchors on elements unique in both ranges,
+    falls back to Myers (then SequenceMatcher) where no anchors exist.
+    """
+    matches: List[Tuple[int, int]] = []
+    stack = [(0, len(a), 0, len(b))]
+
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        # common prefix and suffix
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        ua = _unique_positions(a, alo, ahi)
+        ub = _unique_positions(b, blo, bhi)
+        pairs = sorted((i, ub[item]) for item, i in ua.items() if item in ub)
+        anchors = _longest_increasing(pairs)
+
+        if not anchors:
+            sub_a, sub_b = a[alo:ahi], b[blo:bhi]
+            sub = myers_matching_blocks(sub_a, sub_b)
+            if sub is None:
+                sub = difflib_matching_blocks(sub_a, sub_b)
+            for i, j, size in sub:
+                matches.extend((alo + i + s, blo + j + s) for s in range(size))
+            continue
+
+        prev_i, prev_j = alo, blo
+        for i, j in anchors:
+            matches.append((i, j))
+            stack.append((prev_i, i, prev_j, j))
+            prev_i, prev_j = i + 1, j + 1
+        stack.append((prev_i, ahi, prev_j, bhi))
+
+    matches.sort()
+    blocks: List[MatchingBlock] = []
+    for i, j in matches:
+        if blocks:
+            bi, bj, size = blocks[-1]
+            if bi + size == i and bj + size == j:
+                blocks[-1] = (bi, bj, size + 1)
+                continue
+        blocks.append((i, j, 1))
+    return blocks
+
+
+ALIGNMENT_ENGINES: Dict[str, Callable[[Sequence[Any], Sequence[Any]], Optional[List[MatchingBlock]]]] = {
+    "myers": myers_matching_blocks,
+    "patience": patience_matching_blocks,
+    "difflib": difflib_matching_blocks,
+}
+
+DEFAULT_ENGINE = "myers"
+
+
+# ---------------------------------------------------------------------
+# Opcodes
+# ---------------------------------------------------------------------
+
+
+def opcodes_from_matching_blocks(blocks: List[MatchingBlock], n: int, m: int) -> List[Opcode]:
+    """Converts matching blocks into SequenceMatcher-style opcodes."""
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for ai, bj, size in list(blocks) + [(n, m, 0)]:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        if size:
+            opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+
+def common_affixes(a: Sequence[Any], b: Sequence[Any]) -> Tuple[int, int]:
+    """Lengths of the common prefix and (non-overlapping) common suffix of two sequences."""
+    n, m = len(a), len(b)
+    limit = min(n, m)
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def align(a: Sequence[Any], b: Sequence[Any], engine: str = DEFAULT_ENGINE) -> List[Opcode]:
+    """
+    Aligns two sequences of hashable items (usually block digests)
+    and returns SequenceMatcher-style opcodes.
+    The common prefix and suffix are matched directly; only the differing
+    middle window goes to the alignment engine.
+    """
+    aligner = ALIGNMENT_ENGINES.get(engine)
+    if aligner is None:
+        raise ValueError(f"Unknown alignment engine: {engine}")
+
+    n, m = len(a), len(b)
+    prefix, suffix = common_affixes(a, b)
+    blocks: List[MatchingBlock] = [(0, 0, prefix)] if prefix else []
+
+    mid_a, mid_b = a[prefix:n - suffix], b[prefix:m - suffix]
+    if mid_a and mid_b:
+        mid = aligner(mid_a, mid_b)
+        if mid is None:
+            _LOGGER.debug("Alignment engine %s gave up, falling back to SequenceMatcher", engine)
+            mid = difflib_matching_blocks(mid_a, mid_b)
+        blocks.extend((prefix + i, prefix + j, size) for i, j, size in mid if size)
+
+    if suffix:
+        blocks.append((n - suffix, m - suffix, suffix))
+    return opcodes_from_matching_blocks(blocks, n, m)
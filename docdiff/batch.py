@@ -0,0 +1,202 @@
+"""
+Batch mode of the docdiff CLI (`python -m docdiff.main --batch ...`).
+
+Pairs come from a manifest (CSV with `old,new[,name]` columns or JSONL with
+the same keys; relative paths are resolved against the manifest) or from two
+directories matched by file name. Pairs run across a pool of worker
+processes (which load the spaCy model once with --ai); every pair gets
+`<name>.html` and `<name>.json` (`.json.gz`/`.json.zst` with
+--json-compression) in the output directory, and `index.json`
+lists the exit code of each pair.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import csv
+import json
+import logging
+import os
+import time
+
+from docdiff.main import DEFAULT_CONTEXT, FILE_TYPE_MISMATCH, FORMAT_GROUP, ExitCode, compare_pair
+from docdiff.parallel_extract import mp_context
+
+_LOGGER = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+# suffix of the JSON reports per --json-compression
+JSON_SUFFIXES = {None: ".json", "gzip": ".json.gz", "zstd": ".json.zst"}
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+@dataclass
+class PairSpec:
+    name: str
+    old: Path
+    new: Path
+
+
+def _exit_name(code: int) -> str:
+    try:
+        return ExitCode(code).name
+    except ValueError:
+        return "FILE_TYPE_MISMATCH" if code == FILE_TYPE_MISMATCH else str(code)
+
+
+# ---------------------------------------------------------------------
+# Pair sources
+# ---------------------------------------------------------------------
+
+
+def load_manifest(path: Path) -> List[PairSpec]:
+    """
+    Reads pairs from a CSV (header: old,new[,name]) or JSONL manifest.
+    Names must be unique, as every pair writes the reports named after it.
+    """
+    path = Path(path)
+    base = path.parent
+    if path.suffix.lower() in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+
+    pairs = []
+    names = {Path(INDEX_NAME).stem}
+    for i, row in enumerate(rows):
+        if not row.get("old") or not row.get("new"):
+            raise ValueError(f"Manifest row {i + 1} needs 'old' and 'new'")
+        old, new = base / row["old"], base / row["new"]
+        # report names never leave the output directory
+        name = Path(row.get("name") or f"{i:04d}_{old.name}").name
+        if name in names:
+            raise ValueError(f"Manifest row {i + 1}: report name '{name}' is already used")
+        names.add(name)
+        pairs.append(PairSpec(name=name, old=old, new=new))
+    return pairs
+
+
+def pairs_from_dirs(old_dir: Path, new_dir: Path) -> List[PairSpec]:
+    """
+    Matches supported files of two directories by file name. Files present
+    on one side only are still listed (and fail with *_NOT_FOUND).
+    """
+    def supported(d: Path) -> Dict[str, Path]:
+        return {p.name: p for p in Path(d).iterdir() if p.is_file() and p.suffix.lower() in FORMAT_GROUP}
+
+    old_files, new_files = supported(old_dir), supported(new_dir)
+    return [
+        PairSpec(name=name, old=Path(old_dir) / name, new=Path(new_dir) / name)
+        for name in sorted(old_files.keys() | new_files.keys())
+    ]
+
+
+# ---------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------
+
+
+def _init_worker(ai: bool = False) -> None:
+    """Pool initializer: the spaCy model (with --ai) is loaded once per worker."""
+    if ai:
+        from docdiff.heuristics_ai import get_nlp
+        get_nlp()
+
+
+def run_pair(
+    spec: PairSpec,
+    out_dir: Path,
+    ai: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Compares one pair (`options` go to compare_pair) and returns its index entry."""
+    html_path = out_dir / f"{spec.name}.html"
+    json_path = out_dir / f"{spec.name}{JSON_SUFFIXES[(options or {}).get('json_compression')]}"
+    start = time.perf_counter()
+    try:
+        # pairs already run in parallel, so each one is extracted inline
+        code = int(compare_pair(spec.old, spec.new, html_path, json_path, min_bytes=-1, ai=ai, **(options or {})))
+    except Exception:
+        _LOGGER.exception("Batch pair %s failed", spec.name)
+        code = int(ExitCode.PARSE_ERROR)
+    ok = code == ExitCode.OK
+    return {
+        "name": spec.name,
+        "old": str(spec.old),
+        "new": str(spec.new),
+        "exit_code": code,
+        "status": _exit_name(code),
+        "html": str(html_path) if ok else None,
+        "json": str(json_path) if ok else None,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def run_batch(
+    pairs: List[PairSpec],
+    out_dir: Path,
+    workers: Optional[int] = None,
+    ai: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Runs all pairs (in worker processes when `workers` > 1), keeping manifest
+    order. `options` are compare_pair keyword arguments shared by every pair.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = max(1, workers or DEFAULT_WORKERS)
+
+    if workers == 1 or len(pairs) < 2:
+        return [run_pair(spec, out_dir, ai, options) for spec in pairs]
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(pairs)),
+        mp_context=mp_context(),
+        initializer=_init_worker,
+        initargs=(ai,),
+    ) as pool:
+        n = len(pairs)
+        return list(pool.map(run_pair, pairs, [out_dir] * n, [ai] * n, [options] * n))
+
+
+def write_index(results: List[Dict[str, Any]], out_dir: Path) -> Path:
+    index = {
+        "total": len(results),
+        "failed": sum(1 for r in results if r["exit_code"] != ExitCode.OK),
+        "pairs": results,
+    }
+    path = Path(out_dir) / INDEX_NAME
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def run_batch_cli(args) -> int:
+    """Entry point of `--batch`: OLD is a manifest, or OLD and NEW are directories."""
+    try:
+        if args.new is None:
+            pairs = load_manifest(args.old)
+        else:
+            pairs = pairs_from_dirs(args.old, args.new)
+    except (OSError, ValueError) as exc:
+        _LOGGER.error("Cannot read batch input: %s", exc)
+        return ExitCode.BATCH_ERROR
+
+    options = {
+        "docx_mode": getattr(args, "docx_mode", None),
+        "diff_mode": getattr(args, "diff_mode", None),
+        "xlsx_chunk_rows": getattr(args, "xlsx_chunk_rows", None),
+        "context": getattr(args, "context", DEFAULT_CONTEXT),
+        "json_format": getattr(args, "json_format", "full"),
+        "json_compression": getattr(args, "json_compression", None),
+    }
+    results = run_batch(pairs, args.out_dir, args.workers, ai=getattr(args, "ai", False), options=options)
+    index = write_index(results, args.out_dir)
+    failed = [r for r in results if r["exit_code"] != ExitCode.OK]
+    for r in failed:
+        _LOGGER.error("%s: %s", r["name"], r["status"])
+    _LOGGER.info("Batch finished: %d pairs, %d failed, index: %s", len(results), len(failed), index)
+    return ExitCode.BATCH_ERROR if failed else ExitCode.OK
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for DocDiff.
+
+Run individual benchmarks as modules, e.g.:
+    python -m docdiff.benchmarks.docx_scaling
+"""
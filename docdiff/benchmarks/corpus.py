@@ -0,0 +1,162 @@
+"""
+Synthetic document pairs for the docdiff benchmarks.
+
+Every pair is an "old" document of `blocks` paragraphs (rows for xlsx)
+and a "new" revision in which about `edit_rate` of them were modified,
+inserted or deleted, in roughly equal parts. Edits are either scattered
+over the document or kept in one contiguous section (`clustered`), which
+is what most real revisions look like. A fixed `seed` gives the same pair
+on every run.
+
+Usage:
+    python -m docdiff.benchmarks.corpus out/ --formats docx txt --blocks 1000 10000 --edit-rates 0.01 0.1
+"""
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+import argparse
+import json
+import random
+
+FORMATS = ("docx", "xlsx", "txt")
+
+_WORDS = (
+    "umowa wykonawca zamawiający termin dostawa kwota netto brutto faktura "
+    "strona zobowiązuje się do dnia zgodnie z paragrafem ustęp punkt aneks "
+    "the contractor shall deliver within days of signing this agreement"
+).split()
+
+
+@dataclass
+class CorpusSpec:
+    fmt: str
+    blocks: int
+    edit_rate: float
+    seed: int = 0
+    clustered: bool = False
+
+    @property
+    def name(self) -> str:
+        layout = "clustered" if self.clustered else "scattered"
+        return f"{self.fmt}_{self.blocks}_{self.edit_rate:g}_{layout}_{self.seed}"
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 30))]
+    # numbers and dates exercise the AI label heuristics
+    words.insert(rng.randrange(len(words)), f"{rng.randint(1, 999)} kg" if n % 7 == 0 else str(2000 + n % 25))
+    return f"{n}. " + " ".join(words) + "."
+
+
+def make_texts(blocks: int, edit_rate: float, seed: int = 0, clustered: bool = False) -> Tuple[List[str], List[str]]:
+    """Old and new block texts with about `edit_rate` * `blocks` edits."""
+    rng = random.Random(seed)
+    old = [_sentence(rng, i) for i in range(blocks)]
+    edits = min(blocks, int(round(blocks * edit_rate)))
+    if clustered:
+        start = rng.randrange(max(1, blocks - edits))
+        positions = list(range(start, start + edits))
+    else:
+        positions = sorted(rng.sample(range(blocks), edits))
+
+    new: List[str] = []
+    targets = dict.fromkeys(positions)
+    for i, text in enumerate(old):
+        if i not in targets:
+            new.append(text)
+            continue
+        kind = rng.randrange(3)
+        if kind == 0:  # modified
+            words = text.split()
+            words[rng.randrange(1, len(words))] = rng.choice(_WORDS)
+            new.append(" ".join(words))
+        elif kind == 1:  # inserted after
+            new.extend((text, _sentence(rng, blocks + i)))
+        # kind == 2: deleted
+    return old, new
+
+
+def _write_txt(path: Path, texts: Sequence[str]) -> None:
+    path.write_text("\n".join(texts), encoding="utf-8")
+
+
+def _write_docx(path: Path, texts: Sequence[str]) -> None:
+    from docx import Document
+
+    doc = Document()
+    for text in texts:
+        doc.add_paragraph(text)
+    doc.save(str(path))
+
+
+def _write_xlsx(path: Path, texts: Sequence[str]) -> None:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Data")
+    for i, text in enumerate(texts):
+        head, _, rest = text.partition(" ")
+        ws.append([head, rest, i % 13, f"r{i % 50}"])
+    wb.save(str(path))
+
+
+_WRITERS = {"txt": _write_txt, "docx": _write_docx, "xlsx": _write_xlsx}
+
+
+def make_pair(spec: CorpusSpec, out_dir: Path) -> Tuple[Path, Path]:
+    """Writes the old/new files of `spec` to `out_dir` and returns their paths."""
+    if spec.fmt not in _WRITERS:
+        raise ValueError(f"Unknown format: {spec.fmt}")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    old, new = make_texts(spec.blocks, spec.edit_rate, spec.seed, spec.clustered)
+    old_path = out_dir / f"{spec.name}_old.{spec.fmt}"
+    new_path = out_dir / f"{spec.name}_new.{spec.fmt}"
+    _WRITERS[spec.fmt](old_path, old)
+    _WRITERS[spec.fmt](new_path, new)
+    return old_path, new_path
+
+
+def specs_from_grid(
+    formats: Sequence[str],
+    sizes: Sequence[int],
+    edit_rates: Sequence[float],
+    seed: int = 0,
+    clustered: bool = False,
+) -> List[CorpusSpec]:
+    return [
+        CorpusSpec(fmt, n, rate, seed, clustered)
+        for fmt in formats
+        for n in sizes
+        for rate in edit_rates
+    ]
+
+
+def add_grid_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["txt", "docx"])
+    parser.add_argument("--blocks", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--edit-rates", type=float, nargs="+", default=[0.01, 0.1])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--clustered", action="store_true", help="Keep the edits in one contiguous section")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic docdiff document pairs.")
+    parser.add_argument("out_dir", type=Path)
+    add_grid_arguments(parser)
+    args = parser.parse_args()
+
+    manifest: List[Dict[str, Any]] = []
+    for spec in specs_from_grid(args.formats, args.blocks, args.edit_rates, args.seed, args.clustered):
+        old, new = make_pair(spec, args.out_dir)
+        manifest.append({"name": spec.name, "old": old.name, "new": new.name, **asdict(spec)})
+    # the manifest doubles as a `docdiff.main --batch` input
+    with open(args.out_dir / "manifest.jsonl", "w", encoding="utf-8") as f:
+        for row in manifest:
+            f.write(json.dumps(row) + "\n")
+    print(f"{len(manifest)} pairs written to {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
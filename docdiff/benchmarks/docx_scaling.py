@@ -0,0 +1,78 @@
+"""
+Extraction scaling benchmark for extract_docx_blocks.
+
+Generates docx files with a growing number of paragraphs (plus a table
+every `table_every` paragraphs) and reports extraction time per paragraph.
+Linear extraction keeps the time per paragraph roughly constant.
+--mode selects the DocxExtractor mode ("python-docx" or "stream").
+
+Usage:
+    python -m docdiff.benchmarks.docx_scaling --sizes 2500 5000 10000 20000 --mode stream
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+import argparse
+import json
+import tempfile
+import time
+
+from docx import Document
+
+from docdiff.extractors.extract_docx import DOCX_MODES, DocxExtractor
+
+
+def build_docx(path: Path, paragraphs: int, table_every: int = 500) -> Path:
+    """Writes a docx with `paragraphs` paragraphs and a small table every `table_every` paragraphs."""
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"Paragraph {i}: the contractor shall deliver item {i % 97} within {i % 30 + 1} days.")
+        if table_every and i % table_every == table_every - 1:
+            table = doc.add_table(rows=2, cols=2)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"t{i}-{r}{c}"
+    doc.save(str(path))
+    return path
+
+
+def measure(sizes: Sequence[int], workdir: Path, mode: str = "python-docx") -> List[Dict[str, Any]]:
+    extractor = DocxExtractor(mode=mode)
+    results: List[Dict[str, Any]] = []
+    for n in sizes:
+        path = build_docx(workdir / f"bench_{n}.docx", n)
+        start = time.perf_counter()
+        blocks = extractor.extract_blocks(path)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "paragraphs": n,
+            "blocks": len(blocks),
+            "seconds": round(elapsed, 4),
+            "us_per_paragraph": round(elapsed / n * 1e6, 2),
+        })
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure docx extraction scaling.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2500, 5000, 10000, 20000])
+    parser.add_argument("--mode", choices=DOCX_MODES, default="python-docx")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = measure(args.sizes, Path(tmp), args.mode)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'paragraphs':>10} {'blocks':>8} {'seconds':>9} {'us/para':>9}")
+        for r in results:
+            print(f"{r['paragraphs']:>10} {r['blocks']:>8} {r['seconds']:>9} {r['us_per_paragraph']:>9}")
+        # Linear scaling keeps the time per paragraph flat across sizes
+        growth = results[-1]["us_per_paragraph"] / max(results[0]["us_per_paragraph"], 1e-9)
+        print(f"time per paragraph growth (largest/smallest): {growth:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
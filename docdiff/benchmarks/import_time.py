@@ -0,0 +1,69 @@
+"""
+CLI cold-start benchmark.
+
+Imports `docdiff.main` (or any module) in fresh interpreters and reports the
+wall time of the import and which heavy optional modules it pulled in.
+A `.txt` comparison should not pay for python-docx, openpyxl or spaCy.
+
+Usage:
+    python -m docdiff.benchmarks.import_time --runs 10
+    python -m docdiff.benchmarks.import_time --module docdiff.report_builder --json
+"""
+from typing import Any, Dict, List, Sequence
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("docx", "openpyxl", "spacy", "numpy", "sklearn")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_once(module: str, heavy: Sequence[str] = HEAVY_MODULES) -> Dict[str, Any]:
+    """Imports `module` in a new interpreter and returns its import time and loaded heavy modules."""
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module, heavy=tuple(heavy))],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure(module: str, runs: int) -> Dict[str, Any]:
+    samples: List[Dict[str, Any]] = [measure_once(module) for _ in range(runs)]
+    times = [s["seconds"] for s in samples]
+    return {
+        "module": module,
+        "runs": runs,
+        "min_ms": round(min(times) * 1000, 2),
+        "median_ms": round(statistics.median(times) * 1000, 2),
+        "heavy_loaded": samples[-1]["loaded"],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the docdiff CLI.")
+    parser.add_argument("--module", default="docdiff.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.runs)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['module']}: min {result['min_ms']} ms, median {result['median_ms']} ms "
+              f"over {result['runs']} runs")
+        print(f"heavy modules loaded: {', '.join(result['heavy_loaded']) or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,228 @@
+"""
+Per-stage benchmark of the docdiff pipeline on synthetic pairs (see corpus).
+
+For every pair the stages run one after another, as in a job and with
+the job settings (DOCDIFF_DOCX_MODE, DOCDIFF_XLSX_CHUNK_ROWS and
+DOCDIFF_DIFF_MODE, see docdiff.pipeline): extraction (old and new, without
+the extraction cache), the block diff, AI analysis of the changed
+paragraphs (analyze_changes, without the stored history) and
+generate_html_report. Each stage reports
+wall time, current RSS and its growth, the process RSS high-water mark
+after the stage and, with --alloc, the tracemalloc allocation peak
+(tracing slows the stage down, so compare times only between runs with
+the same setting).
+
+Results are written as JSON. With --budget-seconds the run also suggests
+DOCDIFF_MAX_FILE_SIZE_MB / DOCDIFF_MAX_CHANGED_BLOCKS values that keep a
+comparison within that budget on this machine.
+
+Usage:
+    python -m docdiff.benchmarks.pipeline_stages --formats txt docx --blocks 1000 10000 \\
+        --edit-rates 0.01 0.1 --output bench.json --budget-seconds 30
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from core.nlp import rss_mb
+from docdiff.benchmarks.corpus import CorpusSpec, add_grid_arguments, make_pair, specs_from_grid
+
+STAGES = ("extract_old", "extract_new", "diff", "analyze", "report")
+# job settings the results depend on (recorded in environment())
+PIPELINE_SETTINGS = ("DOCDIFF_DOCX_MODE", "DOCDIFF_XLSX_CHUNK_ROWS", "DOCDIFF_DIFF_MODE")
+
+
+def setup_django() -> None:
+    """The pipeline reads its settings from Django (config.settings unless set otherwise)."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    django.setup()
+
+
+def _max_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def _round(value: Optional[float], digits: int = 1) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def measure_stage(fn: Callable[[], Any], trace_alloc: bool = False) -> Tuple[Any, Dict[str, Any]]:
+    """Runs `fn` once and returns its result with the stage metrics."""
+    gc.collect()
+    before = rss_mb()
+    if trace_alloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn()
+        seconds = time.perf_counter() - start
+        alloc_peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace_alloc else None
+    finally:
+        if trace_alloc:
+            tracemalloc.stop()
+    after = rss_mb()
+    return result, {
+        "seconds": round(seconds, 4),
+        "rss_mb": _round(after),
+        "rss_delta_mb": _round(after - before) if None not in (before, after) else None,
+        "max_rss_mb": _round(_max_rss_mb()),
+        "alloc_peak_mb": _round(alloc_peak, 2),
+    }
+
+
+def _text_changes(diffs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Changed paragraph pairs, the blocks the job pipeline sends to spaCy."""
+    return [
+        b for b in diffs
+        if b.get("change") == "changed"
+        and (b.get("old") or {}).get("type") == "paragraph"
+        and (b.get("new") or {}).get("type") == "paragraph"
+    ]
+
+
+def run_pair(old: Path, new: Path, trace_alloc: bool = False, ai: bool = True) -> Dict[str, Any]:
+    """Times every pipeline stage for one document pair."""
+    from docdiff.heuristics_ai import analyze_changes
+    from docdiff.pipeline import diff_blocks, get_extractor
+    from docdiff.report_builder import generate_html_report
+
+    stages: Dict[str, Dict[str, Any]] = {}
+    old_blocks, stages["extract_old"] = measure_stage(lambda: get_extractor(old).extract_blocks(old), trace_alloc)
+    new_blocks, stages["extract_new"] = measure_stage(lambda: get_extractor(new).extract_blocks(new), trace_alloc)
+    diffs, stages["diff"] = measure_stage(lambda: diff_blocks(old_blocks, new_blocks), trace_alloc)
+
+    changes = _text_changes(diffs)
+    if ai:
+        results, stages["analyze"] = measure_stage(lambda: analyze_changes(changes), trace_alloc)
+        for block, result in zip(changes, results):
+            block.update(result)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = Path(tmp) / "report.html"
+        _, stages["report"] = measure_stage(lambda: generate_html_report(diffs, str(report), ai=ai), trace_alloc)
+        report_bytes = report.stat().st_size
+
+    return {
+        "old_bytes": old.stat().st_size,
+        "new_bytes": new.stat().st_size,
+        "old_blocks": len(old_blocks),
+        "new_blocks": len(new_blocks),
+        "changed": sum(1 for b in diffs if b.get("change") == "changed"),
+        "analyzed": len(changes) if ai else 0,
+        "report_bytes": report_bytes,
+        "total_seconds": round(sum(s["seconds"] for s in stages.values()), 4),
+        "stages": stages,
+    }
+
+
+def suggest_limits(results: List[Dict[str, Any]], budget_seconds: float) -> Dict[str, Any]:
+    """
+    Largest upload size (whole MB, rounded down as the setting is an int)
+    among pairs finished within the budget, and the number of changed
+    blocks the slowest measured rate allows, the whole comparison (every
+    stage) timed per changed block. A limit with no measurement behind it
+    (e.g. every pair within the budget under 1 MB) is None.
+    """
+    within = [r for r in results if r["total_seconds"] <= budget_seconds]
+    max_mb = max((max(r["old_bytes"], r["new_bytes"]) / 2 ** 20 for r in within), default=None)
+
+    rates = [r["total_seconds"] / r["changed"] for r in results if r["changed"]]
+    return {
+        "budget_seconds": budget_seconds,
+        "DOCDIFF_MAX_FILE_SIZE_MB": math.floor(max_mb) if max_mb is not None and max_mb >= 1 else None,
+        "DOCDIFF_MAX_CHANGED_BLOCKS": int(budget_seconds / max(rates)) if rates and max(rates) > 0 else None,
+    }
+
+
+def environment(ai: bool = True) -> Dict[str, Any]:
+    """Machine and settings of the run; with `ai` also whether the spaCy model loads."""
+    from django.conf import settings
+
+    env: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {name: getattr(settings, name, None) for name in PIPELINE_SETTINGS},
+    }
+    if ai:
+        from docdiff.heuristics_ai import get_nlp
+
+        # without the model analyze_change falls back to SequenceMatcher
+        env["spacy_model"] = get_nlp() is not None
+    return env
+
+
+def run(
+    specs: Sequence[CorpusSpec],
+    workdir: Path,
+    trace_alloc: bool = False,
+    ai: bool = True,
+) -> List[Dict[str, Any]]:
+    results = []
+    for spec in specs:
+        old, new = make_pair(spec, workdir)
+        results.append({
+            "name": spec.name,
+            "format": spec.fmt,
+            "blocks": spec.blocks,
+            "edit_rate": spec.edit_rate,
+            "clustered": spec.clustered,
+            **run_pair(old, new, trace_alloc, ai),
+        })
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time every docdiff pipeline stage on synthetic pairs.")
+    add_grid_arguments(parser)
+    parser.add_argument("--alloc", action="store_true", help="Trace allocations (tracemalloc) per stage")
+    parser.add_argument("--no-ai", dest="ai", action="store_false", help="Skip the spaCy analysis stage")
+    parser.add_argument("--output", type=Path, default=None, help="Write results as JSON to this file")
+    parser.add_argument("--budget-seconds", type=float, default=None,
+                        help="Suggest upload/change limits that keep a comparison within this time")
+    args = parser.parse_args()
+
+    specs = specs_from_grid(args.formats, args.blocks, args.edit_rates, args.seed, args.clustered)
+    setup_django()
+    # loads the spaCy model up front (with AI), so its load time is not charged to the first pair
+    env = environment(args.ai)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(specs, Path(tmp), args.alloc, args.ai)
+
+    payload: Dict[str, Any] = {"environment": env, "results": results}
+    if args.budget_seconds is not None:
+        payload["limits"] = suggest_limits(results, args.budget_seconds)
+
+    if args.output:
+        args.output.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    print(f"{'pair':<34} {'changed':>7} " + " ".join(f"{s:>11}" for s in STAGES) + f" {'total':>8}")
+    for r in results:
+        cols = " ".join(
+            f"{r['stages'][s]['seconds']:>11.4f}" if s in r["stages"] else f"{'-':>11}" for s in STAGES
+        )
+        print(f"{r['name']:<34} {r['changed']:>7} {cols} {r['total_seconds']:>8.3f}")
+    if "limits" in payload:
+        print("suggested limits:", json.dumps(payload["limits"]))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
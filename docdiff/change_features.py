@@ -0,0 +1,66 @@
+"""
+Text features of a changed block, computed once and shared.
+
+classify_change_type / analyze_change (heuristics_ai) and the report scoring
+(compute_stats_and_scores) all need the old/new similarity ratio and a few
+pattern hits over the same pair. change_features() runs one SequenceMatcher
+and each precompiled pattern once per block; block_features() keeps the
+result in the block under FEATURES_KEY, so later consumers reuse it.
+"""
+from difflib import SequenceMatcher
+from typing import Any, Dict, List
+import re
+
+FEATURES_KEY = "_features"
+
+# heuristic labels (extract_labels_spacy)
+UNIT_LABEL_RE = re.compile(r"(kg|mm|cm|km|\bm\b|%)")
+NUMBER_LABEL_RE = re.compile(r"\b\d+[.,]?\d*\b")
+# references to legal articles, paragraphs, etc. (classify_change_type)
+LEGAL_REF_RE = re.compile(r"\b(§|art\.|ust\.|pkt\.|dz\.u\.|poz\.)\b", re.IGNORECASE)
+# report scoring (compute_stats_and_scores)
+DIGIT_RE = re.compile(r"\d")
+SCORE_UNIT_RE = re.compile(r"\b(kg|m|mm|cm|%|km|PLN|EUR|kW)\b", re.IGNORECASE)
+YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+
+
+def heuristic_labels(text: str) -> List[str]:
+    """Labels derived from patterns alone ('unit', 'numbers')."""
+    labels = []
+    if UNIT_LABEL_RE.search(text):
+        labels.append("unit")
+    if NUMBER_LABEL_RE.search(text):
+        labels.append("numbers")
+    return labels
+
+
+def block_texts(block: Dict[str, Any]):
+    old_text = (block.get("old", {}) or {}).get("text") or ""
+    new_text = (block.get("new", {}) or {}).get("text") or ""
+    return old_text, new_text
+
+
+def change_features(old_text: str, new_text: str) -> Dict[str, Any]:
+    """All features of one old/new pair (JSON-serializable)."""
+    combined = f"{old_text} {new_text}"
+    # without a digit the year pattern cannot match
+    has_digit = DIGIT_RE.search(combined) is not None
+    return {
+        "ratio": SequenceMatcher(None, old_text, new_text).ratio(),
+        "old_words": len(old_text.split()),
+        "new_words": len(new_text.split()),
+        "labels": heuristic_labels(combined),
+        "legal_ref": LEGAL_REF_RE.search(combined) is not None,
+        "digit": has_digit,
+        "unit": SCORE_UNIT_RE.search(combined) is not None,
+        "year": has_digit and YEAR_RE.search(combined) is not None,
+    }
+
+
+def block_features(block: Dict[str, Any]) -> Dict[str, Any]:
+    """Features of a block's old/new texts, computed on first use and stored in the block."""
+    features = block.get(FEATURES_KEY)
+    if features is None:
+        features = change_features(*block_texts(block))
+        block[FEATURES_KEY] = features
+    return features
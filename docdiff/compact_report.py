@@ -0,0 +1,234 @@
+"""
+Compact JSON report: the diff as an edit script from the old to the new document.
+
+The file is JSON Lines, written op by op (constant memory) and readable
+the same way. The first line is a header, every further line one op;
+block indices refer to the extracted blocks of each document:
+
+    {"format": "docdiff-compact", "version": 2}
+    ["=", i, j, n]          n unchanged blocks (old i.., new j..)
+    [">", i, j, n]          n unchanged blocks moved from old i.. to new j..
+    ["-", i, n]             n deleted blocks of the old document
+    ["+", j, [block, ...]]  blocks added at new index j
+    ["~", i, j, detail]     old block i changed into new block j
+
+Ops follow the new document; old indices only increase unless a section
+was moved (section diff), so "=" / "~" may point back into the old one.
+Version 1 reports (without ">") are read as well.
+
+A changed paragraph carries `edits` (see diff_engine.text_edits) and the
+attributes that differ from the old block; other changed blocks carry the
+whole new block. AI analysis fields are kept under `ai`.
+
+Output may be compressed with gzip or, when the `zstandard` package is
+installed, zstd (chosen by the caller or by the .gz / .zst suffix).
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+import gzip
+import io
+import json
+
+from .diff_engine import apply_text_edits, text_edits
+
+FORMAT_NAME = "docdiff-compact"
+FORMAT_VERSION = 2
+READABLE_VERSIONS = (1, 2)
+COMPRESSIONS = ("gzip", "zstd")
+
+# Added blocks per "+" op (bounds memory for long insertions)
+ADDED_RUN_MAX = 256
+
+_AI_KEYS = ("labels", "semantic_score", "change_type", "confidence")
+# Keys added to blocks by the diff and the analysis, not by the extractors
+_DIFF_KEYS = frozenset(("change", "moved") + _AI_KEYS)
+_MISSING = object()
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+Op = List[Any]
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise RuntimeError("zstd compression needs the 'zstandard' package") from exc
+    return zstandard
+
+
+def compression_for(path: Union[str, Path]) -> Optional[str]:
+    """Compression implied by the file suffix (.gz / .zst)."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".gz":
+        return "gzip"
+    if suffix in (".zst", ".zstd"):
+        return "zstd"
+    return None
+
+
+def open_report(path: Union[str, Path], mode: str = "r", compression: Optional[str] = None):
+    """
+    Opens a report file as text ("r" or "w"). When reading, compression is
+    detected from the file content; when writing it is `compression` or
+    the one implied by the suffix.
+    """
+    if mode not in ("r", "w"):
+        raise ValueError(f"Unsupported mode: {mode}")
+    if mode == "r":
+        with open(path, "rb") as f:
+            magic = f.read(4)
+        compression = "gzip" if magic[:2] == _GZIP_MAGIC else "zstd" if magic == _ZSTD_MAGIC else None
+    elif compression is None:
+        compression = compression_for(path)
+
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if compression == "zstd":
+        zstd = _zstd()
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstd.ZstdCompressor().stream_writer(raw)
+        else:
+            stream = zstd.ZstdDecompressor().stream_reader(raw)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+# ---------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------
+
+
+def _clean(block: Dict[str, Any]) -> Dict[str, Any]:
+    """Extracted block without diff/analysis fields (change, moved, labels, _score...)."""
+    return {k: v for k, v in block.items() if k not in _DIFF_KEYS and not k.startswith("_")}
+
+
+def _changed_detail(entry: Dict[str, Any]) -> Dict[str, Any]:
+    old = _clean(entry.get("old") or {})
+    new = _clean(entry.get("new") or {})
+    if old.get("type") == "paragraph" and new.get("type") == "paragraph":
+        detail: Dict[str, Any] = {"edits": text_edits(old.get("text") or "", new.get("text") or "")}
+        attrs = {k: v for k, v in new.items() if k != "text" and old.get(k, _MISSING) != v}
+        dropped = [k for k in old if k not in new]
+        if attrs:
+            detail["attrs"] = attrs
+        if dropped:
+            detail["drop"] = dropped
+    else:
+        detail = {"block": new}
+    ai = {k: entry[k] for k in _AI_KEYS if k in entry}
+    if ai:
+        detail["ai"] = ai
+    return detail
+
+
+def iter_compact_ops(block_diffs: Iterable[Dict[str, Any]]) -> Iterator[Op]:
+    """
+    Converts compare_blocks() output into compact ops (runs are merged).
+    Block indices come from the entries' `_old_index` / `_new_index` when
+    present (results not in document order), else from their position.
+    """
+    i = j = 0
+    pending: Optional[Op] = None
+
+    for entry in block_diffs:
+        change = entry.get("change")
+        i = entry.get("_old_index", i)
+        j = entry.get("_new_index", j)
+        if change == "unchanged":
+            tag = ">" if entry.get("moved") else "="
+            if pending and pending[0] == tag and pending[1] + pending[3] == i and pending[2] + pending[3] == j:
+                pending[3] += 1
+            else:
+                if pending:
+                    yield pending
+                pending = [tag, i, j, 1]
+            i += 1
+            j += 1
+        elif change == "deleted":
+            if pending and pending[0] == "-" and pending[1] + pending[2] == i:
+                pending[2] += 1
+            else:
+                if pending:
+                    yield pending
+                pending = ["-", i, 1]
+            i += 1
+        elif change == "added":
+            block = _clean(entry)
+            if pending and pending[0] == "+" and pending[1] + len(pending[2]) == j and len(pending[2]) < ADDED_RUN_MAX:
+                pending[2].append(block)
+            else:
+                if pending:
+                    yield pending
+                pending = ["+", j, [block]]
+            j += 1
+        else:
+            if pending:
+                yield pending
+                pending = None
+            yield ["~", i, j, _changed_detail(entry)]
+            i += 1
+            j += 1
+
+    if pending:
+        yield pending
+
+
+def write_compact_report(
+    block_diffs: Iterable[Dict[str, Any]],
+    output_path: Union[str, Path],
+    compression: Optional[str] = None,
+) -> None:
+    """Streams the compact report to `output_path`, one op per line."""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    with open_report(output_path, "w", compression) as f:
+        f.write(dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION}) + "\n")
+        for op in iter_compact_ops(block_diffs):
+            f.write(dumps(op) + "\n")
+
+
+# ---------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------
+
+
+def read_compact_report(path: Union[str, Path]) -> Iterator[Op]:
+    """Yields the ops of a compact report (plain, gzip or zstd)."""
+    with open_report(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != FORMAT_NAME:
+            raise ValueError(f"Not a compact docdiff report: {path}")
+        if header.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported compact report version: {header.get('version')}")
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def apply_compact_ops(old_blocks: List[Dict[str, Any]], ops: Iterable[Op]) -> List[Dict[str, Any]]:
+    """Rebuilds the new document's blocks from the old ones and the ops."""
+    new_blocks: List[Dict[str, Any]] = []
+    for op in ops:
+        tag = op[0]
+        if tag in ("=", ">"):
+            _, i, _, n = op
+            new_blocks.extend(dict(b) for b in old_blocks[i:i + n])
+        elif tag == "+":
+            new_blocks.extend(op[2])
+        elif tag == "~":
+            _, i, _, detail = op
+            if "block" in detail:
+                new_blocks.append(detail["block"])
+                continue
+            old = old_blocks[i]
+            block = {k: v for k, v in old.items() if k not in detail.get("drop", ())}
+            block.update(detail.get("attrs", {}))
+            block["text"] = apply_text_edits(old.get("text") or "", detail["edits"])
+            new_blocks.append(block)
+        elif tag != "-":
+            raise ValueError(f"Unknown op: {tag}")
+    return new_blocks
@@ -2,10 +2,14 @@
 Comparing document blocks with inline HTML diff for paragraphs
 and cell-level diff for tables.
 """
+from concurrent.futures import Executor
 from difflib import SequenceMatcher
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 import logging
 import html
+import re
+
+from .alignment import DEFAULT_ENGINE, Opcode, align, block_digest, row_digest
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -16,17 +20,26 @@ def _safe_str(value: Any) -> str:
         return ""
     return str(value)
 
-def html_inline_diff(a: str, b: str) -> str:
-    """
-    Returns a combination of 'a' and 'b' with <del> and <ins> tags.
-    Safely escapes source fragments before wrapping them in HTML tags.
-    """
-    a = _safe_str(a)
-    b = _safe_str(b)
+# Tokenizers for inline diff granularity levels
+_TOKEN_PATTERNS = {
+    "word": re.compile(r"\w+|\s+|[^\w\s]"),
+    "sentence": re.compile(r"[^.!?;\n]*(?:[.!?;\n]+|$)\s*"),
+}
+
+INLINE_GRANULARITIES = ("char", "word", "sentence")
+DEFAULT_GRANULARITY = "word"
+
+# Short, similar replaced spans (typos, single-letter edits) are refined char by char
+CHAR_FALLBACK_MAX = 40
+CHAR_FALLBACK_MIN_RATIO = 0.6
+
+
+def _tokenize(text: str, granularity: str) -> List[str]:
+    return [t for t in _TOKEN_PATTERNS[granularity].findall(text) if t]
 
-    sm = SequenceMatcher(None, a, b)
-    parts: List[str] = []
 
+def _char_diff(a: str, b: str, parts: List[str], sm: Optional[SequenceMatcher] = None) -> None:
+    sm = sm or SequenceMatcher(None, a, b)
     for tag, i1, i2, j1, j2 in sm.get_opcodes():
         if tag == "equal":
             parts.append(html.escape(a[i1:i2]))
@@ -39,9 +52,106 @@ def html_inline_diff(a: str, b: str) -> str:
                 f"<del>{html.escape(a[i1:i2])}</del>"
                 f"<ins>{html.escape(b[j1:j2])}</ins>"
             )
+
+
+def _token_diff(a: str, b: str, granularity: str, parts: List[str]) -> None:
+    ta = _tokenize(a, granularity)
+    tb = _tokenize(b, granularity)
+
+    for tag, i1, i2, j1, j2 in align(ta, tb):
+        old = "".join(ta[i1:i2])
+        new = "".join(tb[j1:j2])
+        if tag == "equal":
+            parts.append(html.escape(old))
+        elif tag == "delete":
+            parts.append(f"<del>{html.escape(old)}</del>")
+        elif tag == "insert":
+            parts.append(f"<ins>{html.escape(new)}</ins>")
+        elif granularity == "sentence":
+            # replaced sentences are refined word by word
+            _token_diff(old, new, "word", parts)
+        else:
+            sm = SequenceMatcher(None, old, new) if len(old) + len(new) <= CHAR_FALLBACK_MAX else None
+            if sm is not None and sm.ratio() >= CHAR_FALLBACK_MIN_RATIO:
+                _char_diff(old, new, parts, sm)
+            else:
+                parts.append(f"<del>{html.escape(old)}</del><ins>{html.escape(new)}</ins>")
+
+
+def html_inline_diff(a: str, b: str, granularity: str = DEFAULT_GRANULARITY) -> str:
+    """
+    Returns a combination of 'a' and 'b' with <del> and <ins> tags.
+    Safely escapes source fragments before wrapping them in HTML tags.
+
+    granularity:
+      - 'char': character-level diff
+      - 'word': diff of word/whitespace/punctuation tokens; short replaced
+        spans are refined at character level
+      - 'sentence': diff of sentences; replaced sentences are refined at word level
+    """
+    if granularity not in INLINE_GRANULARITIES:
+        raise ValueError(f"Unknown inline diff granularity: {granularity}")
+
+    a = _safe_str(a)
+    b = _safe_str(b)
+
+    parts: List[str] = []
+    if a == b:
+        parts.append(html.escape(a))
+    elif granularity == "char":
+        _char_diff(a, b, parts)
+    else:
+        _token_diff(a, b, granularity, parts)
     return "".join(parts)
 
 
+def text_edits(a: str, b: str) -> List[Union[int, str]]:
+    """
+    Word-level edit script turning `a` into `b`: a positive int keeps that
+    many characters of `a`, a negative int skips (deletes) that many and a
+    string is inserted. Adjacent operations of the same kind are merged.
+    """
+    a = _safe_str(a)
+    b = _safe_str(b)
+    edits: List[Union[int, str]] = []
+
+    def emit(op: Union[int, str]) -> None:
+        if not op:
+            return
+        last = edits[-1] if edits else None
+        if isinstance(op, str) and isinstance(last, str):
+            edits[-1] = last + op
+        elif isinstance(op, int) and isinstance(last, int) and (op > 0) == (last > 0):
+            edits[-1] = last + op
+        else:
+            edits.append(op)
+
+    ta = _tokenize(a, "word")
+    tb = _tokenize(b, "word")
+    for tag, i1, i2, j1, j2 in align(ta, tb):
+        if tag == "equal":
+            emit(sum(len(t) for t in ta[i1:i2]))
+            continue
+        emit(-sum(len(t) for t in ta[i1:i2]))
+        emit("".join(tb[j1:j2]))
+    return edits
+
+
+def apply_text_edits(a: str, edits: Sequence[Union[int, str]]) -> str:
+    """Applies a text_edits() script to `a`."""
+    out: List[str] = []
+    pos = 0
+    for op in edits:
+        if isinstance(op, str):
+            out.append(op)
+        elif op > 0:
+            out.append(a[pos:pos + op])
+            pos += op
+        else:
+            pos -= op
+    return "".join(out)
+
+
 def _table_cell_diff(old_cell: str, new_cell: str) -> Dict[str, str]:
     """
     Returns a diff structure for a single table cell: type + inline_html.
@@ -81,41 +191,287 @@ def _diff_tables(old_table: List[List[str]], new_table: List[List[str]]) -> List
     return table_changes
 
 
-def compare_blocks(old_blocks: List[Dict[str, Any]], new_blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _has_header(table: List[List[str]]) -> bool:
+    if len(table) < 2 or not table[0]:
+        return False
+    header = [_safe_str(c).strip() for c in table[0]]
+    return all(header) and len(set(header)) == len(header)
+
+
+# Share of header names both tables must have in common to match columns by name
+HEADER_MIN_SHARED = 0.5
+
+
+def _align_columns(
+    old_table: List[List[str]],
+    new_table: List[List[str]],
+    use_header: bool = True,
+) -> Tuple[List[Tuple[Optional[int], Optional[int]]], bool]:
+    """
+    Maps old columns to new columns. Columns are matched by header name when both
+    tables have a unique, non-empty first row and share at least HEADER_MIN_SHARED
+    of those names (a first row of data rarely does); the remaining columns
+    (renamed headers) are paired in order. Otherwise columns are matched by
+    position, as they always are without `use_header`. Returns (column pairs,
+    header used).
+    """
+    if use_header and _has_header(old_table) and _has_header(new_table):
+        old_header = [_safe_str(c).strip() for c in old_table[0]]
+        new_pos = {_safe_str(c).strip(): i for i, c in enumerate(new_table[0])}
+        shared = sum(1 for h in old_header if h in new_pos)
+        if shared and shared >= HEADER_MIN_SHARED * max(len(old_header), len(new_pos)):
+            cols: List[Tuple[Optional[int], Optional[int]]] = [
+                (i, new_pos.get(h)) for i, h in enumerate(old_header)
+            ]
+            matched = {nc for _, nc in cols if nc is not None}
+            new_only = iter([j for j in range(len(new_table[0])) if j not in matched])
+            cols = [(oc, nc if nc is not None else next(new_only, None)) for oc, nc in cols]
+            cols.extend((None, j) for j in new_only)
+            return cols, True
+
+    width = max((len(r) for r in list(old_table) + list(new_table)), default=0)
+    return [(c, c) for c in range(width)], False
+
+
+def _project_row(row: List[str], indices: List[Optional[int]]) -> List[str]:
+    return [_safe_str(row[i]) if i is not None and i < len(row) else "" for i in indices]
+
+
+def _whole_row(cells: List[str], change: str) -> List[Dict[str, str]]:
+    tag = "ins" if change == "added" else "del"
+    return [
+        {"type": change, "text": c, "inline_html": f"<{tag}>{html.escape(c)}</{tag}>" if c else ""}
+        for c in cells
+    ]
+
+
+def _diff_tables_aligned(
+    old_table: List[List[str]],
+    new_table: List[List[str]],
+    engine: str = DEFAULT_ENGINE,
+    old_offset: int = 0,
+    new_offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Compares two tables by first aligning rows on hashed row content and
+    columns on header names, then diffing cells only inside matched rows.
+    `old_offset`/`new_offset` are the positions of the tables' first rows
+    in their sheets (streamed xlsx chunks): they are added to the reported
+    row indices, and a chunk not starting the sheet has no header row.
+
+    Only changed rows are emitted, so the output size follows the number
+    of changes rather than the table size:
+      - 'table_changes': 2D list of cell-level diffs for emitted rows
+      - 'table_rows': one record per emitted row, 'op' is one of
+        header_changed / row_changed / row_added / row_deleted with old/new
+        row indices (the header row is diffed on its own, before the rows)
+      - 'rows_unchanged': number of rows skipped as identical
+      - 'table_header': header names (when columns were matched by header)
+    """
+    cols, header = _align_columns(old_table, new_table, use_header=not (old_offset or new_offset))
+    old_idx = [oc for oc, _ in cols]
+    new_idx = [nc for _, nc in cols]
+    start = 1 if header else 0
+
+    old_rows = [_project_row(r, old_idx) for r in old_table[start:]]
+    new_rows = [_project_row(r, new_idx) for r in new_table[start:]]
+
+    table_changes: List[List[Dict[str, str]]] = []
+    table_rows: List[Dict[str, Any]] = []
+    unchanged = 0
+
+    def emit(op: str, i: Optional[int], j: Optional[int], cells: List[Dict[str, str]]) -> None:
+        table_rows.append({
+            "op": op,
+            "old_row": None if i is None else old_offset + i + start,
+            "new_row": None if j is None else new_offset + j + start,
+        })
+        table_changes.append(cells)
+
+    if header:
+        old_head, new_head = _project_row(old_table[0], old_idx), _project_row(new_table[0], new_idx)
+        if old_head != new_head:
+            table_rows.append({"op": "header_changed", "old_row": 0, "new_row": 0})
+            table_changes.append([_table_cell_diff(oc, nc) for oc, nc in zip(old_head, new_head)])
+
+    opcodes = align([row_digest(r) for r in old_rows], [row_digest(r) for r in new_rows], engine)
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            unchanged += i2 - i1
+            continue
+        pairs = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in range(pairs):
+            o, n = old_rows[i1 + k], new_rows[j1 + k]
+            emit("row_changed", i1 + k, j1 + k, [_table_cell_diff(oc, nc) for oc, nc in zip(o, n)])
+        for i in range(i1 + pairs, i2):
+            emit("row_deleted", i, None, _whole_row(old_rows[i], "deleted"))
+        for j in range(j1 + pairs, j2):
+            emit("row_added", None, j, _whole_row(new_rows[j], "added"))
+
+    result: Dict[str, Any] = {
+        "table_changes": table_changes,
+        "table_rows": table_rows,
+        "rows_unchanged": unchanged,
+    }
+    if header:
+        result["table_header"] = [
+            _safe_str(new_table[0][nc]) if nc is not None else _safe_str(old_table[0][oc])
+            for oc, nc in cols
+        ]
+    return result
+
+
+def unchanged_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """compare_blocks() result for two documents with identical blocks."""
+    return [{"change": "unchanged", **b} for b in blocks]
+
+
+TABLE_MODES = ("aligned", "positional")
+DEFAULT_TABLE_MODE = "aligned"
+
+
+def compare_blocks(
+    old_blocks: List[Dict[str, Any]],
+    new_blocks: List[Dict[str, Any]],
+    engine: str = DEFAULT_ENGINE,
+    granularity: str = DEFAULT_GRANULARITY,
+    table_mode: str = DEFAULT_TABLE_MODE,
+    sections: bool = False,
+    executor: Optional[Executor] = None,
+) -> List[Dict[str, Any]]:
     """
     Compares sequences of blocks and returns a list of objects describing the changes.
 
+    Blocks are aligned by their content digests using the selected
+    alignment engine ("myers", "patience" or "difflib"). Paragraph inline
+    diffs use the given granularity ("char", "word" or "sentence").
+
+    Blocks carrying a `scope` (structural docx extraction: body, each
+    header/footer, notes) are aligned scope by scope, so blocks never match
+    across stories; the result lists the scopes in document order.
+
+    With `sections` every scope is split at its headings and diffed section
+    by section (see docdiff.section_diff), the section diffs running in
+    `executor` when one is given and the documents are large.
+
     For paragraph blocks:
       - 'unchanged': contains the full block (from old)
       - 'changed': contains 'old', 'new' and 'inline_html' (HTML diff)
 
     For tables:
       - 'changed' contains 'table_changes' (2D list of cell-level diffs).
+        In 'aligned' table mode rows are matched by content and columns by header,
+        only changed rows are listed and 'table_rows' describes each of them
+        (see _diff_tables_aligned). 'positional' compares cells by row/column index.
     """
+    if table_mode not in TABLE_MODES:
+        raise ValueError(f"Unknown table diff mode: {table_mode}")
+
+    # Each block is hashed at most once
+    a_keys = [block_digest(b) for b in old_blocks]
+    b_keys = [block_digest(b) for b in new_blocks]
+    return compare_digested_blocks(
+        old_blocks, new_blocks, a_keys, b_keys, engine, granularity, table_mode, sections, executor
+    )
+
+
+def compare_digested_blocks(
+    old_blocks: List[Dict[str, Any]],
+    new_blocks: List[Dict[str, Any]],
+    a_keys: Sequence[bytes],
+    b_keys: Sequence[bytes],
+    engine: str = DEFAULT_ENGINE,
+    granularity: str = DEFAULT_GRANULARITY,
+    table_mode: str = DEFAULT_TABLE_MODE,
+    sections: bool = False,
+    executor: Optional[Executor] = None,
+) -> List[Dict[str, Any]]:
+    """compare_blocks() for blocks already hashed by it, one block_digest() per block."""
+    # Identical block sequences skip the alignment entirely
+    if list(a_keys) == list(b_keys):
+        return unchanged_blocks(old_blocks)
+
+    def diff(old: Sequence[Dict[str, Any]], new: Sequence[Dict[str, Any]],
+             old_keys: Sequence[bytes], new_keys: Sequence[bytes]) -> List[Dict[str, Any]]:
+        if sections:
+            from .section_diff import compare_sections
+            return compare_sections(old, new, old_keys, new_keys, engine, granularity, table_mode, executor)
+        return entries_from_opcodes(align(old_keys, new_keys, engine), old, new, engine, granularity, table_mode)
+
+    old_scopes, new_scopes = scope_indices(old_blocks), scope_indices(new_blocks)
+    if len(old_scopes) <= 1 and len(new_scopes) <= 1 and old_scopes.keys() == new_scopes.keys():
+        return diff(old_blocks, new_blocks, a_keys, b_keys)
+
     result: List[Dict[str, Any]] = []
+    for scope in merge_scope_order(list(old_scopes), list(new_scopes)):
+        old_idx, new_idx = old_scopes.get(scope, []), new_scopes.get(scope, [])
+        result.extend(index_entries(diff(
+            [old_blocks[i] for i in old_idx], [new_blocks[j] for j in new_idx],
+            [a_keys[i] for i in old_idx], [b_keys[j] for j in new_idx],
+        ), old_idx, new_idx))
+    return result
 
-    def key_of(b: Dict[str, Any]) -> str:
-        # Create a comparison key for each block depending on its type
-        t = b.get("type", "")
-        if t == "paragraph":
-            return "paragraph:" + (b.get("text") or "")
-        if t == "table":
-            rows = b.get("table") or []
-            # If the table has a sheet name, include it for better identification
-            sheet = b.get("sheet")
-            rows_key = "|".join([",".join(row) for row in rows])
-            if sheet:
-                return f"table:{sheet}:{rows_key}"
-            return "table:" + rows_key
-        if t == "image":
-            return "image:" + (b.get("sha1") or b.get("rel_id", ""))
-        return t
-
-    a_keys = [key_of(b) for b in old_blocks]
-    b_keys = [key_of(b) for b in new_blocks]
-
-    sm = SequenceMatcher(None, a_keys, b_keys)
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
+
+def index_entries(
+    entries: List[Dict[str, Any]],
+    old_idx: Sequence[int],
+    new_idx: Sequence[int],
+) -> List[Dict[str, Any]]:
+    """
+    Records in `_old_index` / `_new_index` where the blocks of entries
+    computed on a subset of the documents come from: position k of the
+    subset is block old_idx[k] / new_idx[k]. Results that are not in
+    document order (scopes, moved sections) carry these indices; entries
+    without them are numbered by position (see compact_report).
+    """
+    i = j = 0
+    for entry in entries:
+        change = entry.get("change")
+        if change != "added":
+            i = entry.get("_old_index", i)
+            entry["_old_index"] = old_idx[i]
+            i += 1
+        if change != "deleted":
+            j = entry.get("_new_index", j)
+            entry["_new_index"] = new_idx[j]
+            j += 1
+    return entries
+
+
+def scope_indices(blocks: Sequence[Dict[str, Any]]) -> Dict[Optional[str], List[int]]:
+    """Block indices per `scope`, scopes in order of first appearance (None: no scope)."""
+    scopes: Dict[Optional[str], List[int]] = {}
+    for i, block in enumerate(blocks):
+        scopes.setdefault(block.get("scope"), []).append(i)
+    return scopes
+
+
+def merge_scope_order(old: List[Optional[str]], new: List[Optional[str]]) -> List[Optional[str]]:
+    """New document's scope order, old-only scopes placed after their predecessor in the old one."""
+    order = list(new)
+    for k, scope in enumerate(old):
+        if scope in order:
+            continue
+        pos = 0
+        for prev in reversed(old[:k]):
+            if prev in order:
+                pos = order.index(prev) + 1
+                break
+        order.insert(pos, scope)
+    return order
+
+
+def entries_from_opcodes(
+    opcodes: Iterable[Opcode],
+    old_blocks: Sequence[Dict[str, Any]],
+    new_blocks: Sequence[Dict[str, Any]],
+    engine: str = DEFAULT_ENGINE,
+    granularity: str = DEFAULT_GRANULARITY,
+    table_mode: str = DEFAULT_TABLE_MODE,
+) -> List[Dict[str, Any]]:
+    """compare_blocks() entries for an alignment of the two block sequences."""
+    result: List[Dict[str, Any]] = []
+    for tag, i1, i2, j1, j2 in opcodes:
         if tag == "equal":
             # Unchanged blocks
             for i, j in zip(range(i1, i2), range(j1, j2)):
@@ -130,9 +486,17 @@ def compare_blocks(old_blocks: List[Dict[str, Any]], new_blocks: List[Dict[str,
                 entry: Dict[str, Any] = {"change": "changed", "old": old, "new": new}
                 try:
                     if old.get("type") == "paragraph" and new.get("type") == "paragraph":
-                        entry["inline_html"] = html_inline_diff(_safe_str(old.get("text")), _safe_str(new.get("text")),)
+                        entry["inline_html"] = html_inline_diff(
+                            _safe_str(old.get("text")), _safe_str(new.get("text")), granularity=granularity
+                        )
                     elif old.get("type") == "table" and new.get("type") == "table":
-                        entry["table_changes"] = _diff_tables(old.get("table", []), new.get("table", []))
+                        if table_mode == "aligned":
+                            entry.update(_diff_tables_aligned(
+                                old.get("table", []), new.get("table", []), engine,
+                                old.get("row_offset", 0), new.get("row_offset", 0),
+                            ))
+                        else:
+                            entry["table_changes"] = _diff_tables(old.get("table", []), new.get("table", []))
                 except Exception as e:
                     _LOGGER.warning("Failed to generate diff details for block", exc_info=True)
                 result.append(entry)
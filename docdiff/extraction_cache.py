@@ -0,0 +1,106 @@
+"""
+Content-addressed cache of extracted blocks.
+
+Blocks are stored in the configured Django cache (Redis in production),
+keyed by the SHA-256 of the uploaded bytes and the extractor cache token,
+so re-diffing a known file skips python-docx/openpyxl parsing entirely.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .extractors.base_extractor import BaseExtractor
+from .extractors.serialization import FORMAT_VERSION, dump_blocks, load_blocks
+from .parallel_extract import PARALLEL_MIN_BYTES, extract_pair
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_PREFIX = "docdiff:blocks"
+
+
+def _ttl() -> int:
+    return getattr(settings, "DOCDIFF_EXTRACTION_CACHE_TTL_SECONDS", 24 * 3600)
+
+
+def sha256_of_chunks(chunks: Iterable[bytes]) -> str:
+    h = hashlib.sha256()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(digest: str, extractor: BaseExtractor) -> str:
+    return f"{CACHE_PREFIX}:{FORMAT_VERSION}:{extractor.cache_token()}:{digest}"
+
+
+def get_cached_blocks(digest: str, extractor: BaseExtractor) -> Optional[List[Dict[str, Any]]]:
+    if _ttl() <= 0:
+        return None
+    try:
+        data = cache.get(cache_key(digest, extractor))
+        return load_blocks(data) if data is not None else None
+    except Exception:
+        # A broken cache must never break the comparison
+        _LOGGER.warning("DocDiff extraction cache read failed", exc_info=True)
+        return None
+
+
+def set_cached_blocks(digest: str, extractor: BaseExtractor, blocks: List[Dict[str, Any]]) -> None:
+    ttl = _ttl()
+    if ttl <= 0:
+        return
+    try:
+        cache.set(cache_key(digest, extractor), dump_blocks(blocks), timeout=ttl)
+    except Exception:
+        _LOGGER.warning("DocDiff extraction cache write failed", exc_info=True)
+
+
+def file_digest(path: Path) -> str:
+    with open(path, "rb") as f:
+        return sha256_of_chunks(iter(lambda: f.read(1024 * 1024), b""))
+
+
+def extract_cached(extractor: BaseExtractor, path: Path, digest: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Returns blocks for `path`, extracting them only on a cache miss."""
+    if digest is None:
+        digest = file_digest(path)
+    blocks = get_cached_blocks(digest, extractor)
+    if blocks is None:
+        blocks = extractor.extract_blocks(path)
+        set_cached_blocks(digest, extractor, blocks)
+    return blocks
+
+
+def extract_pair_cached(
+    old_extractor: BaseExtractor,
+    old_path: Path,
+    new_extractor: BaseExtractor,
+    new_path: Path,
+    old_digest: Optional[str] = None,
+    new_digest: Optional[str] = None,
+    min_bytes: int = PARALLEL_MIN_BYTES,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Like extract_cached() for an old/new pair; when both documents miss
+    the cache they are extracted in parallel (see parallel_extract).
+    """
+    old_digest = old_digest or file_digest(old_path)
+    new_digest = new_digest or file_digest(new_path)
+    old_blocks = get_cached_blocks(old_digest, old_extractor)
+    new_blocks = get_cached_blocks(new_digest, new_extractor)
+
+    if old_blocks is None and new_blocks is None:
+        old_blocks, new_blocks = extract_pair(old_extractor, old_path, new_extractor, new_path, min_bytes)
+        set_cached_blocks(old_digest, old_extractor, old_blocks)
+        set_cached_blocks(new_digest, new_extractor, new_blocks)
+        return old_blocks, new_blocks
+
+    if old_blocks is None:
+        old_blocks = extract_cached(old_extractor, old_path, old_digest)
+    if new_blocks is None:
+        new_blocks = extract_cached(new_extractor, new_path, new_digest)
+    return old_blocks, new_blocks
@@ -6,7 +6,16 @@ class BaseExtractor:
     """Base class for extractors. Each extractor should implement
     the method `extract_blocks(path: Path) -> List[Dict[str, Any]]`.
     The returned structure should be compatible with `diff_engine.compare_blocks`.
+
+    Bump `VERSION` whenever the produced block schema changes, so cached
+    extraction results are invalidated.
     """
 
+    VERSION = "1"
+
+    def cache_token(self) -> str:
+        """Identifies the extractor, its version and options in cache keys."""
+        return f"{type(self).__name__}:{self.VERSION}"
+
     def extract_blocks(self, path: Path) -> List[Dict[str, Any]]:
         raise NotImplementedError
\ No newline at end of file
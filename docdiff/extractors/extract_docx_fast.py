@@ -0,0 +1,275 @@
+"""
+Streaming .docx extraction without the python-docx object model.
+
+word/document.xml is parsed straight from the zip with lxml iterparse and
+every top-level paragraph or table is dropped as soon as its block is
+built, so memory stays bounded by the largest single element. The blocks
+are the ones extract_docx_blocks() produces (text, style name and the
+formatting of the first run, tables with merged cells expanded, images),
+read with the same rules python-docx applies. Paragraphs whose runs differ
+in formatting additionally carry `spans`: [start, end) offsets into the
+block text with the formatting of that range.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import zipfile
+
+from lxml import etree
+
+from .docx_images import DocxImageIndex, main_document_part, related_part
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_R_EMBED = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"
+_BLIP = "{http://schemas.openxmlformats.org/drawingml/2006/main}blip"
+
+_BODY = _W + "body"
+_P = _W + "p"
+_TBL = _W + "tbl"
+_R = _W + "r"
+_HYPERLINK = _W + "hyperlink"
+_VAL = _W + "val"
+
+_ON = ("1", "true", "on")
+_HEX = frozenset("0123456789abcdefABCDEF")
+
+# python-docx shows these built-in styles under their UI names (BabelFish)
+_UI_STYLE_NAMES = {"caption": "Caption", "footer": "Footer", "header": "Header"}
+_UI_STYLE_NAMES.update({f"heading {i}": f"Heading {i}" for i in range(1, 10)})
+
+Format = Tuple[bool, bool, bool, str]
+_PLAIN: Format = (False, False, False, "#000000")
+
+
+class ParagraphStyles:
+    """Paragraph style names by style id, resolved like python-docx Paragraph.style."""
+
+    def __init__(
+        self,
+        names: Dict[str, Optional[str]],
+        default: Optional[str],
+        has_default: bool,
+        numbering: Optional[Dict[str, Tuple[str, int]]] = None,
+    ):
+        self._names = names
+        self._default = default
+        self._has_default = has_default
+        # style id -> (numId, level) of list styles
+        self._numbering = numbering or {}
+
+    @classmethod
+    def from_xml(cls, data: Optional[bytes]) -> "ParagraphStyles":
+        names: Dict[str, Optional[str]] = {}
+        numbering: Dict[str, Tuple[str, int]] = {}
+        default, has_default = None, False
+        if data:
+            root = etree.fromstring(data, parser=etree.XMLParser(resolve_entities=False))
+            for style in root.iterchildren(_W + "style"):
+                if style.get(_W + "type") != "paragraph":
+                    continue
+                name_el = style.find(_W + "name")
+                name = name_el.get(_VAL) if name_el is not None else None
+                name = _UI_STYLE_NAMES.get(name, name)
+                names.setdefault(style.get(_W + "styleId"), name)
+                num = numbering_of(style)
+                if num is not None:
+                    numbering.setdefault(style.get(_W + "styleId"), num)
+                if style.get(_W + "default") in _ON:
+                    # the last default in document order wins
+                    default, has_default = name, True
+        return cls(names, default, has_default, numbering)
+
+    def name(self, style_id: Optional[str]) -> Optional[str]:
+        if style_id is not None and style_id in self._names:
+            return self._names[style_id]
+        return self._default if self._has_default else "Normal"
+
+    def numbering(self, style_id: Optional[str]) -> Optional[Tuple[str, int]]:
+        return self._numbering.get(style_id) if style_id is not None else None
+
+
+def numbering_of(el) -> Optional[Tuple[str, int]]:
+    """(numId, level) of the pPr/numPr of a paragraph or style; numId 0 means "no list"."""
+    ppr = el.find(_W + "pPr")
+    numpr = ppr.find(_W + "numPr") if ppr is not None else None
+    if numpr is None:
+        return None
+    num_id = numpr.find(_W + "numId")
+    if num_id is None or num_id.get(_VAL) in (None, "0"):
+        return None
+    return num_id.get(_VAL), _int_val(numpr, _W + "ilvl", 0)
+
+
+def paragraph_style_id(p) -> Optional[str]:
+    ppr = p.find(_W + "pPr")
+    pstyle = ppr.find(_W + "pStyle") if ppr is not None else None
+    return pstyle.get(_VAL) if pstyle is not None else None
+
+
+def _on_off(el) -> Optional[bool]:
+    if el is None:
+        return None
+    val = el.get(_VAL)
+    return val is None or val in _ON
+
+
+def run_format(r) -> Format:
+    """bold, italic, underline and colour of a run's direct formatting."""
+    rpr = r.find(_W + "rPr")
+    if rpr is None:
+        return _PLAIN
+    u = rpr.find(_W + "u")
+    color = rpr.find(_W + "color")
+    val = color.get(_VAL) if color is not None else None
+    return (
+        bool(_on_off(rpr.find(_W + "b"))),
+        bool(_on_off(rpr.find(_W + "i"))),
+        u is not None and u.get(_VAL) not in (None, "none"),
+        "#" + val.lower() if val and len(val) == 6 and _HEX.issuperset(val) else "#000000",
+    )
+
+
+def run_text(r) -> str:
+    parts: List[str] = []
+    for child in r:
+        tag = child.tag
+        if tag == _W + "t":
+            parts.append(child.text or "")
+        elif tag in (_W + "tab", _W + "ptab"):
+            parts.append("\t")
+        elif tag == _W + "br":
+            if child.get(_W + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == _W + "cr":
+            parts.append("\n")
+        elif tag == _W + "noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+
+def _text_runs(p) -> Iterator[Any]:
+    """Runs that make up the paragraph text: direct runs and runs inside hyperlinks."""
+    for child in p:
+        if child.tag == _R:
+            yield child
+        elif child.tag == _HYPERLINK:
+            yield from child.iterchildren(_R)
+
+
+def paragraph_text(p) -> str:
+    return "".join(run_text(r) for r in _text_runs(p))
+
+
+def _spans(pieces: List[Tuple[str, Format]], lead: int, length: int) -> List[Dict[str, Any]]:
+    spans: List[Dict[str, Any]] = []
+    pos = -lead
+    for text, fmt in pieces:
+        start, end = max(pos, 0), min(pos + len(text), length)
+        pos += len(text)
+        if start >= end:
+            continue
+        if spans and spans[-1]["_fmt"] == fmt and spans[-1]["end"] == start:
+            spans[-1]["end"] = end
+            continue
+        bold, italic, underline, color = fmt
+        spans.append({"start": start, "end": end, "bold": bold, "italic": italic,
+                      "underline": underline, "color": color, "_fmt": fmt})
+    for span in spans:
+        del span["_fmt"]
+    return spans
+
+
+def paragraph_blocks(p, styles: ParagraphStyles, images: Optional[DocxImageIndex]) -> List[Dict[str, Any]]:
+    """The paragraph block (when it has text) followed by its image blocks."""
+    blocks: List[Dict[str, Any]] = []
+    pieces = [(run_text(r), r) for r in _text_runs(p)]
+    raw = "".join(text for text, _ in pieces)
+    text = raw.strip()
+    direct_runs = [child for child in p if child.tag == _R]
+
+    if text:
+        first = run_format(direct_runs[0]) if direct_runs else _PLAIN
+        block: Dict[str, Any] = {
+            "type": "paragraph",
+            "text": text,
+            "style": styles.name(paragraph_style_id(p)),
+            "bold": first[0],
+            "italic": first[1],
+            "underline": first[2],
+            "color": first[3],
+        }
+        spans = _spans([(t, run_format(r)) for t, r in pieces], len(raw) - len(raw.lstrip()), len(text))
+        if len(spans) > 1:
+            block["spans"] = spans
+        blocks.append(block)
+
+    if images is not None:
+        for r in direct_runs:
+            for blip in r.iter(_BLIP):
+                embed = blip.get(_R_EMBED)
+                info = images.get(embed) if embed else None
+                if info is not None:
+                    blocks.append({"type": "image", "text": "[IMAGE]", **info})
+    return blocks
+
+
+def _int_val(parent, tag: str, default: int) -> int:
+    el = parent.find(tag) if parent is not None else None
+    try:
+        return int(el.get(_VAL)) if el is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+def table_rows(tbl) -> List[List[str]]:
+    """
+    Cell texts per row, like python-docx row.cells: a cell spanning several
+    grid columns repeats, a vertically merged cell repeats the cell above.
+    """
+    rows: List[List[str]] = []
+    above: Dict[int, str] = {}
+    for tr in tbl.iterchildren(_W + "tr"):
+        offset = _int_val(tr.find(_W + "trPr"), _W + "gridBefore", 0)
+        cells: List[str] = []
+        current: Dict[int, str] = {}
+        for tc in tr.iterchildren(_W + "tc"):
+            tcpr = tc.find(_W + "tcPr")
+            span = max(_int_val(tcpr, _W + "gridSpan", 1), 1)
+            vmerge = tcpr.find(_W + "vMerge") if tcpr is not None else None
+            if vmerge is not None and vmerge.get(_VAL, "continue") == "continue":
+                text = above.get(offset, "")
+            else:
+                text = "\n".join(paragraph_text(p) for p in tc.iterchildren(_P)).strip()
+            current[offset] = text
+            cells.extend([text] * span)
+            offset += span
+        rows.append(cells)
+        above = current
+    return rows
+
+
+def extract_docx_blocks_fast(path: Path) -> List[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"File does not exist: {path}")
+
+    blocks: List[Dict[str, Any]] = []
+    with zipfile.ZipFile(path) as zf:
+        document = main_document_part(zf)
+        styles_part = related_part(zf, document, "/styles")
+        styles = ParagraphStyles.from_xml(zf.read(styles_part) if styles_part in zf.namelist() else None)
+
+        with DocxImageIndex(path, part=document) as images, zf.open(document) as f:
+            for _, el in etree.iterparse(f, events=("end",), tag=(_P, _TBL), resolve_entities=False):
+                parent = el.getparent()
+                # paragraphs inside tables are read with their table
+                if parent is None or parent.tag != _BODY:
+                    continue
+                if el.tag == _P:
+                    blocks.extend(paragraph_blocks(el, styles, images))
+                else:
+                    blocks.append({"type": "table", "table": table_rows(el)})
+                # drop the element and everything parsed before it
+                el.clear()
+                while el.getprevious() is not None:
+                    del parent[0]
+    return blocks
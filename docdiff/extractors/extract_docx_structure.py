@@ -0,0 +1,196 @@
+"""
+Structural .docx extraction: every story of the document, with scopes and paths.
+
+Besides the body (streamed as in extract_docx_fast) the blocks cover
+content controls, text boxes, nested tables, the headers and footers of
+every section and the footnotes and endnotes. Each block carries
+
+    scope  the story it belongs to: "body", "header-<type>",
+           "footer-<type>", "footnotes" or "endnotes";
+           compare_blocks aligns every scope on its own
+    path   its position inside the scope, e.g. "s0/p12", "s1/t0",
+           "s1/t0/r2/c1/t0" (nested table), "s0/p3/x0/p1" (text box),
+           "s2/header-default/p0", "footnotes/f2/p0"
+
+and list paragraphs carry `list` ({"id": numId, "level": ilvl}). Tables
+keep one row of cell texts per row; tables nested in a cell follow their
+parent table as separate blocks. Headers and footers are listed once, at
+the first section that references them (later sections inherit them). The
+headers (footers) of one type share a scope whatever their section, so a
+section inserted with a header of its own adds that header's blocks
+instead of shifting the other headers onto new scopes.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import zipfile
+
+from lxml import etree
+
+from .docx_images import DocxImageIndex, main_document_part, related_part, relationship_targets
+from .extract_docx_fast import (
+    ParagraphStyles,
+    _BODY,
+    _P,
+    _TBL,
+    _W,
+    numbering_of,
+    paragraph_blocks,
+    paragraph_style_id,
+    table_rows,
+)
+
+_R_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+_SDT = _W + "sdt"
+_SECT_PR = _W + "sectPr"
+_TXBX = _W + "txbxContent"
+
+BODY_SCOPE = "body"
+
+_PARSER = etree.XMLParser(resolve_entities=False)
+
+
+class _Story:
+    """Walks one story (body section, header, note, text box) and numbers its elements."""
+
+    def __init__(self, scope: str, prefix: str, styles: ParagraphStyles, images: Optional[DocxImageIndex], out: List[Dict[str, Any]]):
+        self.scope = scope
+        self.prefix = prefix
+        self.styles = styles
+        self.images = images
+        self.out = out
+        self.paragraphs = 0
+        self.tables = 0
+
+    def _emit(self, block: Dict[str, Any], path: str) -> None:
+        block["scope"] = self.scope
+        block["path"] = path
+        self.out.append(block)
+
+    def element(self, el) -> None:
+        if el.tag == _P:
+            self.paragraph(el)
+        elif el.tag == _TBL:
+            path = f"{self.prefix}/t{self.tables}"
+            self.tables += 1
+            self.table(el, path)
+        elif el.tag == _SDT:
+            # content controls: their content belongs to the surrounding story
+            content = el.find(_W + "sdtContent")
+            for child in content if content is not None else ():
+                self.element(child)
+
+    def paragraph(self, p) -> None:
+        path = f"{self.prefix}/p{self.paragraphs}"
+        self.paragraphs += 1
+        num = numbering_of(p) or self.styles.numbering(paragraph_style_id(p))
+        for block in paragraph_blocks(p, self.styles, self.images):
+            if num is not None and block["type"] == "paragraph":
+                block["list"] = {"id": num[0], "level": num[1]}
+            self._emit(block, path)
+        # images in text boxes are already listed with the anchoring paragraph
+        for k, txbx in enumerate(_text_boxes(p)):
+            _Story(self.scope, f"{path}/x{k}", self.styles, None, self.out).walk(txbx)
+
+    def table(self, tbl, path: str) -> None:
+        self._emit({"type": "table", "table": table_rows(tbl)}, path)
+        for r, tr in enumerate(tbl.iterchildren(_W + "tr")):
+            for c, tc in enumerate(tr.iterchildren(_W + "tc")):
+                for k, nested in enumerate(tc.iterchildren(_TBL)):
+                    self.table(nested, f"{path}/r{r}/c{c}/t{k}")
+
+    def walk(self, container) -> None:
+        for child in container:
+            self.element(child)
+
+
+def _text_boxes(p) -> Iterator[Any]:
+    """Outermost text box contents of a paragraph (VML fallbacks of the same box skipped)."""
+    for txbx in p.iter(_TXBX):
+        parent = txbx.getparent()
+        while parent is not None and parent is not p and parent.tag not in (_MC_FALLBACK, _TXBX):
+            parent = parent.getparent()
+        if parent is p:
+            yield txbx
+
+
+def _section_refs(sect_pr) -> List[Tuple[str, str, str]]:
+    """(kind, type, rId) of the header/footer references of a section."""
+    refs = []
+    for kind in ("header", "footer"):
+        for ref in sect_pr.iterchildren(f"{_W}{kind}Reference"):
+            refs.append((kind, ref.get(_W + "type", "default"), ref.get(_R_ID)))
+    # fixed order, so both documents list their scopes alike
+    return sorted(refs, key=lambda ref: (ref[0] != "header", ref[1]))
+
+
+def _read_part(zf: zipfile.ZipFile, name: Optional[str]):
+    if not name or name not in zf.NameToInfo:
+        return None
+    return etree.fromstring(zf.read(name), parser=_PARSER)
+
+
+def _notes(zf: zipfile.ZipFile, path: Path, name: Optional[str], kind: str, styles: ParagraphStyles,
+           out: List[Dict[str, Any]]) -> None:
+    root = _read_part(zf, name)
+    if root is None:
+        return
+    scope = f"{kind}s"
+    with DocxImageIndex(path, part=name) as images:
+        for note in root.iterchildren(f"{_W}{kind}"):
+            # separator notes carry no content
+            if note.get(_W + "type") not in (None, "normal"):
+                continue
+            _Story(scope, f"{scope}/f{note.get(_W + 'id')}", styles, images, out).walk(note)
+
+
+def extract_docx_structure(path: Path) -> List[Dict[str, Any]]:
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"File does not exist: {path}")
+
+    blocks: List[Dict[str, Any]] = []
+    sections: List[List[Tuple[str, str, str]]] = []
+    with zipfile.ZipFile(path) as zf:
+        document = main_document_part(zf)
+        styles_part = related_part(zf, document, "/styles")
+        styles = ParagraphStyles.from_xml(zf.read(styles_part) if styles_part in zf.NameToInfo else None)
+
+        with DocxImageIndex(path, part=document) as images, zf.open(document) as f:
+            story = _Story(BODY_SCOPE, "s0", styles, images, blocks)
+            for _, el in etree.iterparse(f, events=("end",), tag=(_P, _TBL, _SDT, _SECT_PR), resolve_entities=False):
+                parent = el.getparent()
+                if parent is None or parent.tag != _BODY:
+                    continue
+                if el.tag == _SECT_PR:
+                    sections.append(_section_refs(el))
+                    continue
+                story.element(el)
+                ppr = el.find(_W + "pPr") if el.tag == _P else None
+                sect_pr = ppr.find(_SECT_PR) if ppr is not None else None
+                if sect_pr is not None:
+                    # the paragraph closes a section
+                    sections.append(_section_refs(sect_pr))
+                    story = _Story(BODY_SCOPE, f"s{len(sections)}", styles, images, blocks)
+                el.clear()
+                while el.getprevious() is not None:
+                    del parent[0]
+
+        targets = relationship_targets(zf, document)
+        seen: Set[str] = set()
+        for n, refs in enumerate(sections):
+            for kind, typ, rel_id in refs:
+                part = targets.get(rel_id)
+                if part is None or part in seen:
+                    continue
+                seen.add(part)
+                root = _read_part(zf, part)
+                if root is None:
+                    continue
+                scope = f"{kind}-{typ}"
+                with DocxImageIndex(path, part=part) as part_images:
+                    _Story(scope, f"s{n}/{scope}", styles, part_images, blocks).walk(root)
+
+        _notes(zf, path, related_part(zf, document, "/footnotes"), "footnote", styles, blocks)
+        _notes(zf, path, related_part(zf, document, "/endnotes"), "endnote", styles, blocks)
+    return blocks
@@ -1,25 +1,94 @@
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
+import hashlib
 from openpyxl import load_workbook
 from .base_extractor import BaseExtractor
+from ..alignment import DIGEST_SIZE, row_digest
+
+# Chunk sizes stay between chunk_rows / CHUNK_MIN_FACTOR and chunk_rows * CHUNK_MAX_FACTOR
+CHUNK_MIN_FACTOR = 4
+CHUNK_MAX_FACTOR = 4
 
 
 class XlsxExtractor(BaseExtractor):
     """Extractor converting each worksheet into a 'table' block.
     Cell values are converted to strings.
+
+    With `chunk_rows` set, worksheets are emitted as consecutive 'table'
+    blocks of about `chunk_rows` rows. Chunk boundaries are content-defined:
+    a chunk ends after a row whose hash hits the boundary condition, so a
+    row inserted or deleted changes only the chunk holding it (and, past a
+    chunk cut at the size limit, the chunks up to the next boundary) while
+    the other `chunk_hash` values stay the same. Identical chunks are then skipped by
+    hash in `compare_blocks`, and only the changed ones are diffed row by
+    row. Each chunk carries its `row_offset` in the sheet, so reported row
+    indices are sheet rows.
     """
 
+    def __init__(self, chunk_rows: Optional[int] = None):
+        if chunk_rows is not None and chunk_rows < 1:
+            raise ValueError("chunk_rows must be a positive integer")
+        self.chunk_rows = chunk_rows
+
+    def cache_token(self) -> str:
+        return f"{super().cache_token()}:cdc-chunk={self.chunk_rows or 0}"
+
     def extract_blocks(self, path: Path) -> List[Dict[str, Any]]:
+        return list(self.iter_blocks(path))
+
+    def iter_blocks(self, path: Path) -> Iterator[Dict[str, Any]]:
         path = Path(path)
         if not path.exists():
             raise FileNotFoundError(f"File does not exist: {path}")
         wb = load_workbook(filename=str(path), data_only=True, read_only=True)
-        blocks: List[Dict[str, Any]] = []
-        for ws in wb.worksheets:
-            rows: List[List[str]] = []
-            for row in ws.iter_rows(values_only=True):
-                rows.append(["" if v is None else str(v) for v in row])
-            # Add table block only if worksheet is not empty
-            if any(any(cell for cell in r) for r in rows):
-                blocks.append({"type": "table", "table": rows, "sheet": ws.title})
-        return blocks
\ No newline at end of file
+        try:
+            for ws in wb.worksheets:
+                if self.chunk_rows:
+                    yield from self._iter_chunks(ws)
+                    continue
+                rows: List[List[str]] = []
+                has_content = False
+                for row in ws.iter_rows(values_only=True):
+                    cells = ["" if v is None else str(v) for v in row]
+                    has_content = has_content or any(cells)
+                    rows.append(cells)
+                # Add table block only if worksheet is not empty
+                if has_content:
+                    yield {"type": "table", "table": rows, "sheet": ws.title}
+        finally:
+            close = getattr(wb, "close", None)
+            if close:
+                close()
+
+    def _iter_chunks(self, ws) -> Iterator[Dict[str, Any]]:
+        rows: List[List[str]] = []
+        digests: List[bytes] = []
+        has_content = False
+        offset = 0
+        min_rows = max(1, self.chunk_rows // CHUNK_MIN_FACTOR)
+        max_rows = self.chunk_rows * CHUNK_MAX_FACTOR
+
+        def chunk() -> Dict[str, Any]:
+            return {
+                "type": "table",
+                "table": rows,
+                "sheet": ws.title,
+                "row_offset": offset,
+                "chunk_hash": hashlib.blake2b(b"".join(digests), digest_size=DIGEST_SIZE).hexdigest(),
+            }
+
+        for row in ws.iter_rows(values_only=True):
+            cells = ["" if v is None else str(v) for v in row]
+            has_content = has_content or any(cells)
+            rows.append(cells)
+            digests.append(row_digest(cells))
+            boundary = int.from_bytes(digests[-1][:4], "big") % self.chunk_rows == 0
+            if (boundary and len(rows) >= min_rows) or len(rows) >= max_rows:
+                # Chunks made of empty rows only are skipped
+                if has_content:
+                    yield chunk()
+                offset += len(rows)
+                rows, digests, has_content = [], [], False
+
+        if has_content:
+            yield chunk()
@@ -0,0 +1,20 @@
+"""
+Compact serialized form of extracted block lists
+(used for caching and for passing blocks between processes).
+"""
+from typing import Any, Dict, List
+import json
+import zlib
+
+FORMAT_VERSION = "1"
+
+
+def dump_blocks(blocks: List[Dict[str, Any]]) -> bytes:
+    """Serializes blocks to compressed, compact JSON."""
+    data = json.dumps(blocks, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(data, 3)
+
+
+def load_blocks(data: bytes) -> List[Dict[str, Any]]:
+    """Inverse of dump_blocks()."""
+    return json.loads(zlib.decompress(data).decode("utf-8"))
@@ -9,15 +9,16 @@ Block analysis using spaCy (pl_core_news_sm):
  - generates a summary of changes (AI summary)
 """
 
-import re
+import hashlib
 from difflib import SequenceMatcher
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional
+
+from .change_features import block_features, block_texts, change_features, heuristic_labels
 
 # ---------------------------------------------------------------------
-# spaCy loader (singleton)
+# Lazy loaders (spaCy comes from the process-wide core.nlp service)
 # ---------------------------------------------------------------------
 
-_NLP = None
 _NP = None
 _KMEANS = None
 
@@ -50,15 +51,50 @@ def get_kmeans():
 
 
 def get_nlp():
-    global _NLP
-    if _NLP is None:
-        try:
-            import spacy
-            _NLP = spacy.load("pl_core_news_sm")
-        except Exception as e:
-            print(f"[WARN] spaCy model failed to load: {e}")
-            _NLP = None
-    return _NLP
+    """The shared spaCy model (one per process, see core.nlp) or None."""
+    from core.nlp import get_nlp as shared_nlp
+    return shared_nlp()
+
+
+# ---------------------------------------------------------------------
+# Batch processing
+# ---------------------------------------------------------------------
+
+# Texts per nlp.pipe() batch
+AI_PIPE_BATCH_SIZE = 64
+
+# Labels, similarity and clustering only need NER and tok2vec vectors
+AI_NLP_PROFILE = "ner"
+
+
+def change_texts(blocks: List[Dict[str, Any]]) -> List[str]:
+    """Collects every text analyze_change / cluster_changes needs a Doc for."""
+    texts: List[str] = []
+    for block in blocks:
+        old_text = (block.get("old", {}) or {}).get("text") or ""
+        new_text = (block.get("new", {}) or {}).get("text") or ""
+        texts.extend((f"{old_text} {new_text}".strip(), old_text, new_text))
+    return texts
+
+
+def pipe_docs(texts: Iterable[str], batch_size: int = AI_PIPE_BATCH_SIZE) -> Optional[Dict[str, Any]]:
+    """
+    Runs all distinct non-empty texts once through the pipeline (nlp.pipe)
+    with unneeded components disabled. Returns a text -> Doc mapping,
+    or None when spaCy is not available.
+    """
+    nlp = get_nlp()
+    if not nlp:
+        return None
+
+    unique = list(dict.fromkeys(t for t in texts if t and t.strip()))
+    if hasattr(nlp, "pipe"):
+        from core.nlp import service
+        disable = service.disabled_pipes(AI_NLP_PROFILE, nlp)
+        docs = nlp.pipe(unique, batch_size=batch_size, disable=disable)
+    else:
+        docs = (nlp(t) for t in unique)
+    return dict(zip(unique, docs))
 
 
 # ---------------------------------------------------------------------
@@ -90,18 +126,18 @@ def extract_labels_spacy(text: str) -> List[str]:
     if not nlp or not text.strip():
         return []
 
-    doc = nlp(text)
+    return _labels_from_doc(nlp(text), text)
+
+
+def _labels_from_doc(doc: Any, text: str, features: Optional[Dict[str, Any]] = None) -> List[str]:
     labels = set()
 
-    for ent in doc.ents:
+    for ent in getattr(doc, "ents", None) or []:
         if ent.label_ in NER_MAP:
             labels.add(NER_MAP[ent.label_])
 
     # heuristics for technical units and numeric values
-    if re.search(r"(kg|mm|cm|km|\bm\b|%)", text):
-        labels.add("unit")
-    if re.search(r"\b\d+[.,]?\d*\b", text):
-        labels.add("numbers")
+    labels.update(features["labels"] if features is not None else heuristic_labels(text))
 
     return sorted(labels)
 
@@ -120,38 +156,113 @@ def semantic_similarity(old_text: str, new_text: str) -> float:
     return doc1.similarity(doc2)
 
 
+def _similarity_from_docs(old_text: str, new_text: str, docs: Dict[str, Any]) -> float:
+    if not old_text.strip() or not new_text.strip():
+        return 0.0
+    doc1 = docs.get(old_text)
+    doc2 = docs.get(new_text)
+    if doc1 is None or doc2 is None:
+        return SequenceMatcher(None, old_text, new_text).ratio()
+    return doc1.similarity(doc2)
+
+
+def paired_similarities(blocks: List[Dict[str, Any]], docs: Optional[Dict[str, Any]]) -> List[float]:
+    """
+    Old/new similarity of every block in one vectorized pass: the Doc vectors
+    of all pairs are stacked into two matrices, normalized once and compared
+    with a single row-wise dot product. Values match _similarity_from_docs
+    (0.0 for empty texts and zero vectors, SequenceMatcher without a Doc).
+    """
+    sims = [0.0] * len(blocks)
+    rows: List[int] = []
+    old_docs: List[Any] = []
+    new_docs: List[Any] = []
+
+    for i, block in enumerate(blocks):
+        old_text, new_text = block_texts(block)
+        if not old_text.strip() or not new_text.strip():
+            continue
+        doc1 = docs.get(old_text) if docs is not None else None
+        doc2 = docs.get(new_text) if docs is not None else None
+        if doc1 is None or doc2 is None:
+            sims[i] = block_features(block)["ratio"]
+            continue
+        rows.append(i)
+        old_docs.append(doc1)
+        new_docs.append(doc2)
+
+    if not rows:
+        return sims
+
+    np = get_numpy()
+    try:
+        if not np:
+            raise ValueError("NumPy unavailable")
+        old_m = np.vstack([d.vector for d in old_docs]).astype(np.float32, copy=False)
+        new_m = np.vstack([d.vector for d in new_docs]).astype(np.float32, copy=False)
+        if old_m.shape != new_m.shape:
+            raise ValueError("vector sizes differ")
+    except Exception:
+        # no usable vectors: compare pair by pair
+        for i, doc1, doc2 in zip(rows, old_docs, new_docs):
+            sims[i] = doc1.similarity(doc2)
+        return sims
+
+    norms = np.linalg.norm(old_m, axis=1) * np.linalg.norm(new_m, axis=1)
+    dots = np.einsum("ij,ij->i", old_m, new_m)
+    cos = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+    for i, value in zip(rows, cos.tolist()):
+        sims[i] = value
+    return sims
+
+
 # ---------------------------------------------------------------------
 # CHANGE ANALYSIS
 # ---------------------------------------------------------------------
 
 
-def classify_change_type(old_text: str, new_text: str, labels: List[str]) -> str:
-    """Classifies change type: substantive, editorial, formal, technical."""
-    ratio = SequenceMatcher(None, old_text, new_text).ratio()
-    combined = (old_text + " " + new_text).lower()
-
+def classify_change_type(
+    old_text: str,
+    new_text: str,
+    labels: List[str],
+    features: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Classifies change type: substantive, editorial, formal, technical.
+    `features` are the pair's change_features(), computed here when not given.
+    """
     # Substantive – differences in data, numbers, dates, amounts
     if any(l in labels for l in ["number", "amount", "date", "unit"]):
         return "substantive"
 
+    if features is None:
+        features = change_features(old_text, new_text)
+
     # Technical – references to legal articles, paragraphs, etc.
-    if re.search(r"\b(§|art\.|ust\.|pkt\.|dz\.u\.|poz\.)\b", combined):
+    if features["legal_ref"]:
         return "technical"
 
     # Editorial – high text similarity, stylistic differences only
-    if ratio > 0.9:
+    if features["ratio"] > 0.9:
         return "editorial"
 
     # Formal – structure change
-    if len(old_text.split()) != len(new_text.split()):
+    if features["old_words"] != features["new_words"]:
         return "formal"
 
     return "substantive"
 
 
-def analyze_change(block: Dict[str, Any]) -> Dict[str, Any]:
+def analyze_change(
+    block: Dict[str, Any],
+    docs: Optional[Dict[str, Any]] = None,
+    similarity: Optional[float] = None,
+) -> Dict[str, Any]:
     """
     Main AI function.
+    `docs` is an optional text -> Doc mapping from pipe_docs(); without it
+    the texts are processed one by one. `similarity` is the old/new
+    similarity precomputed by paired_similarities().
     NOTE: tables are intentionally excluded from AI analysis.
     """
 
@@ -171,27 +282,36 @@ def analyze_change(block: Dict[str, Any]) -> Dict[str, Any]:
         "confidence": 0.0,
     }
 
-    old_text = (block.get("old", {}) or {}).get("text") or ""
-    new_text = (block.get("new", {}) or {}).get("text") or ""
+    old_text, new_text = block_texts(block)
     merged_text = f"{old_text} {new_text}".strip()
+    # ratio, word counts and pattern hits of the pair, shared with the report scoring
+    features = block_features(block)
 
     # 1. labels
-    labels = extract_labels_spacy(merged_text)
+    if docs is None:
+        labels = extract_labels_spacy(merged_text)
+    else:
+        doc = docs.get(merged_text)
+        labels = _labels_from_doc(doc, merged_text, features) if doc is not None else []
     result["labels"] = labels
 
     # 2. semantic distance
     try:
-        sim = semantic_similarity(old_text, new_text)
+        if similarity is not None:
+            sim = similarity
+        elif docs is None:
+            sim = semantic_similarity(old_text, new_text)
+        else:
+            sim = _similarity_from_docs(old_text, new_text, docs)
         score = round((1 - sim) * 10, 2)
     except Exception:
-        ratio = SequenceMatcher(None, old_text, new_text).ratio()
-        score = round((1 - ratio) * 10, 2)
+        score = round((1 - features["ratio"]) * 10, 2)
         sim = None
 
     result["semantic_score"] = score
 
     # 3. change type classification
-    result["change_type"] = classify_change_type(old_text, new_text, labels)
+    result["change_type"] = classify_change_type(old_text, new_text, labels, features)
 
     # 4. confidence
     conf = 1.0 - abs(0.85 - sim) if sim is not None else 0.5
@@ -200,13 +320,106 @@ def analyze_change(block: Dict[str, Any]) -> Dict[str, Any]:
     return result
 
 
+def analyze_changes(
+    blocks: List[Dict[str, Any]],
+    docs: Optional[Dict[str, Any]] = None,
+    batch_size: int = AI_PIPE_BATCH_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Batch version of analyze_change: all texts go through the pipeline once
+    (see pipe_docs), the Docs are reused for labels and all similarities
+    are computed at once (see paired_similarities).
+    Pass the same `docs` to cluster_changes to reuse them for clustering.
+    """
+    if docs is None:
+        docs = pipe_docs(change_texts(blocks), batch_size)
+    if docs is None:
+        return [analyze_change(b) for b in blocks]
+    sims = paired_similarities(blocks, docs)
+    return [analyze_change(b, docs, sim) for b, sim in zip(blocks, sims)]
+
+
+# ---------------------------------------------------------------------
+# PER-REQUEST ANALYSIS MEMO
+# ---------------------------------------------------------------------
+
+AI_RESULT_KEYS = ("labels", "semantic_score", "change_type", "confidence")
+# Bump when the analysis heuristics change; results stored by docdiff.history are keyed by it
+ANALYSIS_VERSION = 1
+
+
+def block_fingerprint(block: Dict[str, Any]) -> str:
+    """Identifies a changed block by the types and texts of both sides."""
+    h = hashlib.blake2b(digest_size=16)
+    for side in ("old", "new"):
+        part = block.get(side, {}) or {}
+        h.update(str(part.get("type") or "").encode("utf-8"))
+        h.update(b"\x1e")
+        h.update((part.get("text") or "").encode("utf-8", "surrogatepass"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def precomputed_analysis(block: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Returns the analysis already stored in the block (e.g. by the view), if complete."""
+    if all(k in block for k in AI_RESULT_KEYS):
+        return {k: block[k] for k in AI_RESULT_KEYS}
+    return None
+
+
+class AnalysisMemo:
+    """
+    Per-request memo of analyze_change results keyed by block fingerprint,
+    so each distinct block is analyzed at most once per diff.
+    `docs` (from pipe_docs) is passed on to the analyzer, together with the
+    block's entry of `similarities` (fingerprint -> similarity) when present.
+    """
+
+    def __init__(
+        self,
+        docs: Optional[Dict[str, Any]] = None,
+        similarities: Optional[Dict[str, float]] = None,
+    ):
+        self.docs = docs
+        self.similarities = similarities or {}
+        self.hits = 0
+        self._results: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def for_blocks(cls, blocks: List[Dict[str, Any]], docs: Optional[Dict[str, Any]] = None) -> "AnalysisMemo":
+        """Memo with the similarities of all `blocks` computed in one vectorized pass."""
+        if docs is None:
+            return cls(docs)
+        sims = paired_similarities(blocks, docs)
+        return cls(docs, {block_fingerprint(b): sim for b, sim in zip(blocks, sims)})
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def analyze(self, block: Dict[str, Any], analyzer=None) -> Dict[str, Any]:
+        key = block_fingerprint(block)
+        if key in self._results:
+            self.hits += 1
+        else:
+            analyzer = analyzer or analyze_change
+            sim = self.similarities.get(key)
+            if sim is None:
+                self._results[key] = analyzer(block, self.docs)
+            else:
+                self._results[key] = analyzer(block, self.docs, similarity=sim)
+        return dict(self._results[key])
+
+
 # ---------------------------------------------------------------------
 # CLUSTERING AND SUMMARY
 # ---------------------------------------------------------------------
 
 
-def cluster_changes(blocks: List[Dict[str, Any]]) -> Dict[int, List[int]]:
-    """Groups semantically similar changes (spaCy embeddings + KMeans)."""
+def cluster_changes(blocks: List[Dict[str, Any]], docs: Optional[Dict[str, Any]] = None) -> Dict[int, List[int]]:
+    """
+    Groups semantically similar changes (spaCy embeddings + KMeans).
+    Docs from pipe_docs() are reused when given.
+    """
     changed_blocks = [b for b in blocks if b.get("change") == "changed"]
     if len(changed_blocks) < 3:
         return {}
@@ -225,7 +438,9 @@ def cluster_changes(blocks: List[Dict[str, Any]]) -> Dict[int, List[int]]:
         if not txt:
             continue
 
-        doc = nlp(txt)
+        doc = docs.get(txt) if docs is not None else None
+        if doc is None:
+            doc = nlp(txt)
         if not doc.has_vector:
             continue
 
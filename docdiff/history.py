@@ -0,0 +1,80 @@
+"""
+Comparison history for incremental re-diffs.
+
+Every analyzed changed block leaves its AI analysis in BlockAnalysis (keyed
+by block fingerprint). When revision N+1 is compared against revision N,
+only changed blocks not seen in an earlier comparison go through spaCy.
+
+History unused for DOCDIFF_HISTORY_TTL_SECONDS is purged (0 disables it).
+"""
+from datetime import timedelta
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .heuristics_ai import AI_RESULT_KEYS, ANALYSIS_VERSION
+from .models import BlockAnalysis
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fingerprints per query (stays below SQLite's variable limit)
+LOOKUP_BATCH = 500
+
+
+def _ttl() -> int:
+    return getattr(settings, "DOCDIFF_HISTORY_TTL_SECONDS", 30 * 24 * 3600)
+
+
+def enabled() -> bool:
+    return _ttl() > 0
+
+
+def load_analyses(fingerprints: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Stored AI analyses of the given block fingerprints (fingerprint -> result)."""
+    if not enabled():
+        return {}
+    keys = list(dict.fromkeys(fingerprints))
+    found: Dict[str, Dict[str, Any]] = {}
+    try:
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            rows = BlockAnalysis.objects.filter(
+                version=ANALYSIS_VERSION, fingerprint__in=keys[start:start + LOOKUP_BATCH]
+            )
+            hits = dict(rows.values_list("fingerprint", "result"))
+            if hits:
+                rows.update(last_used_at=timezone.now())
+                found.update(hits)
+    except DatabaseError:
+        _LOGGER.warning("DocDiff analysis lookup failed", exc_info=True)
+        return {}
+    return {k: v for k, v in found.items() if all(f in v for f in AI_RESULT_KEYS)}
+
+
+def store_analyses(results: Dict[str, Dict[str, Any]]) -> None:
+    """Stores new AI analyses (fingerprint -> result); existing entries are kept."""
+    if not enabled() or not results:
+        return
+    try:
+        BlockAnalysis.objects.bulk_create(
+            [
+                BlockAnalysis(fingerprint=fp, version=ANALYSIS_VERSION, result={k: r[k] for k in AI_RESULT_KEYS})
+                for fp, r in results.items()
+            ],
+            batch_size=LOOKUP_BATCH,
+            ignore_conflicts=True,
+        )
+    except DatabaseError:
+        _LOGGER.warning("DocDiff analysis write failed", exc_info=True)
+
+
+def purge_history(ttl: Optional[int] = None) -> int:
+    """Deletes analyses not used for `ttl` seconds."""
+    ttl = _ttl() if ttl is None else ttl
+    if ttl <= 0:
+        return 0
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+    deleted, _ = BlockAnalysis.objects.filter(last_used_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,208 @@
+"""
+Background execution of docdiff jobs (DiffJob).
+
+The web request only stores the uploads and queues a job; the pipeline
+(extraction, diff, AI analysis) runs on one of the backends selected by
+DOCDIFF_JOBS_BACKEND:
+
+- "thread": in-process pool of DOCDIFF_JOBS_WORKERS threads (default),
+- "worker": jobs stay queued in the database until a separate
+  `manage.py docdiff_worker` process claims them,
+- "eager": the job runs inside submit_job() (tests).
+
+The uploads are stored in the job row, so a worker needs only the
+database, not the web process's filesystem; they are dropped when the job
+finishes. Jobs still queued or running DOCDIFF_JOB_TIMEOUT_SECONDS after
+they were submitted or started (no worker running, worker killed, out of
+memory) are failed by fail_stale_jobs().
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .extractors.serialization import dump_blocks, load_blocks
+from .history import purge_history
+from .models import DiffJob
+from .pipeline import PipelineError, run_pipeline
+
+_LOGGER = logging.getLogger(__name__)
+
+JOB_BACKENDS = ("thread", "worker", "eager")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _backend() -> str:
+    backend = getattr(settings, "DOCDIFF_JOBS_BACKEND", "thread")
+    if backend not in JOB_BACKENDS:
+        raise ImproperlyConfigured(f"Unknown DOCDIFF_JOBS_BACKEND: {backend}")
+    return backend
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, getattr(settings, "DOCDIFF_JOBS_WORKERS", 1)),
+                thread_name_prefix="docdiff-job",
+            )
+        return _executor
+
+
+def _run_in_thread(job_id) -> None:
+    try:
+        run_job(job_id)
+    finally:
+        # pool threads must not keep their DB connections open
+        connections.close_all()
+
+
+def submit_job(job: DiffJob) -> None:
+    """Hands a queued job over to the configured backend."""
+    backend = _backend()
+    purge_expired_jobs()
+    fail_stale_jobs()
+    if backend == "eager":
+        run_job(job.pk)
+    elif backend == "thread":
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    # "worker": the job is picked up by `manage.py docdiff_worker`
+
+
+def claim_job(job_id) -> bool:
+    """Atomically moves a queued job to running; False if someone else got it."""
+    return bool(
+        DiffJob.objects.filter(pk=job_id, status=DiffJob.Status.QUEUED)
+        .update(status=DiffJob.Status.RUNNING, started_at=timezone.now())
+    )
+
+
+def claim_next_job() -> Optional[Any]:
+    """Claims the oldest queued job and returns its id (None if the queue is empty)."""
+    for job_id in DiffJob.objects.filter(status=DiffJob.Status.QUEUED).values_list("pk", flat=True)[:10]:
+        if claim_job(job_id):
+            return job_id
+    return None
+
+
+def _finish(job_id, **fields) -> None:
+    # a job failed by fail_stale_jobs() in the meantime keeps its timeout
+    DiffJob.objects.filter(pk=job_id, status=DiffJob.Status.RUNNING).update(
+        finished_at=timezone.now(), old_data=None, new_data=None, **fields
+    )
+
+
+def run_job(job_id, claimed: bool = False) -> bool:
+    """Runs the pipeline for a job. Returns False if the job could not be claimed."""
+    if not claimed and not claim_job(job_id):
+        return False
+    job = DiffJob.objects.get(pk=job_id)
+    # the extractors read files: the uploads are written to a local temp dir
+    work_dir = Path(tempfile.mkdtemp(prefix="docdiff-job-"))
+
+    def progress(stage: str, percent: int) -> None:
+        DiffJob.objects.filter(pk=job_id).update(stage=stage, progress=percent)
+
+    try:
+        (work_dir / job.old_name).write_bytes(bytes(job.old_data))
+        (work_dir / job.new_name).write_bytes(bytes(job.new_data))
+        blocks = run_pipeline(
+            work_dir / job.old_name,
+            work_dir / job.new_name,
+            job.old_sha256,
+            job.new_sha256,
+            progress,
+        )
+    except PipelineError as e:
+        _finish(job_id, status=DiffJob.Status.FAILED, error_code=e.code)
+    except Exception:
+        _LOGGER.exception("DocDiff job %s failed", job_id)
+        _finish(job_id, status=DiffJob.Status.FAILED, error_code="job_failed")
+    else:
+        _finish(job_id, status=DiffJob.Status.DONE, stage="done", progress=100, result=dump_blocks(blocks))
+    finally:
+        # Always clean up uploads, even on error
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return True
+
+
+def job_result(job: DiffJob) -> List[Dict[str, Any]]:
+    """Returns the diff blocks of a finished job."""
+    return load_blocks(bytes(job.result))
+
+
+def purge_expired_jobs() -> int:
+    """
+    Deletes finished (done or failed) jobs older than DOCDIFF_JOB_TTL_SECONDS
+    (and comparison history past its own TTL). Queued and running jobs are
+    left to fail_stale_jobs().
+    """
+    purge_history()
+    ttl = getattr(settings, "DOCDIFF_JOB_TTL_SECONDS", 24 * 3600)
+    if ttl <= 0:
+        return 0
+    expired = DiffJob.objects.filter(
+        status__in=(DiffJob.Status.DONE, DiffJob.Status.FAILED),
+        created_at__lt=timezone.now() - timedelta(seconds=ttl),
+    )
+    deleted, _ = expired.delete()
+    return deleted
+
+
+def fail_stale_jobs() -> int:
+    """
+    Fails jobs running for longer than DOCDIFF_JOB_TIMEOUT_SECONDS (their
+    thread or worker died or hangs) and jobs queued for that long (no worker
+    is running): nothing else would ever finish them. Returns the number of
+    jobs failed.
+    """
+    timeout = getattr(settings, "DOCDIFF_JOB_TIMEOUT_SECONDS", 30 * 60)
+    if timeout <= 0:
+        return 0
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=timeout)
+    stale = DiffJob.objects.filter(
+        Q(status=DiffJob.Status.RUNNING, started_at__lt=cutoff)
+        | Q(status=DiffJob.Status.QUEUED, created_at__lt=cutoff)
+    )
+    failed = stale.update(
+        status=DiffJob.Status.FAILED, error_code="job_timeout", finished_at=now, old_data=None, new_data=None
+    )
+    if failed:
+        _LOGGER.warning("DocDiff: %d job(s) queued or running for over %d s marked as failed", failed, timeout)
+    return failed
+
+
+def run_worker(poll_interval: float = 1.0, max_jobs: Optional[int] = None) -> int:
+    """
+    Worker loop for the "worker" backend: claims and runs queued jobs,
+    sleeping `poll_interval` seconds when the queue is empty.
+    Returns the number of jobs run (only returns when `max_jobs` is set).
+    """
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job_id = claim_next_job()
+        if job_id is None:
+            if max_jobs is not None:
+                break
+            purge_expired_jobs()
+            fail_stale_jobs()
+            time.sleep(poll_interval)
+            continue
+        run_job(job_id, claimed=True)
+        done += 1
+    return done
@@ -1,16 +1,18 @@
 from pathlib import Path
+from typing import Optional
 import argparse
+import filecmp
+import importlib
 import logging
 import sys
 from enum import IntEnum
 
-from docdiff.diff_engine import compare_blocks
-from docdiff.report_builder import generate_html_report, generate_json_report
-
-# extractors
-from docdiff.extractors.extract_docx import DocxExtractor
-from docdiff.extractors.extract_txt import TxtExtractor
-from docdiff.extractors.extract_xlsx import XlsxExtractor
+from docdiff.compact_report import COMPRESSIONS
+from docdiff.diff_engine import compare_blocks, unchanged_blocks
+from docdiff.parallel_extract import PARALLEL_MIN_BYTES, extract_pair
+from docdiff.report_builder import JSON_FORMATS, generate_html_report, generate_json_report
+from docdiff.section_diff import pool_for
+from docdiff.txt_engine import DEFAULT_CONTEXT, TXT_ENGINE_MIN_BYTES, diff_text_files, iter_line_entries, write_unified_diff
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,15 +25,47 @@ class ExitCode(IntEnum):
     PARSE_ERROR = 4
     HTML_ERROR = 5
     JSON_ERROR = 6
+    BATCH_ERROR = 8  # at least one pair of a --batch run failed
+    UNIFIED_ERROR = 9
+
+# Extractors are imported only when their format is used
+# (python-docx and openpyxl dominate CLI start-up time)
+_EXTRACTORS = {
+    "DocxExtractor": "docdiff.extractors.extract_docx:DocxExtractor",
+    "TxtExtractor": "docdiff.extractors.extract_txt:TxtExtractor",
+    "XlsxExtractor": "docdiff.extractors.extract_xlsx:XlsxExtractor",
+}
 
 EXTRACTOR_MAP = {
-    ".docx": DocxExtractor,
-    ".doc": DocxExtractor,
-    ".txt": TxtExtractor,
-    ".xlsx": XlsxExtractor,
-    ".xls": XlsxExtractor,
+    ".docx": "DocxExtractor",
+    ".doc": "DocxExtractor",
+    ".txt": "TxtExtractor",
+    ".xlsx": "XlsxExtractor",
+    ".xls": "XlsxExtractor",
 }
 
+
+def load_extractor_class(name: str):
+    """Imports an extractor class by its name in _EXTRACTORS."""
+    module_name, _, attr = _EXTRACTORS[name].partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def __getattr__(name: str):
+    # PEP 562: main.DocxExtractor etc. stay available, imported on first access
+    if name in _EXTRACTORS:
+        return load_extractor_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# extract_docx.DOCX_MODES, repeated so the CLI does not import python-docx up front
+DOCX_MODES = ("python-docx", "stream", "structure")
+DEFAULT_DOCX_MODE = "python-docx"
+
+# "sections": blocks are diffed section by section under their headings (section_diff)
+DIFF_MODES = ("flat", "sections")
+DEFAULT_DIFF_MODE = "flat"
+
 FORMAT_GROUP = {
     ".txt": "txt",
     ".doc": "docx",
@@ -42,12 +76,39 @@ FORMAT_GROUP = {
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Compare two files and generate a report.")
-    parser.add_argument("old", type=Path, help="Old file")
-    parser.add_argument("new", type=Path, help="New file")
+    parser.add_argument("old", type=Path, help="Old file (with --batch: manifest or old directory)")
+    parser.add_argument("new", type=Path, nargs="?", help="New file (with --batch: new directory)")
     parser.add_argument("-o", "--output", type=Path, default=Path("report.html"), help="Output HTML file")
     parser.add_argument("--json", type=Path, default=None, help="(optional) save result as JSON")
+    parser.add_argument("--json-format", choices=JSON_FORMATS, default="full",
+                        help="JSON layout: every diff block (full) or the minimal edit script (compact)")
+    parser.add_argument("--json-compression", choices=COMPRESSIONS, default=None,
+                        help="Compress the JSON report (default: from the .gz / .zst suffix)")
+    parser.add_argument("--unified", type=Path, default=None,
+                        help="(optional, .txt only) save a unified diff of the two files")
+    parser.add_argument("--context", type=int, default=DEFAULT_CONTEXT,
+                        help="Unchanged lines around each change in --unified and large .txt reports")
+    parser.add_argument("--docx-mode", choices=DOCX_MODES, default=DEFAULT_DOCX_MODE,
+                        help="docx extraction: the python-docx object model (default), body-only XML streaming "
+                             "or every story with scoped blocks")
+    parser.add_argument("--diff-mode", choices=DIFF_MODES, default=DEFAULT_DIFF_MODE,
+                        help="Diff all blocks as one sequence (default), or align sections by heading "
+                             "first, then diff inside each one")
+    parser.add_argument("--xlsx-chunk-rows", type=int, default=None,
+                        help="Split xlsx sheets into table blocks of about N rows; unchanged chunks "
+                             "are skipped by hash (default: one block per sheet)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Enable DEBUG logging")
-    return parser.parse_args()
+    parser.add_argument("--ai", action=argparse.BooleanOptionalAction, default=False,
+                        help="Run spaCy change analysis for the report (off by default)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Compare many pairs: OLD is a CSV/JSONL manifest, or OLD and NEW are directories")
+    parser.add_argument("--out-dir", type=Path, default=Path("docdiff_reports"),
+                        help="(batch) directory for per-pair reports and index.json")
+    parser.add_argument("--workers", type=int, default=None, help="(batch) number of worker processes")
+    args = parser.parse_args()
+    if not args.batch and args.new is None:
+        parser.error("the following arguments are required: new")
+    return args
 
 
 def setup_logging(verbose: bool) -> None:
@@ -55,15 +116,19 @@ def setup_logging(verbose: bool) -> None:
     logging.basicConfig(level=level, format="%(asctime)s %(levelname)s: %(message)s")
 
 
-def choose_extractor(path: Path):
+def choose_extractor(path: Path, docx_mode: Optional[str] = None, xlsx_chunk_rows: Optional[int] = None):
     ext = path.suffix.lower()
-    cls = EXTRACTOR_MAP.get(ext)
-    if cls is None:
+    name = EXTRACTOR_MAP.get(ext)
+    if name is None:
         raise ValueError(
             f"No extractor available for extension: {ext}. "
             "Supported formats: .docx, .doc, .xlsx, .txt"
         )
-    return cls()
+    if name == "DocxExtractor" and docx_mode:
+        return load_extractor_class(name)(mode=docx_mode)
+    if name == "XlsxExtractor" and xlsx_chunk_rows:
+        return load_extractor_class(name)(chunk_rows=xlsx_chunk_rows)
+    return load_extractor_class(name)()
 
 def validate_files(old: Path, new: Path) -> None:
     old_ext = old.suffix.lower()
@@ -81,51 +146,123 @@ def validate_files(old: Path, new: Path) -> None:
             "Both files must have the same format."
         )
 
-def main() -> int:
-    args = parse_args()
-    setup_logging(args.verbose)
-
-    if not args.old.exists():
-        _LOGGER.error("Old file does not exist: %s", args.old)
+def compare_pair(
+    old: Path,
+    new: Path,
+    output: Path,
+    json_output: Optional[Path] = None,
+    min_bytes: int = PARALLEL_MIN_BYTES,
+    ai: bool = False,
+    json_format: str = "full",
+    json_compression: Optional[str] = None,
+    unified_output: Optional[Path] = None,
+    context: int = DEFAULT_CONTEXT,
+    txt_min_bytes: int = TXT_ENGINE_MIN_BYTES,
+    docx_mode: Optional[str] = None,
+    diff_mode: Optional[str] = None,
+    xlsx_chunk_rows: Optional[int] = None,
+) -> int:
+    """
+    Compares one pair of files and writes its reports; returns an ExitCode.
+    Text files of at least `txt_min_bytes` go through txt_engine, and their
+    reports list only the changed lines with `context` lines around them.
+    `docx_mode` selects the docx extraction (see DOCX_MODES), `diff_mode`
+    the block alignment (see DIFF_MODES); `xlsx_chunk_rows` splits sheets
+    into chunks (XlsxExtractor).
+    """
+    if not old.exists():
+        _LOGGER.error("Old file does not exist: %s", old)
         return ExitCode.OLD_NOT_FOUND
-    if not args.new.exists():
-        _LOGGER.error("New file does not exist: %s", args.new)
+    if not new.exists():
+        _LOGGER.error("New file does not exist: %s", new)
         return ExitCode.NEW_NOT_FOUND
 
     try:
-        validate_files(args.old, args.new)
+        validate_files(old, new)
+        is_txt = FORMAT_GROUP[old.suffix.lower()] == "txt"
+        if unified_output and not is_txt:
+            raise ValueError("A unified diff is only available for .txt files")
 
-        old_ex = choose_extractor(args.old)
-        new_ex = choose_extractor(args.new)
+        options = {"docx_mode": docx_mode} if docx_mode else {}
+        if xlsx_chunk_rows:
+            options["xlsx_chunk_rows"] = xlsx_chunk_rows
+        old_ex = choose_extractor(old, **options)
+        new_ex = choose_extractor(new, **options)
 
-        old_blocks = old_ex.extract_blocks(args.old)
-        new_blocks = new_ex.extract_blocks(args.new)
+        identical = type(old_ex) is type(new_ex) and filecmp.cmp(old, new, shallow=False)
+        native_txt = not identical and is_txt and max(old.stat().st_size, new.stat().st_size) >= txt_min_bytes
+        if identical:
+            # byte-identical files: one extraction, no diff
+            old_blocks = new_blocks = old_ex.extract_blocks(old)
+        elif native_txt:
+            # large text files: hashed lines, blocks only around the changes
+            diffs = diff_text_files(old, new, context)
+        else:
+            # large pairs are parsed in parallel worker processes
+            old_blocks, new_blocks = extract_pair(old_ex, old, new_ex, new, min_bytes)
     except ValueError as exc:
         _LOGGER.error(str(exc))
-        return ExitCode.FILE_TYPE_MISMATCH
+        return FILE_TYPE_MISMATCH
     except Exception as exc:
         _LOGGER.exception("Error while parsing documents: %s", exc)
         return ExitCode.PARSE_ERROR
 
-    diffs = compare_blocks(old_blocks, new_blocks)
+    if identical:
+        diffs = unchanged_blocks(old_blocks)
+    elif not native_txt:
+        diff_options = {}
+        if diff_mode == "sections":
+            diff_options = {"sections": True, "executor": pool_for(old_blocks, new_blocks)}
+        diffs = compare_blocks(old_blocks, new_blocks, **diff_options)
 
     try:
-        generate_html_report(diffs, output_path=str(args.output))
-        _LOGGER.info("HTML report generated: %s", args.output)
+        generate_html_report(diffs, output_path=str(output), ai=ai)
+        _LOGGER.info("HTML report generated: %s", output)
     except Exception:
         _LOGGER.exception("Error while saving HTML report")
         return ExitCode.HTML_ERROR
 
-    if args.json:
+    if json_output:
+        # the txt engine's diffs cover only the hunks; the edit script needs every line
+        json_diffs = iter_line_entries(old, new) if native_txt and json_format == "compact" else diffs
         try:
-            generate_json_report(diffs, output_path=str(args.json))
-            _LOGGER.info("JSON report generated: %s", args.json)
+            generate_json_report(json_diffs, output_path=str(json_output), fmt=json_format, compression=json_compression)
+            _LOGGER.info("JSON report generated: %s", json_output)
         except Exception:
             _LOGGER.exception("Error while saving JSON report")
             return ExitCode.JSON_ERROR
 
+    if unified_output:
+        try:
+            write_unified_diff(old, new, unified_output, context)
+            _LOGGER.info("Unified diff generated: %s", unified_output)
+        except Exception:
+            _LOGGER.exception("Error while saving unified diff")
+            return ExitCode.UNIFIED_ERROR
+
     return ExitCode.OK
 
 
+def main() -> int:
+    args = parse_args()
+    setup_logging(args.verbose)
+
+    if getattr(args, "batch", False):
+        from docdiff.batch import run_batch_cli
+        return run_batch_cli(args)
+
+    return compare_pair(
+        args.old, args.new, args.output, args.json,
+        ai=getattr(args, "ai", False),
+        json_format=getattr(args, "json_format", "full"),
+        json_compression=getattr(args, "json_compression", None),
+        unified_output=getattr(args, "unified", None),
+        context=getattr(args, "context", DEFAULT_CONTEXT),
+        docx_mode=getattr(args, "docx_mode", None),
+        diff_mode=getattr(args, "diff_mode", None),
+        xlsx_chunk_rows=getattr(args, "xlsx_chunk_rows", None),
+    )
+
+
 if __name__ == "__main__":
     sys.exit(int(main()))
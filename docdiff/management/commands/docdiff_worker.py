@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from docdiff.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued DocDiff jobs (for DOCDIFF_JOBS_BACKEND="worker")'
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument("--max-jobs", type=int, default=None,
+                            help="Exit after this many jobs, or when the queue is empty")
+
+    def handle(self, *args, **options):
+        done = run_worker(poll_interval=options["poll_interval"], max_jobs=options["max_jobs"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} DocDiff job(s)"))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.13 on 2026-10-18 01:42
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiffJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', max_length=10)),
+                ('stage', models.CharField(blank=True, max_length=20)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('error_code', models.CharField(blank=True, max_length=50)),
+                ('old_data', models.BinaryField(blank=True, null=True)),
+                ('new_data', models.BinaryField(blank=True, null=True)),
+                ('old_name', models.CharField(max_length=255)),
+                ('new_name', models.CharField(max_length=255)),
+                ('old_sha256', models.CharField(max_length=64)),
+                ('new_sha256', models.CharField(max_length=64)),
+                ('result', models.BinaryField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('docdiff', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('version', models.PositiveSmallIntegerField()),
+                ('result', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'version'), name='docdiff_analysis_unique')],
+            },
+        ),
+    ]
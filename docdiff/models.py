@@ -1,3 +1,63 @@
+import uuid
+
 from django.db import models
 
-# Create your models here.
+
+class DiffJob(models.Model):
+    """
+    A document comparison queued by docdiff_view and run in the background
+    (see docdiff.jobs). Once done, `result` holds the compressed diff blocks
+    (docdiff.extractors.serialization) with the AI analysis applied.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    stage = models.CharField(max_length=20, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)  # %
+    error_code = models.CharField(max_length=50, blank=True)
+
+    # uploads travel in the job row (any worker process can run it) until it finishes
+    old_data = models.BinaryField(null=True, blank=True)
+    new_data = models.BinaryField(null=True, blank=True)
+    old_name = models.CharField(max_length=255)
+    new_name = models.CharField(max_length=255)
+    old_sha256 = models.CharField(max_length=64)
+    new_sha256 = models.CharField(max_length=64)
+
+    result = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.old_name} ↔ {self.new_name} ({self.status})"
+
+
+class BlockAnalysis(models.Model):
+    """
+    AI analysis of a changed block, keyed by heuristics_ai.block_fingerprint,
+    so blocks already seen in an earlier comparison skip spaCy.
+    """
+
+    fingerprint = models.CharField(max_length=32)
+    version = models.PositiveSmallIntegerField()
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fingerprint", "version"], name="docdiff_analysis_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.fingerprint} v{self.version}"
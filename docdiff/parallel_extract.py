@@ -0,0 +1,107 @@
+"""
+Parallel extraction of an old/new document pair.
+
+Both documents are parsed at the same time in a reusable ProcessPoolExecutor
+whose workers import python-docx/openpyxl once, when they start. Blocks come
+back in the compact serialized form (extractors.serialization), so wall-clock
+time is roughly that of the slower parse. Small pairs are extracted inline,
+where handing them to another process costs more than it saves.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+import logging
+import os
+import threading
+
+from .extractors.base_extractor import BaseExtractor
+from .extractors.serialization import dump_blocks, load_blocks
+
+_LOGGER = logging.getLogger(__name__)
+
+# Combined size of the pair below which both files are extracted inline
+PARALLEL_MIN_BYTES = 256 * 1024
+# One process per document; single-CPU hosts gain nothing from the pool
+POOL_WORKERS = min(2, os.cpu_count() or 1)
+
+Blocks = List[Dict[str, Any]]
+
+# concurrent.futures.process / multiprocessing are imported on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _warm_up() -> None:
+    """Pool initializer: pays the parser import cost once per worker."""
+    from .extractors import extract_docx, extract_txt, extract_xlsx  # noqa: F401
+
+
+def mp_context():
+    import multiprocessing
+    # Workers are started from a clean server process rather than forked
+    # from a (possibly multi-threaded) web worker
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def get_pool():
+    """Returns the shared extraction pool (a ProcessPoolExecutor), starting it on first use."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=mp_context(),
+                initializer=_warm_up,
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _extract_serialized(extractor: BaseExtractor, path: Path) -> bytes:
+    return dump_blocks(extractor.extract_blocks(path))
+
+
+def _total_size(*paths: Path) -> int:
+    try:
+        return sum(Path(p).stat().st_size for p in paths)
+    except OSError:
+        return 0
+
+
+def extract_pair(
+    old_extractor: BaseExtractor,
+    old_path: Path,
+    new_extractor: BaseExtractor,
+    new_path: Path,
+    min_bytes: int = PARALLEL_MIN_BYTES,
+) -> Tuple[Blocks, Blocks]:
+    """
+    Extracts both documents, in parallel worker processes when the pair is
+    at least `min_bytes` in size and more than one CPU is available
+    (a negative `min_bytes` always extracts inline).
+    Extraction errors are raised as they would be from extract_blocks().
+    """
+    if POOL_WORKERS < 2 or min_bytes < 0 or _total_size(old_path, new_path) < min_bytes:
+        return old_extractor.extract_blocks(old_path), new_extractor.extract_blocks(new_path)
+
+    from concurrent.futures.process import BrokenProcessPool
+
+    try:
+        pool = get_pool()
+        old_future = pool.submit(_extract_serialized, old_extractor, old_path)
+        new_future = pool.submit(_extract_serialized, new_extractor, new_path)
+        return load_blocks(old_future.result()), load_blocks(new_future.result())
+    except BrokenProcessPool:
+        # a worker died (e.g. out of memory); start a fresh pool next time
+        _LOGGER.warning("DocDiff extraction pool broken, extracting inline", exc_info=True)
+        shutdown_pool()
+        return old_extractor.extract_blocks(old_path), new_extractor.extract_blocks(new_path)
@@ -0,0 +1,178 @@
+"""
+The document comparison pipeline run by docdiff jobs:
+extraction (cached by upload SHA-256), block diff and AI analysis.
+Byte-identical uploads stop after a single extraction.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+from django.conf import settings
+
+from .extractors.extract_docx import DocxExtractor
+from .extractors.extract_xlsx import XlsxExtractor
+from .extractors.extract_txt import TxtExtractor
+from .diff_engine import compare_blocks, unchanged_blocks
+from .extraction_cache import extract_cached, extract_pair_cached, file_digest
+from .history import load_analyses, store_analyses
+from .parallel_extract import PARALLEL_MIN_BYTES
+from .section_diff import PARALLEL_MIN_BLOCKS, pool_for
+from .heuristics_ai import AnalysisMemo, block_fingerprint, change_texts, pipe_docs
+
+_LOGGER = logging.getLogger(__name__)
+
+# Prevent excessive AI processing (overridden by DOCDIFF_MAX_CHANGED_BLOCKS)
+MAX_CHANGED_BLOCKS = 300
+
+ProgressCallback = Callable[[str, int], None]
+
+
+class PipelineError(Exception):
+    """Pipeline failure carrying an error code for the frontend i18n."""
+
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.code = code
+
+
+def get_extractor(path: Path):
+    """Select extractor by extension."""
+    ext = Path(path).suffix.lower()
+    if ext == ".docx":
+        return DocxExtractor(mode=getattr(settings, "DOCDIFF_DOCX_MODE", "python-docx"))
+    elif ext == ".xlsx":
+        return XlsxExtractor(chunk_rows=getattr(settings, "DOCDIFF_XLSX_CHUNK_ROWS", 0) or None)
+    elif ext == ".txt":
+        return TxtExtractor()
+    raise ValueError(f"Unsupported extension: {ext}")
+
+
+def diff_blocks(old_blocks: List[Dict[str, Any]], new_blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """compare_blocks() in the DOCDIFF_DIFF_MODE set for jobs (section diffs of large documents run in the pool)."""
+    sections = getattr(settings, "DOCDIFF_DIFF_MODE", "flat") == "sections"
+    min_blocks = getattr(settings, "DOCDIFF_SECTION_PARALLEL_MIN_BLOCKS", PARALLEL_MIN_BLOCKS)
+    return compare_blocks(
+        old_blocks,
+        new_blocks,
+        sections=sections,
+        executor=pool_for(old_blocks, new_blocks, min_blocks) if sections else None,
+    )
+
+
+def analyze_blocks(diff_result: List[Dict[str, Any]]) -> AnalysisMemo:
+    """
+    Stores the AI analysis (labels, semantic_score, change_type, confidence)
+    in every changed block and returns the memo used. Blocks analyzed in an
+    earlier comparison reuse the stored result (docdiff.history); only the
+    others go through spaCy.
+    """
+    text_blocks = []
+    for block in diff_result:
+        if block.get("change") != "changed":
+            continue
+
+        old_type = block.get("old", {}).get("type")
+        new_type = block.get("new", {}).get("type")
+
+        # AI text only
+        if old_type != "paragraph" or new_type != "paragraph":
+            block.update({
+                "labels": [],
+                "semantic_score": None,
+                "change_type": "structural",
+                "confidence": 1.0,
+            })
+            continue
+        text_blocks.append(block)
+
+    fingerprints = [block_fingerprint(b) for b in text_blocks]
+    stored = load_analyses(fingerprints)
+    pending = []
+    for block, fp in zip(text_blocks, fingerprints):
+        if fp in stored:
+            block.update(stored[fp])
+        else:
+            pending.append((block, fp))
+    pending_blocks = [block for block, _ in pending]
+
+    # All new texts go through the spaCy pipeline in one batch
+    try:
+        docs = pipe_docs(change_texts(pending_blocks))
+    except Exception:
+        _LOGGER.warning("Batch spaCy processing failed", exc_info=True)
+        docs = None
+
+    # Identical changes are analyzed once; similarities come from one array operation
+    try:
+        memo = AnalysisMemo.for_blocks(pending_blocks, docs)
+    except Exception:
+        _LOGGER.warning("Vectorized similarity failed", exc_info=True)
+        memo = AnalysisMemo(docs)
+    analyzed: Dict[str, Dict[str, Any]] = {}
+    for block, fp in pending:
+        try:
+            analyzed[fp] = memo.analyze(block)
+            block.update(analyzed[fp])
+        except Exception:
+            block.update({
+                "labels": [],
+                "semantic_score": None,
+                "change_type": "ai_error",
+                "confidence": 0.0,
+            })
+    # results of the SequenceMatcher fallback (no spaCy) are not worth keeping
+    if docs is not None:
+        store_analyses(analyzed)
+    return memo
+
+
+def run_pipeline(
+    old_path: Path,
+    new_path: Path,
+    old_digest: Optional[str] = None,
+    new_digest: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Extracts, compares and analyzes two documents, returning the diff blocks.
+    Raises PipelineError with a frontend error code on expected failures.
+    """
+    report = progress or (lambda stage, percent: None)
+
+    report("extract", 10)
+    try:
+        old_extractor, new_extractor = get_extractor(old_path), get_extractor(new_path)
+        old_digest = old_digest or file_digest(old_path)
+        new_digest = new_digest or file_digest(new_path)
+        if old_digest == new_digest and old_extractor.cache_token() == new_extractor.cache_token():
+            # byte-identical uploads: one extraction, no diff and no AI analysis
+            blocks = extract_cached(old_extractor, Path(old_path), old_digest)
+            if not blocks:
+                raise PipelineError("empty_documents")
+            return unchanged_blocks(blocks)
+        # both documents are parsed at once in the extraction process pool
+        old_blocks, new_blocks = extract_pair_cached(
+            old_extractor, Path(old_path),
+            new_extractor, Path(new_path),
+            old_digest, new_digest,
+            min_bytes=getattr(settings, "DOCDIFF_PARALLEL_MIN_BYTES", PARALLEL_MIN_BYTES),
+        )
+    except PipelineError:
+        raise
+    except Exception:
+        _LOGGER.warning("DocDiff extraction failed", exc_info=True)
+        raise PipelineError("extract_failed")
+
+    if not old_blocks and not new_blocks:
+        raise PipelineError("empty_documents")
+
+    report("diff", 60)
+    diff_result = diff_blocks(old_blocks, new_blocks)
+
+    changed = sum(1 for b in diff_result if b.get("change") == "changed")
+    if changed > getattr(settings, "DOCDIFF_MAX_CHANGED_BLOCKS", MAX_CHANGED_BLOCKS):
+        raise PipelineError("too_many_changes")
+
+    report("analyze", 75)
+    analyze_blocks(diff_result)
+    return diff_result
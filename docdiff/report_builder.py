@@ -1,10 +1,10 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import html
 import json
 import logging
-import re
-from difflib import SequenceMatcher
-from .heuristics_ai import analyze_change, generate_ai_summary
+from .change_features import block_features
+from .compact_report import open_report, write_compact_report
+from .heuristics_ai import AnalysisMemo, analyze_change, generate_ai_summary, precomputed_analysis
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -82,6 +82,10 @@ body {
 
 table { border-collapse: collapse; margin-bottom: 10px; width:100%; }
 td, th { border: 1px solid #d0d0d0; padding: 6px; vertical-align: top; }
+tr.row_added td { background-color: var(--added-bg); }
+tr.row_deleted td { background-color: var(--deleted-bg); }
+tr.row_changed td { background-color: var(--changed-bg); }
+tr.header_changed td { background-color: var(--changed-bg); font-weight: bold; }
 pre.diff { background: #f4f4f4; padding: 8px; overflow: auto; border-radius:6px; }
 
 .meta { color: var(--muted); font-size: 0.9em; margin-bottom:6px; display:flex; gap:8px; align-items:center; flex-wrap:wrap; }
@@ -195,16 +199,14 @@ def compute_stats_and_scores(block_diffs: List[Dict[str, Any]]) -> Dict[str, Any
         if ch in ("added", "deleted"):
             score += 2.5
         if ch == "changed":
-            old_text = (b.get("old", {}).get("text") or "")
-            new_text = (b.get("new", {}).get("text") or "")
-            ratio = SequenceMatcher(None, old_text, new_text).ratio()
-            score += (1.0 - ratio) * 6.0
-            combined = (old_text + " " + new_text)
-            if re.search(r"\d", combined):
+            # computed once per block, shared with the AI classification
+            features = block_features(b)
+            score += (1.0 - features["ratio"]) * 6.0
+            if features["digit"]:
                 score += 0.8
-            if re.search(r"\b(kg|m|mm|cm|%|km|PLN|EUR|kW)\b", combined, re.I):
+            if features["unit"]:
                 score += 0.8
-            if re.search(r"\b(19|20)\d{2}\b", combined):
+            if features["year"]:
                 score += 0.6
         if typ in ("image", "table"):
             score += 2.0
@@ -245,10 +247,24 @@ def _render_ai_info(f, b: Dict[str, Any]):
     f.write("</div>")
 
 
+def _render_location(f, b) -> None:
+    """Source line (.txt), document story (structural docx) and section move of the block."""
+    src = b if b.get("change") != "changed" else (b.get("new") or {})
+    line = src.get("line")
+    if line:
+        f.write(f" <span class='badge'><span data-i18n='line'>Line</span> {int(line)}</span>")
+    scope = src.get("scope")
+    if scope and scope != "body":
+        f.write(f" <span class='badge'>{html.escape(scope)}</span>")
+    if b.get("moved"):
+        f.write(" <span class='badge' data-i18n='moved'>Moved</span>")
+
+
 def _render_paragraph(f, b, cls):
     f.write(f"<div class='card {cls}'>")
     f.write("<div class='meta'>")
     f.write("<span class='badge' data-i18n='paragraph'>PARAGRAPH</span>")
+    _render_location(f, b)
     f.write("</div>")
     _render_ai_info(f, b)
 
@@ -270,7 +286,9 @@ def _render_paragraph(f, b, cls):
 
 def _render_table(f, b, cls):
     f.write(f"<div class='card {cls}'>")
-    f.write("<div class='meta'><span class='badge' data-i18n='table'>TABLE</span></div>")
+    f.write("<div class='meta'><span class='badge' data-i18n='table'>TABLE</span>")
+    _render_location(f, b)
+    f.write("</div>")
     _render_ai_info(f, b)
 
     # if we have table_changes (cell-level diffs), use them; otherwise, regular table
@@ -281,9 +299,19 @@ def _render_table(f, b, cls):
         # older format: table may be a list of rows (strings)
         rows = b.get("table") or b.get("new", {}).get("table") or []
 
+    # aligned table diff: only changed rows are listed, each with a row record
+    row_ops = b.get("table_rows") or []
+
     f.write("<table>")
-    for row in rows:
-        f.write("<tr>")
+    header = b.get("table_header")
+    if header:
+        f.write("<tr>" + "".join(f"<th>{html.escape(str(h))}</th>" for h in header) + "</tr>")
+    for r, row in enumerate(rows):
+        if r < len(row_ops):
+            op = html.escape(str(row_ops[r].get("op", "")))
+            f.write(f"<tr class='{op}'>")
+        else:
+            f.write("<tr>")
         for cell in row:
             if isinstance(cell, dict):
                 if cell.get("type") == "same":
@@ -296,7 +324,13 @@ def _render_table(f, b, cls):
                 # cell is plain string
                 f.write(f"<td>{html.escape(str(cell))}</td>")
         f.write("</tr>")
-    f.write("</table></div>")
+    f.write("</table>")
+    if b.get("rows_unchanged"):
+        f.write(
+            f"<p class='small'><span data-i18n='rows_unchanged'>Unchanged rows hidden</span>: "
+            f"{int(b['rows_unchanged'])}</p>"
+        )
+    f.write("</div>")
 
 
 def _render_image(f, b, cls):
@@ -310,15 +344,40 @@ def _render_image(f, b, cls):
 # -------------------------
 # Main render
 # -------------------------
-def generate_html_report(block_diffs: List[Dict[str, Any]], output_path: str = "report.html") -> None:
-    # 1) basic statistics and scoring
-    stats = compute_stats_and_scores(block_diffs)
+# Blocks rendered per streamed chunk
+REPORT_CHUNK_BLOCKS = 200
+# Blocks returned per fragment request; the rest of a run stays collapsed
+REPORT_FRAGMENT_PAGE = 500
 
-    # 2) AI analysis (for "changed") — fills _ai_* fields
+
+class _ChunkWriter:
+    """File-like sink for the render helpers; collected text is taken as chunks."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+
+    def take(self) -> str:
+        out = "".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def _annotate_ai(block_diffs: List[Dict[str, Any]], memo: Optional[AnalysisMemo]) -> None:
+    """
+    Fills _ai_* fields of changed blocks, reusing analysis stored in the
+    block. Without a memo only the stored analysis is used.
+    """
     for b in block_diffs:
         if b.get("change") == "changed":
             try:
-                ai = analyze_change(b)
+                ai = precomputed_analysis(b)
+                if ai is None:
+                    if memo is None:
+                        continue
+                    ai = memo.analyze(b, analyze_change)
                 b["_ai_labels"] = ai.get("labels")
                 b["_ai_sem_score"] = ai.get("semantic_score")
                 b["_ai_type"] = ai.get("change_type")
@@ -330,6 +389,111 @@ def generate_html_report(block_diffs: List[Dict[str, Any]], output_path: str = "
                 b["_ai_type"] = ""
                 b["_ai_conf"] = None
 
+
+def unchanged_runs(block_diffs: List[Dict[str, Any]], min_run: int) -> Iterator[Tuple[int, int]]:
+    """Yields (start, end) of runs of at least `min_run` consecutive unchanged blocks."""
+    if min_run <= 0:
+        return
+    i, n = 0, len(block_diffs)
+    while i < n:
+        if block_diffs[i].get("change") != "unchanged":
+            i += 1
+            continue
+        j = i
+        while j < n and block_diffs[j].get("change") == "unchanged":
+            j += 1
+        if j - i >= min_run:
+            yield i, j
+        i = j
+
+
+def _render_block(f, i: int, b: Dict[str, Any]) -> None:
+    ch = html.escape(str(b.get("change", "unknown")))
+    typ = b.get("type") or b.get("new", {}).get("type") or b.get("old", {}).get("type") or "unknown"
+    typ = str(typ)
+    score = b.get("_score", 0)
+    score_cls = "low" if score < 3 else ("med" if score < 6 else "high")
+    # wrapper with attributes
+    f.write(f"<div id='blk{i}' class='card {html.escape(ch)}' data-change='{html.escape(ch)}' data-type='{html.escape(typ)}'>")
+    f.write("<div class='meta'>")
+    f.write(f"<span class='badge' data-i18n='{html.escape(typ)}>{html.escape(typ).upper()}</span>")
+    f.write(f"<span class='small'>change: {html.escape(str(b.get('change','')))}</span>")
+    f.write(f"<span class='score {score_cls}'>s={score}</span>")
+    f.write("</div>")  # meta end
+
+    # render by type
+    if typ == "paragraph":
+        _render_paragraph(f, b, html.escape(ch))
+    elif typ == "table":
+        _render_table(f, b, html.escape(ch))
+    elif typ == "image":
+        _render_image(f, b, html.escape(ch))
+    else:
+        f.write(f"<div class='small'><pre>{html.escape(str(b))}</pre></div>")
+
+    f.write("</div>")  # block wrapper
+
+
+def _render_collapsed_run(f, start: int, end: int, fragment_url: str) -> None:
+    """Placeholder for unchanged blocks [start, end) loaded on demand from `fragment_url`."""
+    url = html.escape(f"{fragment_url}?start={start}&end={end}")
+    f.write(f"<div class='card unchanged collapsed-run' data-change='unchanged' data-type='' data-fragment='{url}'>")
+    f.write(f"<span class='small'><span data-i18n='unchanged_run'>Unchanged blocks</span>: #{start}–#{end - 1} ({end - start})</span> ")
+    f.write("<button class='chip load-run' data-i18n='show_blocks'>Show</button>")
+    f.write("</div>")
+
+
+def render_report_fragment(
+    block_diffs: List[Dict[str, Any]],
+    start: int,
+    end: int,
+    fragment_url: Optional[str] = None,
+    page_size: int = REPORT_FRAGMENT_PAGE,
+) -> str:
+    """
+    Renders blocks [start, end) for a collapsed run. At most `page_size`
+    blocks are rendered; the remainder is returned as a new placeholder.
+    """
+    start = max(0, min(start, len(block_diffs)))
+    end = max(start, min(end, len(block_diffs)))
+    stop = min(end, start + page_size) if fragment_url else end
+    compute_stats_and_scores(block_diffs[start:stop])
+
+    f = _ChunkWriter()
+    for i in range(start, stop):
+        _render_block(f, i, block_diffs[i])
+    if stop < end:
+        _render_collapsed_run(f, stop, end, fragment_url)
+    return f.take()
+
+
+def iter_html_report(
+    block_diffs: List[Dict[str, Any]],
+    analysis_memo: Optional[AnalysisMemo] = None,
+    fragment_url: Optional[str] = None,
+    collapse_min_run: int = 0,
+    chunk_blocks: int = REPORT_CHUNK_BLOCKS,
+    ai: bool = True,
+) -> Iterator[str]:
+    """
+    Renders the HTML report as a sequence of text chunks (suitable for
+    StreamingHttpResponse). The head, summary and TOC come first, then blocks
+    in chunks of `chunk_blocks`.
+
+    With `fragment_url` and `collapse_min_run` > 0, runs of at least
+    `collapse_min_run` unchanged blocks are replaced by placeholders which
+    the page fetches from `fragment_url` (see render_report_fragment).
+    With `ai=False` only analysis already stored in the blocks is shown:
+    nothing is analyzed (spaCy is never loaded) and there is no AI summary.
+    """
+    # 1) basic statistics and scoring
+    stats = compute_stats_and_scores(block_diffs)
+
+    # 2) AI analysis (for "changed") — fills _ai_* fields
+    if ai and analysis_memo is None:
+        analysis_memo = AnalysisMemo()
+    _annotate_ai(block_diffs, analysis_memo if ai else None)
+
     # 3) prepare TOC sorted by ai_score (fallback to _score)
     # We want the most significant first
     indexed = list(range(len(block_diffs)))
@@ -346,284 +510,332 @@ def generate_html_report(block_diffs: List[Dict[str, Any]], output_path: str = "
     toc_items = [i for i in indexed if block_diffs[i].get("change") in ("changed", "added", "deleted")]
     toc_items.sort(key=sort_key, reverse=True)
 
-    summary_html = generate_ai_summary(block_diffs)
-
-    # 4) generate file
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>")
-        f.write(STYLE)
-
-        # JS (deferred / DOMContentLoaded)
-        f.write("""
-        <script defer>
-        function toggleClass(el, cls){ el.classList.toggle(cls); }
-        function filterBy(){
-          document.querySelectorAll('[data-change]').forEach(function(n){
-            const ch = n.dataset.change;
-            const typ = n.dataset.type;
-            let show = true;
-            if(window.filterChange.length && window.filterChange.indexOf(ch) === -1) show = false;
-            if(window.filterType.length && window.filterType.indexOf(typ) === -1) show = false;
-            n.style.display = show ? '' : 'none';
-          });
-        }
-        function initFilters(){
-          window.filterChange = [];
-          window.filterType = [];
-          document.querySelectorAll('.chip.change').forEach(function(c){
-            c.addEventListener('click', function(){
-              toggleClass(c,'active');
-              const v = c.dataset.val;
-              if(c.classList.contains('active')) window.filterChange.push(v);
-              else window.filterChange = window.filterChange.filter(x=>x!==v);
-              filterBy();
-            });
-          document.querySelectorAll(".lang-btn").forEach(btn=>{
-              btn.addEventListener("click", function(){
-                setLang(this.dataset.lang);
-              });
-            });
-          });
-          document.querySelectorAll('.chip.type').forEach(function(c){
-            c.addEventListener('click', function(){
-              toggleClass(c,'active');
-              const v = c.dataset.val;
-              if(c.classList.contains('active')) window.filterType.push(v);
-              else window.filterType = window.filterType.filter(x=>x!==v);
-              filterBy();
-            });
-          });
-        
-          var collBtn = document.querySelector('.collapse-toggle');
-          if(collBtn){
-            collBtn.addEventListener('click', function(){
-              // check if currently collapsed (all unchanged hidden)
-              var unchanged = Array.from(document.querySelectorAll('.unchanged'));
-              var anyVisible = unchanged.some(x => x.style.display !== 'none');
-              if (anyVisible) {
-                  unchanged.forEach(x => x.style.display = 'none');
-                  this.dataset.state = "hidden";
-                  this.textContent = I18N[CURRENT_LANG].show_unchanged;
-                } else {
-                  unchanged.forEach(x => x.style.display = '');
-                  this.dataset.state = "shown";
-                  this.textContent = I18N[CURRENT_LANG].hide_unchanged;
-                }
-            });
-          }
-        
-          // dark mode toggle
-          var dmBtn = document.querySelector('.dark-toggle');
-          if(dmBtn){
-            dmBtn.addEventListener('click', function(){
-              document.body.classList.toggle('dark');
-              dmBtn.textContent = document.body.classList.contains('dark')
-              ? I18N[CURRENT_LANG].mode_dark
-              : I18N[CURRENT_LANG].mode_light;
-            });
-          }
-        
-          // smooth anchor scroll for TOC links
-          document.querySelectorAll('.toc a').forEach(function(a){
-            a.addEventListener('click', function(e){
-              e.preventDefault();
-              var id = this.getAttribute('href').slice(1);
-              var el = document.getElementById(id);
-              if(el) el.scrollIntoView({behavior:'smooth', block:'center'});
-            });
+    summary_html = generate_ai_summary(block_diffs) if ai else ""
+
+    # 4) render
+    f = _ChunkWriter()
+    f.write("<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'>")
+    f.write(STYLE)
+
+    # JS (deferred / DOMContentLoaded)
+    f.write("""
+    <script defer>
+    function toggleClass(el, cls){ el.classList.toggle(cls); }
+    function filterBy(){
+      document.querySelectorAll('[data-change]').forEach(function(n){
+        const ch = n.dataset.change;
+        const typ = n.dataset.type;
+        let show = true;
+        if(window.filterChange.length && window.filterChange.indexOf(ch) === -1) show = false;
+        if(window.filterType.length && window.filterType.indexOf(typ) === -1) show = false;
+        n.style.display = show ? '' : 'none';
+      });
+    }
+    function initFilters(){
+      window.filterChange = [];
+      window.filterType = [];
+      document.querySelectorAll('.chip.change').forEach(function(c){
+        c.addEventListener('click', function(){
+          toggleClass(c,'active');
+          const v = c.dataset.val;
+          if(c.classList.contains('active')) window.filterChange.push(v);
+          else window.filterChange = window.filterChange.filter(x=>x!==v);
+          filterBy();
+        });
+      document.querySelectorAll(".lang-btn").forEach(btn=>{
+          btn.addEventListener("click", function(){
+            setLang(this.dataset.lang);
           });
-        
-        } // end initFilters
-        
-        document.addEventListener('DOMContentLoaded', initFilters);
-        </script>
-        """)
-        f.write("""
-        <script>
-        const I18N = {
-          en: {
-            added: "added", 
-            deleted: "deleted", 
-            changed: "changed", 
-            unchanged: "unchanged",
-            paragraph: "Paragraph",
-            table: "Table",
-            image: "Image",
-            score: "Score",
-            back: "Back to DocDiff",
-            title: "Document Comparison Report",
-            total: "Total blocks",
-            ai_summary: "AI Summary",
-            toc: "Most Significant Changes (TOC)",
-            hide_unchanged: "Hide unchanged",
-            show_unchanged: "Show unchanged",
-            mode_light: "Mode: light",
-            mode_dark: "Mode: dark",
-            change: "change",
-            old: "Old",
-            new: "New",
-            inline: "Inline diff",
-            relevance: "Relevance",
-            confidence: "Confidence",
-            type: "Type"
-          },
-          pl: {
-            added: "dodane", 
-            deleted: "usunięte", 
-            changed: "zmienione", 
-            unchanged: "bez zmian",
-            paragraph: "Akapit",
-            table: "Tabela",
-            image: "Obraz",
-            score: "Wynik",
-            back: "Powrót do DocDiff",
-            title: "Raport porównania dokumentów",
-            total: "Łączna liczba bloków",
-            ai_summary: "Podsumowanie AI",
-            toc: "Najistotniejsze zmiany",
-            hide_unchanged: "Ukryj bez zmian",
-            show_unchanged: "Pokaż bez zmian",
-            mode_light: "Tryb: jasny",
-            mode_dark: "Tryb: ciemny",
-            change: "zmiana",
-            old: "Stare",
-            new: "Nowe",
-            inline: "Różnice",
-            relevance: "Istotność",
-            confidence: "Pewność",
-            type: "Typ"
-          }
-        };
-
-        let CURRENT_LANG = "en";
-
-        function setLang(lang){
-          CURRENT_LANG = lang;
+        });
+      });
+      document.querySelectorAll('.chip.type').forEach(function(c){
+        c.addEventListener('click', function(){
+          toggleClass(c,'active');
+          const v = c.dataset.val;
+          if(c.classList.contains('active')) window.filterType.push(v);
+          else window.filterType = window.filterType.filter(x=>x!==v);
+          filterBy();
+        });
+      });
     
-          document.querySelectorAll("[data-i18n]").forEach(el=>{
-            const key = el.dataset.i18n;
-            if(I18N[lang][key]){
-              el.textContent = I18N[lang][key];
+      var collBtn = document.querySelector('.collapse-toggle');
+      if(collBtn){
+        collBtn.addEventListener('click', function(){
+          // check if currently collapsed (all unchanged hidden)
+          var unchanged = Array.from(document.querySelectorAll('.unchanged'));
+          var anyVisible = unchanged.some(x => x.style.display !== 'none');
+          if (anyVisible) {
+              unchanged.forEach(x => x.style.display = 'none');
+              this.dataset.state = "hidden";
+              this.textContent = I18N[CURRENT_LANG].show_unchanged;
+            } else {
+              unchanged.forEach(x => x.style.display = '');
+              this.dataset.state = "shown";
+              this.textContent = I18N[CURRENT_LANG].hide_unchanged;
             }
-          });
+        });
+      }
     
-          const dmBtn = document.querySelector(".dark-toggle");
-          if (dmBtn) {
-            dmBtn.textContent = document.body.classList.contains("dark")
-              ? I18N[lang].mode_dark
-              : I18N[lang].mode_light;
-          }
+      // dark mode toggle
+      var dmBtn = document.querySelector('.dark-toggle');
+      if(dmBtn){
+        dmBtn.addEventListener('click', function(){
+          document.body.classList.toggle('dark');
+          dmBtn.textContent = document.body.classList.contains('dark')
+          ? I18N[CURRENT_LANG].mode_dark
+          : I18N[CURRENT_LANG].mode_light;
+        });
+      }
     
-          const collapseBtn = document.querySelector(".collapse-toggle");
-            if (collapseBtn) {
-              const hidden = collapseBtn.dataset.state === "hidden";
-              collapseBtn.textContent = hidden
-                ? I18N[CURRENT_LANG].show_unchanged
-                : I18N[CURRENT_LANG].hide_unchanged;
-            }
-        }
-        
-        document.addEventListener("DOMContentLoaded", function () {
-          setLang(CURRENT_LANG);
+      // smooth anchor scroll for TOC links
+      document.querySelectorAll('.toc a').forEach(function(a){
+        a.addEventListener('click', function(e){
+          e.preventDefault();
+          var id = this.getAttribute('href').slice(1);
+          var el = document.getElementById(id);
+          if(el) el.scrollIntoView({behavior:'smooth', block:'center'});
         });
-        </script>
-        """)
-
-        # body start
-        f.write("</head><body><div class='container'>")
-        f.write("""
-        <div style="margin-bottom:12px;font-size:1.1em; display:flex; justify-content:space-between; align-items:center;">
-          <a href="/docdiff/" style="text-decoration:none;color:var(--accent);">
-            ← <span data-i18n="back">Back to DocDiff</span>
-          </a>
-          <div>
-            <button class="chip lang-btn" data-lang="en">EN</button>
-            <button class="chip lang-btn" data-lang="pl">PL</button>
-          </div>
-        </div>
-        """)
-        f.write("<div class='header'><div>")
-        f.write("<h1 data-i18n='title'>Document Comparison Report</h1>")
-        f.write(f"<div class='small'><span data-i18n='total'>Total blocks</span>: {len(block_diffs)}</div>")
-        f.write("</div>")
-
-        # right side header: dark mode button
-        f.write("<div style='display:flex;align-items:center;gap:8px;'>")
-        f.write("<button class='chip dark-toggle'>Mode: light</button>")
-        f.write("</div></div>")  # header end
-
-        # AI summary card
+      });
+    
+    } // end initFilters
+    
+    // collapsed runs of unchanged blocks are fetched on demand
+    document.addEventListener('click', function(e){
+      var btn = e.target.closest('.load-run');
+      if(!btn) return;
+      var run = btn.closest('[data-fragment]');
+      btn.disabled = true;
+      fetch(run.dataset.fragment).then(function(r){ return r.text(); }).then(function(t){
+        run.insertAdjacentHTML('beforebegin', t);
+        run.remove();
+        setLang(CURRENT_LANG);
+      }).catch(function(){ btn.disabled = false; });
+    });
+
+    document.addEventListener('DOMContentLoaded', initFilters);
+    </script>
+    """)
+    f.write("""
+    <script>
+    const I18N = {
+      en: {
+        added: "added", 
+        deleted: "deleted", 
+        changed: "changed", 
+        unchanged: "unchanged",
+        paragraph: "Paragraph",
+        table: "Table",
+        image: "Image",
+        score: "Score",
+        back: "Back to DocDiff",
+        title: "Document Comparison Report",
+        total: "Total blocks",
+        ai_summary: "AI Summary",
+        toc: "Most Significant Changes (TOC)",
+        hide_unchanged: "Hide unchanged",
+        show_unchanged: "Show unchanged",
+        mode_light: "Mode: light",
+        mode_dark: "Mode: dark",
+        change: "change",
+        old: "Old",
+        new: "New",
+        inline: "Inline diff",
+        relevance: "Relevance",
+        confidence: "Confidence",
+        type: "Type",
+        rows_unchanged: "Unchanged rows hidden",
+        unchanged_run: "Unchanged blocks",
+        moved: "Moved",
+        show_blocks: "Show",
+        line: "Line"
+      },
+      pl: {
+        added: "dodane", 
+        deleted: "usunięte", 
+        changed: "zmienione", 
+        unchanged: "bez zmian",
+        paragraph: "Akapit",
+        table: "Tabela",
+        image: "Obraz",
+        score: "Wynik",
+        back: "Powrót do DocDiff",
+        title: "Raport porównania dokumentów",
+        total: "Łączna liczba bloków",
+        ai_summary: "Podsumowanie AI",
+        toc: "Najistotniejsze zmiany",
+        hide_unchanged: "Ukryj bez zmian",
+        show_unchanged: "Pokaż bez zmian",
+        mode_light: "Tryb: jasny",
+        mode_dark: "Tryb: ciemny",
+        change: "zmiana",
+        old: "Stare",
+        new: "Nowe",
+        inline: "Różnice",
+        relevance: "Istotność",
+        confidence: "Pewność",
+        type: "Typ",
+        rows_unchanged: "Ukryte wiersze bez zmian",
+        unchanged_run: "Bloki bez zmian",
+        moved: "Przeniesiono",
+        show_blocks: "Pokaż",
+        line: "Wiersz"
+      }
+    };
+
+    let CURRENT_LANG = "en";
+
+    function setLang(lang){
+      CURRENT_LANG = lang;
+    
+      document.querySelectorAll("[data-i18n]").forEach(el=>{
+        const key = el.dataset.i18n;
+        if(I18N[lang][key]){
+          el.textContent = I18N[lang][key];
+        }
+      });
+    
+      const dmBtn = document.querySelector(".dark-toggle");
+      if (dmBtn) {
+        dmBtn.textContent = document.body.classList.contains("dark")
+          ? I18N[lang].mode_dark
+          : I18N[lang].mode_light;
+      }
+    
+      const collapseBtn = document.querySelector(".collapse-toggle");
+        if (collapseBtn) {
+          const hidden = collapseBtn.dataset.state === "hidden";
+          collapseBtn.textContent = hidden
+            ? I18N[CURRENT_LANG].show_unchanged
+            : I18N[CURRENT_LANG].hide_unchanged;
+        }
+    }
+    
+    document.addEventListener("DOMContentLoaded", function () {
+      setLang(CURRENT_LANG);
+    });
+    </script>
+    """)
+
+    # body start
+    f.write("</head><body><div class='container'>")
+    f.write("""
+    <div style="margin-bottom:12px;font-size:1.1em; display:flex; justify-content:space-between; align-items:center;">
+      <a href="/docdiff/" style="text-decoration:none;color:var(--accent);">
+        ← <span data-i18n="back">Back to DocDiff</span>
+      </a>
+      <div>
+        <button class="chip lang-btn" data-lang="en">EN</button>
+        <button class="chip lang-btn" data-lang="pl">PL</button>
+      </div>
+    </div>
+    """)
+    f.write("<div class='header'><div>")
+    f.write("<h1 data-i18n='title'>Document Comparison Report</h1>")
+    f.write(f"<div class='small'><span data-i18n='total'>Total blocks</span>: {len(block_diffs)}</div>")
+    f.write("</div>")
+
+    # right side header: dark mode button
+    f.write("<div style='display:flex;align-items:center;gap:8px;'>")
+    f.write("<button class='chip dark-toggle'>Mode: light</button>")
+    f.write("</div></div>")  # header end
+
+    # AI summary card
+    if summary_html:
         safe_summary = html.escape(summary_html)
         f.write(f"""
-        <div class='card'>
-          <b data-i18n="ai_summary">AI Summary</b>:
-          <div class='small'>{safe_summary}</div>
-        </div>
-        """)
-
-        # controls (chips)
-        f.write("<div class='controls card'>")
-        for ch in ("added", "deleted", "changed", "unchanged"):
-            f.write(f"<span class='chip change' data-val='{ch}' data-i18n='{ch}'>{ch}</span>")
-        for t in stats["by_type"]:
-            f.write(f"<span class='chip type' data-val='{html.escape(t)}' data-i18n='{html.escape(t)}'>{html.escape(t)}</span>")
-        f.write("</div>")
-
-        # TOC sorted by AI score
-        f.write("""
-        <div class='toc card'>
-          <b data-i18n="toc">Most Significant Changes (TOC)</b>:
-        """)
-        for i in toc_items[:200]:
-            b = block_diffs[i]
-            name = html.escape(str(b.get("type") or "blk"))
-            aisc = b.get("_ai_sem_score")
-            score = b.get("_score", 0)
-            label = f"{aisc}/10" if aisc is not None else f"s={score}"
-            f.write(f"<a href='#blk{i}'>#{i}({name}) {label}</a>")
-        f.write("</div>")
-
-        # collapse toggle
-        f.write("<div style='margin-bottom:10px;'><button class='collapse-toggle chip' data-i18n='hide_unchanged'>Hide unchanged</button></div>")
-
-        # render blocks
-        for i, b in enumerate(block_diffs):
-            ch = html.escape(str(b.get("change", "unknown")))
-            typ = b.get("type") or b.get("new", {}).get("type") or b.get("old", {}).get("type") or "unknown"
-            typ = str(typ)
-            score = b.get("_score", 0)
-            score_cls = "low" if score < 3 else ("med" if score < 6 else "high")
-            # wrapper with attributes
-            f.write(f"<div id='blk{i}' class='card {html.escape(ch)}' data-change='{html.escape(ch)}' data-type='{html.escape(typ)}'>")
-            f.write("<div class='meta'>")
-            f.write(f"<span class='badge' data-i18n='{html.escape(typ)}>{html.escape(typ).upper()}</span>")
-            f.write(f"<span class='small'>change: {html.escape(str(b.get('change','')))}</span>")
-            f.write(f"<span class='score {score_cls}'>s={score}</span>")
-            f.write("</div>")  # meta end
-
-            # render by type
-            if typ == "paragraph":
-                _render_paragraph(f, b, html.escape(ch))
-            elif typ == "table":
-                _render_table(f, b, html.escape(ch))
-            elif typ == "image":
-                _render_image(f, b, html.escape(ch))
-            else:
-                f.write(f"<div class='small'><pre>{html.escape(str(b))}</pre></div>")
+    <div class='card'>
+      <b data-i18n="ai_summary">AI Summary</b>:
+      <div class='small'>{safe_summary}</div>
+    </div>
+    """)
+
+    # controls (chips)
+    f.write("<div class='controls card'>")
+    for ch in ("added", "deleted", "changed", "unchanged"):
+        f.write(f"<span class='chip change' data-val='{ch}' data-i18n='{ch}'>{ch}</span>")
+    for t in stats["by_type"]:
+        f.write(f"<span class='chip type' data-val='{html.escape(t)}' data-i18n='{html.escape(t)}'>{html.escape(t)}</span>")
+    f.write("</div>")
 
-            f.write("</div>")  # block wrapper
+    # TOC sorted by AI score
+    f.write("""
+    <div class='toc card'>
+      <b data-i18n="toc">Most Significant Changes (TOC)</b>:
+    """)
+    for i in toc_items[:200]:
+        b = block_diffs[i]
+        name = html.escape(str(b.get("type") or "blk"))
+        aisc = b.get("_ai_sem_score")
+        score = b.get("_score", 0)
+        label = f"{aisc}/10" if aisc is not None else f"s={score}"
+        f.write(f"<a href='#blk{i}'>#{i}({name}) {label}</a>")
+    f.write("</div>")
 
-        # footer / close
-        f.write("</div></body></html>")
+    # collapse toggle
+    f.write("<div style='margin-bottom:10px;'><button class='collapse-toggle chip' data-i18n='hide_unchanged'>Hide unchanged</button></div>")
+
+    yield f.take()
+
+    # render blocks
+    runs = dict(unchanged_runs(block_diffs, collapse_min_run)) if fragment_url else {}
+    i, rendered = 0, 0
+    while i < len(block_diffs):
+        if i in runs:
+            _render_collapsed_run(f, i, runs[i], fragment_url)
+            i = runs[i]
+        else:
+            _render_block(f, i, block_diffs[i])
+            i += 1
+        rendered += 1
+        if rendered % chunk_blocks == 0:
+            yield f.take()
+
+    # footer / close
+    f.write("</div></body></html>")
+    yield f.take()
+
+
+def generate_html_report(
+    block_diffs: List[Dict[str, Any]],
+    output_path: str = "report.html",
+    analysis_memo: Optional[AnalysisMemo] = None,
+    ai: bool = True,
+) -> None:
+    """
+    Writes the full HTML report to `output_path`. Analysis already stored in
+    a block (labels, semantic_score, change_type, confidence) is reused; other
+    changed blocks are analyzed through `analysis_memo`, once per distinct block.
+    """
+    with open(output_path, "w", encoding="utf-8") as f:
+        for chunk in iter_html_report(block_diffs, analysis_memo=analysis_memo, ai=ai):
+            f.write(chunk)
 
 
 # -------------------------
 # JSON export
 # -------------------------
-def generate_json_report(block_diffs: List[Dict[str, Any]], output_path: str = "report.json") -> None:
-    """Save the comparison report as JSON."""
+JSON_FORMATS = ("full", "compact")
+
+
+def generate_json_report(
+    block_diffs: List[Dict[str, Any]],
+    output_path: str = "report.json",
+    fmt: str = "full",
+    compression: Optional[str] = None,
+) -> None:
+    """
+    Save the comparison report as JSON.
+    "full" dumps every diff block; "compact" streams the minimal edit script
+    (see compact_report). `compression` is "gzip" or "zstd"; by default it
+    follows the .gz / .zst suffix of `output_path`.
+    """
+    if fmt not in JSON_FORMATS:
+        raise ValueError(f"Unknown JSON report format: {fmt}")
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
+        if fmt == "compact":
+            write_compact_report(block_diffs, output_path, compression)
+            return
+        with open_report(output_path, "w", compression) as f:
             json.dump(block_diffs, f, ensure_ascii=False, indent=2)
     except Exception:
         _LOGGER.exception("Error while writing JSON report")
@@ -0,0 +1,235 @@
+"""
+Section-aware diff for long documents.
+
+A flat alignment turns a chapter moved elsewhere into one long deletion
+and one long insertion. Here the blocks are split into sections at their
+headings (paragraphs styled "Title" or "Heading N"), the sections are
+aligned by heading fingerprint (the heading text without its numbering)
+and only the blocks of matched sections are diffed against each other,
+level by level down the heading hierarchy. A section found at another
+position in the new document is still matched; its entries are marked
+"moved". Sections left unmatched (e.g. a renamed heading) are diffed
+together with the other unmatched sections around them. The result
+follows the new document, so its entries carry their block indices
+(diff_engine.index_entries).
+
+The document thus splits into many small, independent flat diffs, which
+run one after another or, for large documents, in an executor.
+"""
+from collections import defaultdict, deque
+from concurrent.futures import BrokenExecutor, Executor
+from typing import Any, Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+import logging
+import re
+
+from .alignment import DEFAULT_ENGINE, align
+from .diff_engine import DEFAULT_GRANULARITY, DEFAULT_TABLE_MODE, compare_digested_blocks, index_entries
+
+_LOGGER = logging.getLogger(__name__)
+
+# Callers hand an executor to compare_sections from this many blocks (both documents) on
+PARALLEL_MIN_BLOCKS = 20000
+# Small sections are handed to the executor together, about this many blocks per task
+BATCH_BLOCKS = 2000
+
+_HEADING_STYLE = re.compile(r"^(?:heading|nag[łl][oó]wek)\s*(\d)$", re.IGNORECASE)
+_TITLE_STYLES = frozenset(("title", "tytuł"))
+# "1.", "1.2.3 ", "IV. ", "a) " and similar numbering in front of the heading text
+_NUMBERING = re.compile(r"^(?:(?:\d+|[ivxlc]+|[a-z])[.)]\s*)*(?:\d+\s+)?", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+# fingerprint of the blocks in front of the first heading
+_PREAMBLE = ("preamble",)
+
+Blocks = List[Dict[str, Any]]
+# (old block indices, new block indices, moved) of one flat diff
+Job = Tuple[List[int], List[int], bool]
+
+
+def heading_level(block: Dict[str, Any]) -> Optional[int]:
+    """0 for a title, N for "Heading N", None for anything else."""
+    if block.get("type") != "paragraph":
+        return None
+    style = (block.get("style") or "").strip()
+    if style.lower() in _TITLE_STYLES:
+        return 0
+    match = _HEADING_STYLE.match(style)
+    return int(match.group(1)) if match else None
+
+
+def heading_fingerprint(text: str) -> str:
+    """Heading text without leading numbering, case or spacing differences."""
+    text = _SPACES.sub(" ", text or "").strip()
+    return (_NUMBERING.sub("", text, count=1) or text).casefold()
+
+
+class _Tree:
+    """Heading levels and fingerprints of one document, computed once."""
+
+    def __init__(self, blocks: Blocks):
+        self.blocks = blocks
+        self.levels = [heading_level(b) for b in blocks]
+        self.fingerprints = {
+            i: heading_fingerprint(b.get("text") or "") for i, b in enumerate(blocks) if self.levels[i] is not None
+        }
+
+    def split(self, idx: Sequence[int], level: int) -> List[List[int]]:
+        """Preamble followed by one index list per heading of `level`."""
+        sections: List[List[int]] = [[]]
+        for i in idx:
+            if self.levels[i] == level:
+                sections.append([])
+            sections[-1].append(i)
+        return sections
+
+    def key(self, section: List[int], first: bool) -> Hashable:
+        return _PREAMBLE if first else self.fingerprints[section[0]]
+
+
+def _next_level(old: _Tree, new: _Tree, old_idx: Sequence[int], new_idx: Sequence[int], parent: int) -> Optional[int]:
+    levels = [
+        lvl for tree, idx in ((old, old_idx), (new, new_idx)) for lvl in (tree.levels[i] for i in idx)
+        if lvl is not None and lvl > parent
+    ]
+    return min(levels) if levels else None
+
+
+def _flatten(sections: Sequence[List[int]]) -> List[int]:
+    return [i for section in sections for i in section]
+
+
+def section_jobs(
+    old: _Tree,
+    new: _Tree,
+    old_idx: Sequence[int],
+    new_idx: Sequence[int],
+    engine: str = DEFAULT_ENGINE,
+    parent: int = -1,
+    moved: bool = False,
+) -> List[Job]:
+    """Flat diffs, in new document order, of the sections below heading level `parent`."""
+    level = _next_level(old, new, old_idx, new_idx, parent)
+    if level is None:
+        return [(list(old_idx), list(new_idx), moved)] if old_idx or new_idx else []
+
+    old_secs, new_secs = old.split(old_idx, level), new.split(new_idx, level)
+    old_keys = [old.key(s, k == 0) for k, s in enumerate(old_secs)]
+    new_keys = [new.key(s, k == 0) for k, s in enumerate(new_secs)]
+    opcodes = align(old_keys, new_keys, engine)
+
+    # sections outside the alignment are matched by fingerprint wherever they are
+    unmatched: Dict[Hashable, Deque[int]] = defaultdict(deque)
+    for tag, i1, i2, _, _ in opcodes:
+        if tag != "equal":
+            for k in range(i1, i2):
+                unmatched[old_keys[k]].append(k)
+    moves: Dict[int, int] = {}
+    for tag, _, _, j1, j2 in opcodes:
+        if tag != "equal":
+            for k in range(j1, j2):
+                if unmatched[new_keys[k]]:
+                    moves[k] = unmatched[new_keys[k]].popleft()
+    moved_away = set(moves.values())
+
+    jobs: List[Job] = []
+
+    def pair(i: int, j: int, is_moved: bool) -> None:
+        jobs.extend(section_jobs(old, new, old_secs[i], new_secs[j], engine, level, is_moved))
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                pair(i, j, moved)
+            continue
+        rest = [old_secs[i] for i in range(i1, i2) if i not in moved_away]
+        pending: List[List[int]] = []
+        for j in range(j1, j2):
+            if j not in moves:
+                pending.append(new_secs[j])
+                continue
+            if rest or pending:
+                jobs.append((_flatten(rest), _flatten(pending), moved))
+                rest, pending = [], []
+            pair(moves[j], j, True)
+        if rest or pending:
+            jobs.append((_flatten(rest), _flatten(pending), moved))
+    return jobs
+
+
+def pool_for(old_blocks: Blocks, new_blocks: Blocks, min_blocks: int = PARALLEL_MIN_BLOCKS) -> Optional[Executor]:
+    """The shared worker pool (parallel_extract) for documents of at least `min_blocks` blocks, else None."""
+    from .parallel_extract import POOL_WORKERS, get_pool
+
+    if POOL_WORKERS < 2 or len(old_blocks) + len(new_blocks) < min_blocks:
+        return None
+    return get_pool()
+
+
+def _compare_batch(
+    batch: List[Tuple[Blocks, Blocks, List[bytes], List[bytes]]],
+    engine: str,
+    granularity: str,
+    table_mode: str,
+) -> List[Blocks]:
+    return [compare_digested_blocks(o, n, ok, nk, engine, granularity, table_mode) for o, n, ok, nk in batch]
+
+
+def _batches(payloads: List[Tuple[Blocks, Blocks, List[bytes], List[bytes]]], size: int):
+    batch: List[Tuple[Blocks, Blocks, List[bytes], List[bytes]]] = []
+    blocks = 0
+    for payload in payloads:
+        batch.append(payload)
+        blocks += len(payload[0]) + len(payload[1])
+        if blocks >= size:
+            yield batch
+            batch, blocks = [], 0
+    if batch:
+        yield batch
+
+
+def compare_sections(
+    old_blocks: Blocks,
+    new_blocks: Blocks,
+    old_digests: Sequence[bytes],
+    new_digests: Sequence[bytes],
+    engine: str = DEFAULT_ENGINE,
+    granularity: str = DEFAULT_GRANULARITY,
+    table_mode: str = DEFAULT_TABLE_MODE,
+    executor: Optional[Executor] = None,
+) -> Blocks:
+    """
+    compare_blocks() result for blocks of one scope, diffed section by section.
+    With an `executor` (thread or process pool) the section diffs run in it,
+    batched to about BATCH_BLOCKS blocks per task.
+    """
+    old, new = _Tree(old_blocks), _Tree(new_blocks)
+    jobs = section_jobs(old, new, range(len(old_blocks)), range(len(new_blocks)), engine)
+    payloads = [
+        ([old_blocks[i] for i in oi], [new_blocks[j] for j in ni], [old_digests[i] for i in oi], [new_digests[j] for j in ni])
+        for oi, ni, _ in jobs
+    ]
+
+    entries: Optional[List[Blocks]] = None
+    if executor is not None and len(jobs) > 1:
+        try:
+            futures = [
+                executor.submit(_compare_batch, batch, engine, granularity, table_mode)
+                for batch in _batches(payloads, BATCH_BLOCKS)
+            ]
+            entries = [part for future in futures for part in future.result()]
+        except BrokenExecutor:
+            # a worker died (e.g. out of memory); the sections are diffed here instead
+            _LOGGER.warning("DocDiff section diff executor broken, diffing inline", exc_info=True)
+    if entries is None:
+        entries = _compare_batch(payloads, engine, granularity, table_mode)
+
+    if len(jobs) == 1:
+        # one flat diff of both documents, already in document order
+        return entries[0]
+    result: Blocks = []
+    for (oi, ni, moved), part in zip(jobs, entries):
+        if moved:
+            for entry in part:
+                entry["moved"] = True
+        result.extend(index_entries(part, oi, ni))
+    return result
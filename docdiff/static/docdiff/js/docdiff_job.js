@@ -0,0 +1,40 @@
+document.addEventListener("DOMContentLoaded", () => {
+  const box = document.getElementById("docdiff-job");
+  if (!box) return;
+
+  const bar = document.getElementById("docdiff-job-bar");
+  const stage = document.getElementById("docdiff-job-stage");
+  const stopped = document.getElementById("docdiff-job-stopped");
+  // the server fails jobs past their timeout; polling stops shortly after
+  const deadline = Date.now() + Number(box.dataset.maxWaitSeconds || 1860) * 1000;
+
+  const next = (delay) => {
+    if (Date.now() + delay > deadline) {
+      stopped.classList.remove("d-none");
+      return;
+    }
+    setTimeout(poll, delay);
+  };
+
+  const poll = () => {
+    fetch(box.dataset.statusUrl, { headers: { Accept: "application/json" } })
+      .then((r) => r.json())
+      .then((job) => {
+        bar.style.width = `${job.progress}%`;
+        bar.textContent = `${job.progress}%`;
+        stage.textContent = job.stage || job.status;
+
+        if (job.status === "done") {
+          window.location.href = job.result_url;
+        } else if (job.status === "failed") {
+          // the job page renders the upload form with the error code
+          window.location.reload();
+        } else {
+          next(1000);
+        }
+      })
+      .catch(() => next(3000));
+  };
+
+  poll();
+});
@@ -0,0 +1,180 @@
+import pytest
+import docdiff.alignment as alignment
+from docdiff.alignment import (
+    align,
+    block_digest,
+    row_digest,
+    myers_matching_blocks,
+    patience_matching_blocks,
+    opcodes_from_matching_blocks,
+)
+from docdiff.diff_engine import compare_blocks
+
+
+def _apply(a, b, opcodes):
+    """Rebuild `b` from `a` using opcodes (verifies opcode consistency)."""
+    out = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+    return out
+
+
+# ================================================================
+# Tests for digests
+# ================================================================
+
+@pytest.mark.unit
+def test_block_digest_fixed_size_and_stable():
+    """Digest has a fixed size and depends only on block content."""
+    d1 = block_digest({"type": "paragraph", "text": "x" * 10000})
+    d2 = block_digest({"type": "paragraph", "text": "x" * 10000, "bold": True})
+    assert len(d1) == 16
+    assert d1 == d2
+
+
+@pytest.mark.unit
+def test_block_digest_distinguishes_types_and_sheets():
+    """Same text in different block types or sheets gives different digests."""
+    para = block_digest({"type": "paragraph", "text": "A"})
+    table = block_digest({"type": "table", "table": [["A"]]})
+    sheet1 = block_digest({"type": "table", "table": [["A"]], "sheet": "S1"})
+    sheet2 = block_digest({"type": "table", "table": [["A"]], "sheet": "S2"})
+    assert len({para, table, sheet1, sheet2}) == 4
+
+
+@pytest.mark.unit
+def test_block_digest_table_cell_boundaries():
+    """Cell boundaries are part of the digest ('ab','c' != 'a','bc')."""
+    t1 = block_digest({"type": "table", "table": [["ab", "c"]]})
+    t2 = block_digest({"type": "table", "table": [["a", "bc"]]})
+    assert t1 != t2
+    assert row_digest(["ab", "c"]) != row_digest(["a", "bc"])
+
+
+# ================================================================
+# Tests for alignment engines
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.parametrize("engine", ["myers", "patience", "difflib"])
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ([], []),
+        ([1, 2, 3], []),
+        ([], [1, 2]),
+        ([1, 2, 3], [1, 2, 3]),
+        ([1, 2, 3, 4], [1, 3, 5, 4]),
+        (list("ABCABBA"), list("CBABAC")),
+    ],
+)
+def test_align_opcodes_rebuild_target(engine, a, b):
+    """Opcodes from every engine must transform `a` into `b`."""
+    assert _apply(a, b, align(a, b, engine)) == b
+
+
+@pytest.mark.unit
+def test_myers_finds_minimal_edit():
+    """Myers returns a longest common subsequence (classic example: LCS=4)."""
+    blocks = myers_matching_blocks(list("ABCABBA"), list("CBABAC"))
+    assert sum(size for _, _, size in blocks) == 4
+
+
+@pytest.mark.unit
+def test_myers_gives_up_above_max_cost():
+    """Myers returns None when the edit distance exceeds max_cost."""
+    assert myers_matching_blocks([1, 2, 3], [4, 5, 6], max_cost=2) is None
+
+
+@pytest.mark.unit
+def test_align_falls_back_when_myers_gives_up(monkeypatch):
+    """align() falls back to SequenceMatcher when the engine returns None."""
+    monkeypatch.setitem(alignment.ALIGNMENT_ENGINES, "myers", lambda a, b: None)
+    assert _apply([1, 2], [2, 3], align([1, 2], [2, 3], "myers")) == [2, 3]
+
+
+@pytest.mark.unit
+def test_patience_anchors_on_unique_lines():
+    """Patience keeps unique lines matched even around repeated ones."""
+    a = ["}", "f", "}", "g", "}"]
+    b = ["}", "g", "}", "f", "}"]
+    blocks = patience_matching_blocks(a, b)
+    assert _apply(a, b, opcodes_from_matching_blocks(blocks, len(a), len(b))) == b
+
+
+@pytest.mark.unit
+def test_align_unknown_engine():
+    """Unknown engine names raise ValueError."""
+    with pytest.raises(ValueError):
+        align([1], [1], "nope")
+
+
+@pytest.mark.unit
+def test_opcodes_merge_delete_and_insert_into_replace():
+    """A gap on both sides between matches becomes a single 'replace'."""
+    ops = opcodes_from_matching_blocks([(0, 0, 1), (3, 2, 1)], 4, 3)
+    assert ops == [
+        ("equal", 0, 1, 0, 1),
+        ("replace", 1, 3, 1, 2),
+        ("equal", 3, 4, 2, 3),
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("a,b,expected", [
+    ("abcXdef", "abcYdef", (3, 3)),
+    ("aaa", "aa", (2, 0)),
+    ("abc", "abc", (3, 0)),
+    ("xab", "yab", (0, 2)),
+])
+def test_common_affixes(a, b, expected):
+    """Prefix and suffix never overlap."""
+    assert alignment.common_affixes(a, b) == expected
+
+
+@pytest.mark.unit
+def test_align_sends_only_the_middle_window_to_the_engine(monkeypatch):
+    """The common prefix and suffix are matched without the alignment engine."""
+    seen = []
+
+    def engine(a, b):
+        seen.append((list(a), list(b)))
+        return alignment.myers_matching_blocks(a, b)
+
+    monkeypatch.setitem(alignment.ALIGNMENT_ENGINES, "myers", engine)
+    a = list(range(1000))
+    b = a[:500] + ["x", "y"] + a[501:]
+
+    ops = align(a, b)
+
+    assert seen == [([500], ["x", "y"])]
+    assert _apply(a, b, ops) == b
+    assert ops == [("equal", 0, 500, 0, 500), ("replace", 500, 501, 500, 502), ("equal", 501, 1000, 502, 1001)]
+
+
+# ================================================================
+# compare_blocks with selectable engines
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.parametrize("engine", ["myers", "patience", "difflib"])
+def test_compare_blocks_engines_agree_on_simple_edit(engine):
+    """All engines report the same result for a single changed paragraph."""
+    old = [{"type": "paragraph", "text": t} for t in ("A", "B", "C")]
+    new = [{"type": "paragraph", "text": t} for t in ("A", "B2", "C")]
+    result = compare_blocks(old, new, engine=engine)
+    assert [r["change"] for r in result] == ["unchanged", "changed", "unchanged"]
+
+
+@pytest.mark.unit
+def test_compare_blocks_identical_documents_skip_alignment(monkeypatch):
+    """Matching digest sequences return all blocks unchanged without aligning."""
+    import docdiff.diff_engine as de
+    monkeypatch.setattr(de, "align", lambda *a, **k: pytest.fail("aligned identical documents"))
+    blocks = [{"type": "paragraph", "text": t} for t in ("A", "B")]
+    result = compare_blocks(blocks, [dict(b) for b in blocks])
+    assert result == [{"change": "unchanged", **b} for b in blocks]
@@ -0,0 +1,130 @@
+import json
+import pytest
+import sys
+
+from docdiff import batch, main
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    old_dir, new_dir = tmp_path / "old", tmp_path / "new"
+    old_dir.mkdir()
+    new_dir.mkdir()
+    (old_dir / "a.txt").write_text("one\ntwo")
+    (new_dir / "a.txt").write_text("one\nthree")
+    (old_dir / "b.txt").write_text("same")
+    (new_dir / "b.txt").write_text("same")
+    (old_dir / "only_old.txt").write_text("x")
+    (old_dir / "notes.pdf").write_text("ignored")
+    return old_dir, new_dir
+
+
+# ================================================================
+# Pair sources
+# ================================================================
+
+@pytest.mark.unit
+def test_load_manifest_csv_and_jsonl(tmp_path):
+    """CSV and JSONL manifests give the same pairs, relative to the manifest."""
+    (tmp_path / "m.csv").write_text("old,new,name\nv1/a.docx,v2/a.docx,contract\nv1/b.txt,v2/b.txt,\n")
+    (tmp_path / "m.jsonl").write_text(
+        json.dumps({"old": "v1/a.docx", "new": "v2/a.docx", "name": "contract"}) + "\n"
+        + json.dumps({"old": "v1/b.txt", "new": "v2/b.txt"}) + "\n"
+    )
+    for manifest in ("m.csv", "m.jsonl"):
+        pairs = batch.load_manifest(tmp_path / manifest)
+        assert [p.name for p in pairs] == ["contract", "0001_b.txt"]
+        assert pairs[0].old == tmp_path / "v1" / "a.docx"
+
+
+@pytest.mark.unit
+def test_load_manifest_rejects_incomplete_rows(tmp_path):
+    (tmp_path / "m.csv").write_text("old,new\na.txt,\n")
+    with pytest.raises(ValueError):
+        batch.load_manifest(tmp_path / "m.csv")
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("names", [("a", "a"), ("a", "x/a"), ("index",)])
+def test_load_manifest_rejects_clashing_names(tmp_path, names):
+    """Two pairs (or a pair and index.json) never write the same report."""
+    (tmp_path / "m.csv").write_text("old,new,name\n" + "".join(f"a.txt,b.txt,{n}\n" for n in names))
+    with pytest.raises(ValueError):
+        batch.load_manifest(tmp_path / "m.csv")
+
+
+@pytest.mark.unit
+def test_pairs_from_dirs_matches_by_name(dirs):
+    """Supported files are matched by name; one-sided files are kept."""
+    pairs = batch.pairs_from_dirs(*dirs)
+    assert [p.name for p in pairs] == ["a.txt", "b.txt", "only_old.txt"]
+
+
+# ================================================================
+# Execution
+# ================================================================
+
+@pytest.mark.unit
+def test_batch_cli_writes_reports_and_index(dirs, tmp_path, monkeypatch):
+    """--batch over directories writes a report per pair and per-pair exit codes."""
+    out = tmp_path / "out"
+    monkeypatch.setattr(sys, "argv", ["prog", "--batch", str(dirs[0]), str(dirs[1]),
+                                      "--out-dir", str(out), "--workers", "1"])
+
+    code = main.main()
+
+    assert code == main.ExitCode.BATCH_ERROR
+    index = json.loads((out / "index.json").read_text(encoding="utf-8"))
+    assert index["total"] == 3 and index["failed"] == 1
+    status = {p["name"]: p["status"] for p in index["pairs"]}
+    assert status == {"a.txt": "OK", "b.txt": "OK", "only_old.txt": "NEW_NOT_FOUND"}
+    assert (out / "a.txt.html").exists() and (out / "a.txt.json").exists()
+
+
+@pytest.mark.unit
+def test_batch_cli_forwards_pair_options(dirs, tmp_path, monkeypatch):
+    """CLI options of a single comparison apply to every pair of the batch."""
+    calls = []
+
+    def fake_compare_pair(old, new, output, json_output, **kwargs):
+        calls.append(kwargs)
+        return main.ExitCode.OK
+
+    monkeypatch.setattr(batch, "compare_pair", fake_compare_pair)
+    monkeypatch.setattr(sys, "argv", ["prog", "--batch", str(dirs[0]), str(dirs[1]),
+                                      "--out-dir", str(tmp_path / "out"), "--workers", "1",
+                                      "--diff-mode", "sections", "--docx-mode", "stream",
+                                      "--xlsx-chunk-rows", "500", "--context", "7"])
+
+    assert main.main() == main.ExitCode.OK
+    assert len(calls) == 3
+    assert all(kwargs["diff_mode"] == "sections" for kwargs in calls)
+    assert all(kwargs["docx_mode"] == "stream" for kwargs in calls)
+    assert all(kwargs["xlsx_chunk_rows"] == 500 for kwargs in calls)
+    assert all(kwargs["context"] == 7 for kwargs in calls)
+
+
+@pytest.mark.unit
+def test_batch_cli_writes_compressed_compact_json(dirs, tmp_path, monkeypatch):
+    """--json-format and --json-compression apply to the JSON report of each pair."""
+    from docdiff.compact_report import open_report
+
+    out = tmp_path / "out"
+    monkeypatch.setattr(sys, "argv", ["prog", "--batch", str(dirs[0]), str(dirs[1]),
+                                      "--out-dir", str(out), "--workers", "1",
+                                      "--json-format", "compact", "--json-compression", "gzip"])
+
+    main.main()
+
+    index = json.loads((out / "index.json").read_text(encoding="utf-8"))
+    assert index["pairs"][0]["json"] == str(out / "a.txt.json.gz")
+    with open_report(out / "a.txt.json.gz") as f:
+        assert json.loads(f.readline())["format"] == "docdiff-compact"
+
+
+@pytest.mark.unit
+def test_parse_args_requires_new_outside_batch(monkeypatch):
+    """Without --batch both files are still required."""
+    monkeypatch.setattr(sys, "argv", ["prog", "old.docx"])
+    with pytest.raises(SystemExit):
+        main.parse_args()
@@ -0,0 +1,123 @@
+import pytest
+
+from docdiff.benchmarks import corpus, pipeline_stages
+
+
+# ================================================================
+# Synthetic corpus
+# ================================================================
+
+@pytest.mark.unit
+def test_make_texts_is_deterministic_and_edits_about_the_rate():
+    """The same seed gives the same pair; unchanged texts keep their order."""
+    old, new = corpus.make_texts(200, 0.1, seed=3)
+    assert (old, new) == corpus.make_texts(200, 0.1, seed=3)
+    kept = [t for t in new if t in set(old)]
+    assert 200 - 20 <= len(kept) < 200
+    assert kept == [t for t in old if t in set(kept)]
+
+
+@pytest.mark.unit
+def test_clustered_edits_stay_in_one_section():
+    """Clustered edits leave a common prefix and suffix."""
+    old, new = corpus.make_texts(100, 0.05, seed=1, clustered=True)
+    prefix = next(i for i, (a, b) in enumerate(zip(old, new)) if a != b)
+    suffix = next(i for i, (a, b) in enumerate(zip(reversed(old), reversed(new))) if a != b)
+    assert 100 - prefix - suffix <= 5
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("fmt", corpus.FORMATS)
+def test_make_pair_writes_both_files(tmp_path, fmt):
+    old, new = corpus.make_pair(corpus.CorpusSpec(fmt, 20, 0.2), tmp_path)
+    assert old.suffix == new.suffix == f".{fmt}"
+    assert old.stat().st_size and new.stat().st_size
+
+
+# ================================================================
+# Stage timing
+# ================================================================
+
+@pytest.mark.unit
+def test_run_pair_reports_every_stage(tmp_path, monkeypatch):
+    """Every stage gets wall time and memory figures; allocation peaks with tracing."""
+    import docdiff.heuristics_ai as ai
+    monkeypatch.setattr(ai, "get_nlp", lambda: None)
+    old, new = corpus.make_pair(corpus.CorpusSpec("txt", 50, 0.2), tmp_path)
+
+    result = pipeline_stages.run_pair(old, new, trace_alloc=True)
+
+    assert set(result["stages"]) == set(pipeline_stages.STAGES)
+    assert result["changed"] >= 1 and result["report_bytes"] > 0
+    assert all(s["seconds"] >= 0 and s["alloc_peak_mb"] is not None for s in result["stages"].values())
+
+
+@pytest.mark.unit
+def test_run_pair_uses_the_job_settings(tmp_path, monkeypatch, settings):
+    """Extraction and diff run as in a job: docx mode and diff mode come from the settings."""
+    import docdiff.heuristics_ai as ai
+    import docdiff.pipeline as pipeline
+    monkeypatch.setattr(ai, "get_nlp", lambda: None)
+    settings.DOCDIFF_DOCX_MODE = "structure"
+    settings.DOCDIFF_DIFF_MODE = "sections"
+    calls = []
+    compare = pipeline.compare_blocks
+    monkeypatch.setattr(pipeline, "compare_blocks", lambda *a, **k: calls.append((a, k)) or compare(*a, **k))
+    old, new = corpus.make_pair(corpus.CorpusSpec("docx", 20, 0.2), tmp_path)
+
+    pipeline_stages.run_pair(old, new, ai=False)
+
+    (old_blocks, _), options = calls[0]
+    assert options["sections"] is True
+    assert all("scope" in b for b in old_blocks)  # structure extraction
+    env = pipeline_stages.environment(ai=False)
+    assert env["settings"]["DOCDIFF_DIFF_MODE"] == "sections"
+    assert "spacy_model" not in env
+
+
+@pytest.mark.unit
+def test_suggest_limits_from_results():
+    """Limits come from pairs within the budget and the slowest total time per changed block."""
+    def result(mb, total, changed):
+        return {"old_bytes": mb * 2 ** 20, "new_bytes": mb * 2 ** 20, "total_seconds": total, "changed": changed}
+
+    limits = pipeline_stages.suggest_limits([result(1, 2, 100), result(4, 20, 400)], budget_seconds=10)
+    assert limits["DOCDIFF_MAX_FILE_SIZE_MB"] == 1
+    assert limits["DOCDIFF_MAX_CHANGED_BLOCKS"] == 200
+
+    # the setting is a whole number of MB, never above the measured size
+    limits = pipeline_stages.suggest_limits([result(2.7, 5, 0)], budget_seconds=10)
+    assert limits["DOCDIFF_MAX_FILE_SIZE_MB"] == 2
+    assert limits["DOCDIFF_MAX_CHANGED_BLOCKS"] is None
+    assert pipeline_stages.suggest_limits([result(0.5, 5, 0)], budget_seconds=10)["DOCDIFF_MAX_FILE_SIZE_MB"] is None
+
+
+# ================================================================
+# Configurable limits
+# ================================================================
+
+@pytest.mark.unit
+def test_upload_size_limit_follows_settings(settings):
+    """DOCDIFF_MAX_FILE_SIZE_MB replaces the built-in upload limit."""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from docdiff import views
+
+    settings.DOCDIFF_MAX_FILE_SIZE_MB = 1
+    upload = SimpleUploadedFile("a.txt", b"x" * (2 * 1024 * 1024), content_type="text/plain")
+    with pytest.raises(ValueError, match="file_too_large"):
+        views.validate_upload(upload)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_changed_block_limit_follows_settings(tmp_path, settings, monkeypatch):
+    """DOCDIFF_MAX_CHANGED_BLOCKS caps the changes sent to analysis."""
+    import docdiff.heuristics_ai as ai
+    from docdiff.pipeline import PipelineError, run_pipeline
+
+    monkeypatch.setattr(ai, "get_nlp", lambda: None)
+    settings.DOCDIFF_MAX_CHANGED_BLOCKS = 1
+    (tmp_path / "a.txt").write_text("one\ntwo\nthree")
+    (tmp_path / "b.txt").write_text("one!\ntwo!\nthree")
+    with pytest.raises(PipelineError, match="too_many_changes"):
+        run_pipeline(tmp_path / "a.txt", tmp_path / "b.txt")
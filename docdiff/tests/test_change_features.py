@@ -0,0 +1,76 @@
+import pytest
+
+import docdiff.change_features as cf
+import docdiff.heuristics_ai as ai
+from docdiff.report_builder import compute_stats_and_scores
+
+
+@pytest.fixture
+def ratio_calls(monkeypatch):
+    """Counts SequenceMatcher comparisons made for change features."""
+    calls = []
+    original = cf.SequenceMatcher
+
+    def counting(*args, **kwargs):
+        calls.append(args[1:])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(cf, "SequenceMatcher", counting)
+    return calls
+
+
+# ================================================================
+# change_features
+# ================================================================
+
+@pytest.mark.unit
+def test_change_features_values():
+    """Ratio, word counts and pattern hits of one pair."""
+    f = cf.change_features("Art.5 waga 10 kg", "Art.5 waga 12 kg w 2024")
+    assert 0 < f["ratio"] < 1
+    assert (f["old_words"], f["new_words"]) == (4, 6)
+    assert f["labels"] == ["unit", "numbers"]
+    assert f["legal_ref"] and f["digit"] and f["unit"] and f["year"]
+
+    plain = cf.change_features("Ala ma kota", "Ala ma psa")
+    assert plain["labels"] == []
+    assert not (plain["legal_ref"] or plain["digit"] or plain["unit"] or plain["year"])
+
+
+@pytest.mark.unit
+def test_block_features_are_stored_in_block(ratio_calls):
+    """The second lookup reuses the features kept in the block."""
+    block = {"old": {"text": "a"}, "new": {"text": "b"}}
+    assert cf.block_features(block) is cf.block_features(block) is block[cf.FEATURES_KEY]
+    assert len(ratio_calls) == 1
+
+
+@pytest.mark.unit
+def test_classify_change_type_uses_given_features(ratio_calls):
+    """classify_change_type does not compare the texts again when features are passed."""
+    features = cf.change_features("ust.2", "ust.3")
+    assert ai.classify_change_type("ust.2", "ust.3", [], features) == "technical"
+    assert len(ratio_calls) == 1
+
+
+# ================================================================
+# Sharing with the report scoring
+# ================================================================
+
+@pytest.mark.unit
+def test_analysis_and_scoring_compare_each_pair_once(monkeypatch, ratio_calls):
+    """analyze_change and compute_stats_and_scores share one comparison per block."""
+    monkeypatch.setattr(ai, "get_nlp", lambda: None)
+    blocks = [
+        {"change": "changed", "old": {"type": "paragraph", "text": f"stara {i}"},
+         "new": {"type": "paragraph", "text": f"nowa {i} kg"}}
+        for i in range(3)
+    ]
+
+    for b in blocks:
+        b.update(ai.analyze_change(b))
+    stats = compute_stats_and_scores(blocks)
+
+    assert len(ratio_calls) == 3
+    assert stats["changed"] == 3
+    assert all(b["_score"] > 1.6 for b in blocks)
@@ -0,0 +1,164 @@
+import gzip
+import json
+import sys
+
+import pytest
+
+from docdiff import main
+from docdiff import compact_report as cr
+from docdiff.diff_engine import apply_text_edits, compare_blocks, text_edits
+from docdiff.report_builder import generate_json_report
+
+
+def _p(text, **attrs):
+    return {"type": "paragraph", "text": text, **attrs}
+
+
+OLD = [_p("Title"), _p("Ala ma kota."), _p("gone 1"), _p("gone 2"), _p("Stays"),
+       {"type": "table", "table": [["a", "b"]]}, _p("Tail", bold=True)]
+NEW = [_p("Title"), _p("Ala ma dwa koty."), _p("Stays"), _p("new 1"), _p("new 2"),
+       {"type": "table", "table": [["a", "c"]]}, _p("Tail end", bold=False, style="H1")]
+
+
+# ================================================================
+# Text edit scripts
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.parametrize("a,b", [
+    ("Ala ma kota.", "Ala ma dwa koty."),
+    ("", "nowy"),
+    ("stary", ""),
+    ("Zażółć gęślą jaźń", "Zażółć gęślą jaźń!"),
+])
+def test_text_edits_roundtrip(a, b):
+    """Applying the edit script to the old text gives the new text."""
+    assert apply_text_edits(a, text_edits(a, b)) == b
+
+
+@pytest.mark.unit
+def test_text_edits_keep_unchanged_text_as_lengths():
+    """Unchanged and deleted spans are stored as character counts only."""
+    assert text_edits("Ala ma kota.", "Ala ma psa.") == [7, -4, "psa", 1]
+
+
+# ================================================================
+# Ops and round trip
+# ================================================================
+
+@pytest.mark.unit
+def test_compact_ops_rebuild_new_document():
+    """The ops applied to the old blocks reproduce the new blocks."""
+    ops = list(cr.iter_compact_ops(compare_blocks(OLD, NEW)))
+    assert ops[0] == ["=", 0, 0, 1]
+    assert cr.apply_compact_ops(OLD, ops) == NEW
+
+
+@pytest.mark.unit
+def test_compact_report_file_roundtrip(tmp_path):
+    """A written report reads back op by op; AI fields are kept under 'ai'."""
+    diffs = compare_blocks(OLD, NEW)
+    diffs[1].update({"labels": ["numbers"], "semantic_score": 1.5, "change_type": "formal", "confidence": 0.9, "_score": 2.0})
+    path = tmp_path / "r.jsonl"
+
+    generate_json_report(diffs, str(path), fmt="compact")
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert json.loads(lines[0]) == {"format": "docdiff-compact", "version": 2}
+    ops = list(cr.read_compact_report(path))
+    assert ops[1][0] == "~" and ops[1][3]["ai"]["change_type"] == "formal"
+    assert cr.apply_compact_ops(OLD, ops) == NEW
+
+
+@pytest.mark.unit
+def test_compact_ops_rebuild_document_with_moved_chapter():
+    """Section diffs follow the new document; ops use the entries' own block indices."""
+    h = {"style": "Heading 1"}
+    old = [_p("Intro", **h), _p("a1"), _p("a2"), _p("Body", **h), _p("b1"), _p("b2"),
+           _p("End", **h), _p("c1"), _p("c2 x")]
+    new = [_p("End", **h), _p("c1"), _p("c2 y"), _p("Intro", **h), _p("a1"), _p("a2"),
+           _p("Body", **h), _p("b1"), _p("b2")]
+
+    ops = list(cr.iter_compact_ops(compare_blocks(old, new, sections=True)))
+
+    assert ops[:2] == [[">", 6, 0, 2], ["~", 8, 2, ops[1][3]]]
+    assert cr.apply_compact_ops(old, ops) == new
+
+
+@pytest.mark.unit
+def test_compact_ops_rebuild_added_block_of_moved_section():
+    """Added blocks are stored without the diff and analysis fields of their entry."""
+    h = {"style": "Heading 1"}
+    old = [_p("B", **h), _p("A", **h)]
+    new = [_p("A", **h), _p("B", **h), _p("q")]
+    diffs = compare_blocks(old, new, sections=True)
+    for entry in diffs:
+        if entry["change"] == "added":
+            entry.update({"labels": ["new"], "change_type": "substantive", "confidence": 0.5})
+
+    assert cr.apply_compact_ops(old, cr.iter_compact_ops(diffs)) == new
+
+
+@pytest.mark.unit
+def test_compact_ops_rebuild_scoped_document():
+    """Blocks aligned scope by scope keep their indices in the documents."""
+    old = [_p("Draft", scope="header"), _p("one", scope="body"), _p("two", scope="body")]
+    new = [_p("one", scope="body"), _p("two!", scope="body"), _p("Final", scope="header")]
+
+    assert cr.apply_compact_ops(old, cr.iter_compact_ops(compare_blocks(old, new))) == new
+
+
+@pytest.mark.unit
+def test_compact_report_is_smaller_than_full(tmp_path):
+    """Unchanged blocks cost one op instead of their full text."""
+    old = [_p(f"Paragraph {i} " + "lorem ipsum " * 20) for i in range(200)]
+    new = list(old)
+    new[100] = _p(old[100]["text"] + " extra")
+    diffs = compare_blocks(old, new)
+
+    generate_json_report(diffs, str(tmp_path / "full.json"))
+    generate_json_report(diffs, str(tmp_path / "compact.jsonl"), fmt="compact")
+
+    assert (tmp_path / "compact.jsonl").stat().st_size * 50 < (tmp_path / "full.json").stat().st_size
+
+
+@pytest.mark.unit
+def test_gzip_chosen_by_suffix_and_detected_on_read(tmp_path):
+    """A .gz path is written gzip-compressed and read back transparently."""
+    path = tmp_path / "r.jsonl.gz"
+    generate_json_report(compare_blocks(OLD, NEW), str(path), fmt="compact")
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert json.loads(f.readline())["format"] == "docdiff-compact"
+    assert cr.apply_compact_ops(OLD, cr.read_compact_report(path)) == NEW
+
+
+@pytest.mark.unit
+def test_zstd_requires_optional_package(tmp_path, monkeypatch):
+    """zstd output fails clearly when 'zstandard' is not installed."""
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        cr.write_compact_report([], tmp_path / "r.zst")
+
+
+@pytest.mark.unit
+def test_unknown_json_format_rejected(tmp_path):
+    """Only the known JSON layouts are accepted."""
+    with pytest.raises(ValueError):
+        generate_json_report([], str(tmp_path / "r.json"), fmt="xml")
+
+
+# ================================================================
+# CLI
+# ================================================================
+
+@pytest.mark.unit
+def test_cli_json_format_flags(monkeypatch):
+    """--json-format and --json-compression are parsed (full / suffix-based by default)."""
+    monkeypatch.setattr(sys, "argv", ["prog", "a.txt", "b.txt", "--json", "r.jsonl.gz"])
+    args = main.parse_args()
+    assert (args.json_format, args.json_compression) == ("full", None)
+
+    monkeypatch.setattr(sys, "argv", ["prog", "a.txt", "b.txt", "--json-format", "compact", "--json-compression", "gzip"])
+    args = main.parse_args()
+    assert (args.json_format, args.json_compression) == ("compact", "gzip")
@@ -4,6 +4,7 @@ from docdiff.diff_engine import (
     html_inline_diff,
     _table_cell_diff,
     _diff_tables,
+    _diff_tables_aligned,
     compare_blocks,
 )
 
@@ -41,6 +42,46 @@ def test_html_inline_diff_replace():
     assert "<del>" in result and "<ins>" in result
 
 
+@pytest.mark.unit
+def test_html_inline_diff_word_granularity_marks_whole_words():
+    """Word mode wraps whole replaced words instead of character fragments."""
+    result = html_inline_diff(
+        "payment within thirty calendar days", "payment within sixty business days", granularity="word"
+    )
+    assert result.startswith("payment within ")
+    assert "<del>thirty</del><ins>sixty</ins> <del>calendar</del><ins>business</ins>" in result
+
+
+@pytest.mark.unit
+def test_html_inline_diff_word_granularity_refines_short_spans():
+    """Short, similar replaced spans fall back to char-level diff."""
+    result = html_inline_diff("we recieve 10 kg", "we receive 12 kg", granularity="word")
+    assert result.startswith("we rec<ins>e</ins>i<del>e</del>ve ")
+    assert result.endswith("<del>10</del><ins>12</ins> kg")
+
+
+@pytest.mark.unit
+def test_html_inline_diff_sentence_granularity():
+    """Sentence mode keeps unchanged sentences intact and refines changed ones."""
+    result = html_inline_diff("First one. Second one.", "First one. Second two.", granularity="sentence")
+    assert result.startswith("First one. Second ")
+    assert "<ins>" in result and "<del>" in result
+
+
+@pytest.mark.unit
+def test_html_inline_diff_escapes_tokens():
+    """Token-level output is HTML-escaped."""
+    result = html_inline_diff("a <b>", "a <i>", granularity="word")
+    assert "<b>" not in result and "&lt;" in result
+
+
+@pytest.mark.unit
+def test_html_inline_diff_unknown_granularity():
+    """Unknown granularity raises ValueError."""
+    with pytest.raises(ValueError):
+        html_inline_diff("a", "b", granularity="line")
+
+
 # ================================================================
 # Tests for _table_cell_diff
 # ================================================================
@@ -86,6 +127,114 @@ def test_diff_tables_changed_and_extra_row():
     assert result[-1][0]["type"] == "changed"
 
 
+# ================================================================
+# Tests for _diff_tables_aligned
+# ================================================================
+
+@pytest.mark.unit
+def test_diff_tables_aligned_inserted_row_only_reports_that_row():
+    """One inserted row must not mark every following row as changed."""
+    old = [["id", "name"]] + [[str(i), f"n{i}"] for i in range(100)]
+    new = old[:11] + [["x", "inserted"]] + old[11:]
+    result = _diff_tables_aligned(old, new)
+    assert result["table_rows"] == [{"op": "row_added", "old_row": None, "new_row": 11}]
+    assert result["rows_unchanged"] == 100
+    assert result["table_changes"][0][1]["type"] == "added"
+    assert "<ins>inserted</ins>" in result["table_changes"][0][1]["inline_html"]
+
+
+@pytest.mark.unit
+def test_diff_tables_aligned_deleted_and_changed_rows():
+    """Deleted rows and modified rows are reported separately."""
+    old = [["A", "1"], ["B", "2"], ["C", "3"], ["D", "4"]]
+    new = [["A", "1"], ["C", "30"], ["D", "4"]]
+    result = _diff_tables_aligned(old, new)
+    ops = [r["op"] for r in result["table_rows"]]
+    assert ops == ["row_changed", "row_deleted"]
+    changed_cells = result["table_changes"][0]
+    assert changed_cells[1]["type"] == "changed"
+
+
+@pytest.mark.unit
+def test_diff_tables_aligned_matches_columns_by_header():
+    """Reordered and added columns are matched by header name."""
+    old = [["id", "name", "qty"], ["1", "bolt", "5"], ["2", "nut", "7"]]
+    new = [["qty", "id", "name", "price"], ["5", "1", "bolt", "0.1"], ["9", "2", "nut", ""]]
+    result = _diff_tables_aligned(old, new)
+    assert result["table_header"] == ["id", "name", "qty", "price"]
+    ops = [r["op"] for r in result["table_rows"]]
+    # the added column is a change of the header row too
+    assert ops == ["header_changed", "row_changed", "row_changed"]
+    header, first, second = result["table_changes"]
+    assert [c["type"] for c in header] == ["same", "same", "same", "changed"]
+    assert [c["type"] for c in first] == ["same", "same", "same", "changed"]
+    assert [c["type"] for c in second] == ["same", "same", "changed", "same"]
+
+
+@pytest.mark.unit
+def test_diff_tables_aligned_edited_first_row():
+    """An edit in the first row is reported once, without touching the other rows."""
+    old = [["a", "b", "c"], ["1", "2", "3"], ["4", "5", "6"]]
+    new = [["a", "b", "X"], ["1", "2", "3"], ["4", "5", "6"]]
+
+    result = _diff_tables_aligned(old, new)
+
+    assert result["table_rows"] == [{"op": "header_changed", "old_row": 0, "new_row": 0}]
+    assert [c["type"] for c in result["table_changes"][0]] == ["same", "same", "changed"]
+    assert result["rows_unchanged"] == 2
+
+
+@pytest.mark.unit
+def test_diff_tables_aligned_data_first_row_is_not_a_header():
+    """First rows sharing few values are compared as data, column by column."""
+    old = [["1", "2", "3"], ["4", "5", "6"]]
+    new = [["1", "8", "9"], ["4", "5", "6"]]
+
+    result = _diff_tables_aligned(old, new)
+
+    assert "table_header" not in result
+    assert result["table_rows"] == [{"op": "row_changed", "old_row": 0, "new_row": 0}]
+    assert [c["type"] for c in result["table_changes"][0]] == ["same", "changed", "changed"]
+
+
+@pytest.mark.unit
+def test_diff_tables_aligned_chunk_offsets():
+    """Chunks inside a sheet report sheet rows and treat their first row as data."""
+    old = [["a", "b"], ["c", "d"]]
+    new = [["a", "X"], ["c", "d"]]
+
+    result = _diff_tables_aligned(old, new, old_offset=40, new_offset=41)
+
+    assert "table_header" not in result
+    assert result["table_rows"] == [{"op": "row_changed", "old_row": 40, "new_row": 41}]
+
+
+@pytest.mark.unit
+def test_diff_tables_aligned_identical_tables_emit_nothing():
+    """Identical tables produce no row records."""
+    t = [["a", "b"], ["c", "d"]]
+    result = _diff_tables_aligned(t, [list(r) for r in t])
+    assert result["table_changes"] == []
+    assert result["rows_unchanged"] == 1
+
+
+@pytest.mark.unit
+def test_compare_blocks_positional_table_mode():
+    """Positional table mode keeps the full cell grid."""
+    old = [{"type": "table", "table": [["A", "B"], ["C", "D"]]}]
+    new = [{"type": "table", "table": [["A", "X"], ["C", "D"]]}]
+    result = compare_blocks(old, new, table_mode="positional")
+    assert len(result[0]["table_changes"]) == 2
+    assert "table_rows" not in result[0]
+
+
+@pytest.mark.unit
+def test_compare_blocks_unknown_table_mode():
+    """Unknown table modes raise ValueError."""
+    with pytest.raises(ValueError):
+        compare_blocks([], [], table_mode="fuzzy")
+
+
 # ================================================================
 # Tests for compare_blocks
 # ================================================================
@@ -160,7 +309,7 @@ def test_compare_blocks_image_handling():
 @pytest.mark.unit
 def test_compare_blocks_handles_exception_during_diff(monkeypatch, caplog):
     """Force an exception during diff generation to trigger logger.debug branch."""
-    def broken_diff(a, b):
+    def broken_diff(a, b, **kwargs):
         raise ValueError("Boom")
 
     monkeypatch.setattr("docdiff.diff_engine.html_inline_diff", broken_diff)
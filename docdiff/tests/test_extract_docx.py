@@ -198,3 +198,85 @@ def test_docx_extractor_wrapper(monkeypatch, tmp_path):
     res = ex.extract_blocks(f)
     assert called
     assert res[0]["text"] == "ok"
+
+
+def test_extract_docx_blocks_real_document_tables_in_order(tmp_path):
+    """Each table is emitted once, at its position in the body."""
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph("intro")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "T1"
+    doc.add_paragraph("middle", style="Heading 1")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "T2"
+    path = tmp_path / "real.docx"
+    doc.save(str(path))
+
+    blocks = extract_docx_blocks(path)
+    assert [b.get("text") or b["table"][0][0] for b in blocks] == ["intro", "T1", "middle", "T2"]
+    assert blocks[0]["style"] == "Normal"
+    assert blocks[2]["style"] == "Heading 1"
+
+
+def _png(seed: int) -> bytes:
+    import struct
+    import zlib
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    raw = b"".join(b"\x00" + bytes([(seed * x + y) % 256 for x in range(12)]) for y in range(4))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 4, 4, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def test_extract_docx_blocks_images_hashed_once_from_archive(monkeypatch, tmp_path):
+    """A picture used many times is read from the zip once; blocks keep digest, size and part name."""
+    import hashlib
+    import io
+    from docx import Document
+
+    doc = Document()
+    for i in range(6):
+        doc.add_picture(io.BytesIO(_png(i % 2)))
+    path = tmp_path / "pictures.docx"
+    doc.save(str(path))
+
+    from docdiff.extractors import docx_images
+
+    hashed = []
+
+    def recording_sha256(*args):
+        hashed.append(args)
+        return hashlib.sha256(*args)
+
+    monkeypatch.setattr(docx_images, "hashlib", type("H", (), {"sha256": staticmethod(recording_sha256)}))
+    images = [b for b in extract_docx_blocks(path) if b["type"] == "image"]
+
+    assert len(images) == 6
+    # streamed from the archive (no blob argument), one hash per distinct part
+    assert hashed == [(), ()]
+    assert images[0]["sha256"] == hashlib.sha256(_png(0)).hexdigest() == images[2]["sha1"]
+    assert images[1]["size"] == len(_png(1))
+    assert images[0]["filename"] == "/word/media/image1.png"
+
+
+def test_relationship_targets_resolve_internal_parts(tmp_path):
+    """Targets are resolved against the part folder; external links are skipped."""
+    import zipfile
+    from docdiff.extractors.docx_images import main_document_part, relationship_targets
+
+    rels = (
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="image" Target="media/a.png"/>'
+        '<Relationship Id="rId2" Type="image" Target="/word/media/b.png"/>'
+        '<Relationship Id="rId3" Type="hyperlink" Target="http://example.com" TargetMode="External"/>'
+        '</Relationships>'
+    )
+    path = tmp_path / "rels.docx"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/_rels/document.xml.rels", rels)
+
+    with zipfile.ZipFile(path) as zf:
+        assert main_document_part(zf) == "word/document.xml"
+        assert relationship_targets(zf, "word/document.xml") == {"rId1": "word/media/a.png", "rId2": "word/media/b.png"}
@@ -0,0 +1,166 @@
+import io
+import zipfile
+
+import pytest
+
+from docdiff import main
+from docdiff.extractors.extract_docx import DocxExtractor, extract_docx_blocks
+from docdiff.extractors.extract_docx_fast import extract_docx_blocks_fast
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+CONTENT_TYPES = (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+DOCUMENT_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="styles.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+    '<Relationship Id="rId2" Target="http://example.com" TargetMode="External" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"/>'
+    '</Relationships>'
+)
+STYLES = (
+    f'<w:styles {W}>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Body"><w:name w:val="Body Text"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="H1"><w:name w:val="heading 1"/></w:style>'
+    '<w:style w:type="character" w:styleId="Strong"><w:name w:val="Strong"/></w:style>'
+    '</w:styles>'
+)
+BODY = (
+    # heading with a hyperlink, breaks and mixed formatting
+    '<w:p><w:pPr><w:pStyle w:val="H1"/></w:pPr>'
+    '<w:r><w:rPr><w:b/><w:color w:val="C00000"/></w:rPr><w:t xml:space="preserve">  Art. 1</w:t></w:r>'
+    '<w:r><w:tab/><w:t>see</w:t><w:br w:type="page"/></w:r>'
+    '<w:hyperlink r:id="rId2" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<w:r><w:rPr><w:u w:val="double"/></w:rPr><w:t xml:space="preserve"> link</w:t></w:r></w:hyperlink>'
+    '<w:r><w:br/><w:t>next</w:t><w:noBreakHyphen/></w:r></w:p>'
+    # no style: the default paragraph style; character style id: also the default
+    '<w:p><w:r><w:rPr><w:b w:val="0"/><w:i/><w:u w:val="none"/><w:color w:val="auto"/></w:rPr><w:t>plain</w:t></w:r></w:p>'
+    '<w:p><w:pPr><w:pStyle w:val="Strong"/></w:pPr><w:r><w:t>odd style</w:t></w:r></w:p>'
+    '<w:p/>'
+    # gridBefore, horizontal and vertical merges
+    '<w:tbl><w:tblGrid><w:gridCol/><w:gridCol/><w:gridCol/></w:tblGrid>'
+    '<w:tr><w:tc><w:tcPr><w:gridSpan w:val="2"/></w:tcPr><w:p><w:r><w:t>wide</w:t></w:r></w:p></w:tc>'
+    '<w:tc><w:tcPr><w:vMerge w:val="restart"/></w:tcPr><w:p><w:r><w:t>tall</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr>'
+    '<w:tr><w:trPr><w:gridBefore w:val="1"/></w:trPr>'
+    '<w:tc><w:p><w:r><w:t> b </w:t></w:r></w:p></w:tc>'
+    '<w:tc><w:tcPr><w:vMerge/></w:tcPr><w:p/></w:tc></w:tr>'
+    '</w:tbl>'
+    '<w:p><w:r><w:t>after table</w:t></w:r></w:p>'
+    '<w:sectPr/>'
+)
+
+
+def _write_docx(path, body=BODY):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zf.writestr("_rels/.rels", PACKAGE_RELS)
+        zf.writestr("word/_rels/document.xml.rels", DOCUMENT_RELS)
+        zf.writestr("word/styles.xml", STYLES)
+        zf.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+    return path
+
+
+def _without_spans(blocks):
+    return [{k: v for k, v in b.items() if k != "spans"} for b in blocks]
+
+
+# ================================================================
+# Parity with the python-docx extraction
+# ================================================================
+
+@pytest.mark.unit
+def test_stream_matches_python_docx_on_handwritten_xml(tmp_path):
+    """Text, styles, first-run formatting and merged table cells follow python-docx."""
+    path = _write_docx(tmp_path / "hand.docx")
+
+    blocks = extract_docx_blocks_fast(path)
+
+    assert _without_spans(blocks) == extract_docx_blocks(path)
+    assert blocks[0]["text"] == "Art. 1\tsee link\nnext-"
+    assert (blocks[0]["style"], blocks[1]["style"], blocks[2]["style"]) == ("Heading 1", "Body Text", "Body Text")
+    # python-docx lists only the cells present in a row (no gridBefore padding)
+    assert blocks[3]["table"] == [["wide", "wide", "tall\ncell"], ["b", "tall\ncell"]]
+
+
+@pytest.mark.unit
+def test_stream_matches_python_docx_on_generated_document(tmp_path):
+    """Documents written by python-docx (styles, runs, merges, images) extract identically."""
+    from docx import Document
+    from docx.shared import RGBColor
+    from docdiff.tests.test_extract_docx import _png
+
+    doc = Document()
+    p = doc.add_paragraph("Intro ", style="Heading 2")
+    p.add_run("bold").bold = True
+    p.add_run(" red").font.color.rgb = RGBColor(0xAB, 0, 0)
+    doc.add_paragraph("Item", style="List Bullet")
+    table = doc.add_table(rows=3, cols=3)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"{r}{c}"
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(2, 2))
+    doc.add_picture(io.BytesIO(_png(3)))
+    path = tmp_path / "generated.docx"
+    doc.save(str(path))
+
+    assert _without_spans(extract_docx_blocks_fast(path)) == extract_docx_blocks(path)
+
+
+# ================================================================
+# Formatting spans
+# ================================================================
+
+@pytest.mark.unit
+def test_spans_cover_stripped_text_and_merge_equal_runs(tmp_path):
+    path = _write_docx(tmp_path / "hand.docx")
+    blocks = extract_docx_blocks_fast(path)
+
+    assert blocks[0]["spans"] == [
+        {"start": 0, "end": 6, "bold": True, "italic": False, "underline": False, "color": "#c00000"},
+        {"start": 6, "end": 10, "bold": False, "italic": False, "underline": False, "color": "#000000"},
+        {"start": 10, "end": 15, "bold": False, "italic": False, "underline": True, "color": "#000000"},
+        {"start": 15, "end": 21, "bold": False, "italic": False, "underline": False, "color": "#000000"},
+    ]
+    # a single formatting needs no spans
+    assert "spans" not in blocks[1]
+
+
+# ================================================================
+# Extractor mode
+# ================================================================
+
+@pytest.mark.unit
+def test_docx_extractor_modes(tmp_path):
+    """The mode selects the extraction and is part of the cache token."""
+    path = _write_docx(tmp_path / "hand.docx")
+
+    assert DocxExtractor(mode="stream").extract_blocks(path) == extract_docx_blocks_fast(path)
+    assert DocxExtractor().cache_token() != DocxExtractor(mode="stream").cache_token()
+    with pytest.raises(ValueError):
+        DocxExtractor(mode="sax")
+
+
+@pytest.mark.unit
+def test_cli_docx_mode(monkeypatch, tmp_path):
+    import sys
+
+    monkeypatch.setattr(sys, "argv", ["prog", "a.docx", "b.docx"])
+    assert main.parse_args().docx_mode == "python-docx"
+    assert main.choose_extractor(tmp_path / "a.docx", docx_mode="structure").mode == "structure"
@@ -0,0 +1,172 @@
+import zipfile
+
+import pytest
+
+from docdiff.diff_engine import compare_blocks, merge_scope_order
+from docdiff.extractors.extract_docx import DocxExtractor
+from docdiff.extractors.extract_docx_structure import extract_docx_structure
+from docdiff.tests.test_extract_docx_fast import PACKAGE_RELS, STYLES, W
+
+R = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+
+DOCUMENT_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Target="styles.xml" Type="{REL_TYPE}styles"/>'
+    f'<Relationship Id="rId2" Target="header1.xml" Type="{REL_TYPE}header"/>'
+    f'<Relationship Id="rId3" Target="footer1.xml" Type="{REL_TYPE}footer"/>'
+    f'<Relationship Id="rId4" Target="footnotes.xml" Type="{REL_TYPE}footnotes"/>'
+    '</Relationships>'
+)
+SECT_PR = (
+    '<w:sectPr><w:footerReference w:type="default" r:id="rId3"/>'
+    '<w:headerReference w:type="default" r:id="rId2"/></w:sectPr>'
+)
+BODY = (
+    '<w:p><w:r><w:t>Intro</w:t></w:r></w:p>'
+    # text box, with the VML fallback of the same box
+    '<w:p><w:r><w:t>Anchor</w:t></w:r><w:r>'
+    '<mc:AlternateContent xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006">'
+    '<mc:Choice Requires="wps"><w:drawing><w:txbxContent><w:p><w:r><w:t>Boxed</w:t></w:r></w:p>'
+    '</w:txbxContent></w:drawing></mc:Choice>'
+    '<mc:Fallback><w:pict><w:txbxContent><w:p><w:r><w:t>Boxed</w:t></w:r></w:p>'
+    '</w:txbxContent></w:pict></mc:Fallback></mc:AlternateContent></w:r></w:p>'
+    # content control
+    '<w:sdt><w:sdtContent><w:p><w:r><w:t>Controlled</w:t></w:r></w:p></w:sdtContent></w:sdt>'
+    # list paragraph closing the first section
+    f'<w:p><w:pPr><w:numPr><w:ilvl w:val="1"/><w:numId w:val="7"/></w:numPr>{SECT_PR}</w:pPr>'
+    '<w:r><w:t>Item</w:t></w:r></w:p>'
+    # table with a table nested in its second cell
+    '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>a</w:t></w:r></w:p></w:tc>'
+    '<w:tc><w:tbl><w:tr><w:tc><w:p><w:r><w:t>inner</w:t></w:r></w:p></w:tc></w:tr></w:tbl><w:p/></w:tc>'
+    '</w:tr></w:tbl>'
+    f'<w:p><w:r><w:t>Closing</w:t></w:r></w:p>{SECT_PR}'
+)
+FOOTNOTES = (
+    f'<w:footnotes {W}>'
+    '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>'
+    '<w:footnote w:id="1"><w:p><w:r><w:t>Source: annex</w:t></w:r></w:p></w:footnote>'
+    '</w:footnotes>'
+)
+
+
+def _write_docx(path, body=BODY, header="Header text", footer="Page", rels=DOCUMENT_RELS, parts=None):
+    def story(tag, text):
+        return f'<w:{tag} {W}><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:{tag}>'
+
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("_rels/.rels", PACKAGE_RELS)
+        zf.writestr("word/_rels/document.xml.rels", rels)
+        zf.writestr("word/styles.xml", STYLES)
+        zf.writestr("word/header1.xml", story("hdr", header))
+        zf.writestr("word/footer1.xml", story("ftr", footer))
+        zf.writestr("word/footnotes.xml", FOOTNOTES)
+        for name, xml in (parts or {}).items():
+            zf.writestr(name, xml)
+        zf.writestr("word/document.xml", f"<w:document {W} {R}><w:body>{body}</w:body></w:document>")
+    return path
+
+
+def _located(blocks):
+    return [(b["scope"], b["path"], b.get("text") or b.get("table")) for b in blocks]
+
+
+# ================================================================
+# Stories, scopes and paths
+# ================================================================
+
+@pytest.mark.unit
+def test_structure_lists_every_story_with_paths(tmp_path):
+    """Body sections, text boxes, content controls, nested tables, header, footer and notes."""
+    blocks = extract_docx_structure(_write_docx(tmp_path / "doc.docx"))
+
+    assert _located(blocks) == [
+        ("body", "s0/p0", "Intro"),
+        ("body", "s0/p1", "Anchor"),
+        ("body", "s0/p1/x0/p0", "Boxed"),
+        ("body", "s0/p2", "Controlled"),
+        ("body", "s0/p3", "Item"),
+        # cell texts exclude nested tables, as python-docx cell.text does
+        ("body", "s1/t0", [["a", ""]]),
+        ("body", "s1/t0/r0/c1/t0", [["inner"]]),
+        ("body", "s1/p0", "Closing"),
+        # shared by both sections: listed once, with the first one
+        ("header-default", "s0/header-default/p0", "Header text"),
+        ("footer-default", "s0/footer-default/p0", "Page"),
+        ("footnotes", "footnotes/f1/p0", "Source: annex"),
+    ]
+    assert blocks[4]["list"] == {"id": "7", "level": 1}
+    assert "list" not in blocks[0]
+
+
+@pytest.mark.unit
+def test_structure_reads_python_docx_documents(tmp_path):
+    """Headers, footers and list styles of a document saved by python-docx."""
+    from docx import Document
+
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].text = "Draft"
+    doc.sections[0].footer.paragraphs[0].text = "Confidential"
+    doc.add_paragraph("Title", style="Heading 1")
+    doc.add_paragraph("First", style="List Number")
+    path = tmp_path / "generated.docx"
+    doc.save(str(path))
+
+    blocks = extract_docx_structure(path)
+
+    by_text = {b["text"]: b for b in blocks}
+    assert by_text["Draft"]["scope"] == "header-default"
+    assert by_text["Confidential"]["scope"] == "footer-default"
+    assert by_text["Title"]["style"] == "Heading 1"
+    assert "id" in by_text["First"]["list"]
+
+
+@pytest.mark.unit
+def test_docx_extractor_structure_mode(tmp_path):
+    path = _write_docx(tmp_path / "doc.docx")
+
+    assert DocxExtractor(mode="structure").extract_blocks(path) == extract_docx_structure(path)
+
+
+# ================================================================
+# Alignment per scope
+# ================================================================
+
+@pytest.mark.unit
+def test_changes_stay_within_their_scope(tmp_path):
+    """A header edit is a change of the header, never matched against body paragraphs."""
+    old = extract_docx_structure(_write_docx(tmp_path / "old.docx", header="Header text"))
+    new = extract_docx_structure(_write_docx(tmp_path / "new.docx", header="Intro"))
+
+    changed = [b for b in compare_blocks(old, new) if b["change"] != "unchanged"]
+
+    assert len(changed) == 1
+    assert changed[0]["change"] == "changed"
+    assert changed[0]["old"]["scope"] == changed[0]["new"]["scope"] == "header-default"
+
+
+@pytest.mark.unit
+def test_inserted_section_header_does_not_shift_other_headers(tmp_path):
+    """A new first section with its own header adds that header; the old one stays unchanged."""
+    cover_rel = f'<Relationship Id="rId5" Target="header2.xml" Type="{REL_TYPE}header"/></Relationships>'
+    cover = '<w:headerReference w:type="default" r:id="rId5"/>'
+    old = extract_docx_structure(_write_docx(tmp_path / "old.docx", body=f'<w:p><w:r><w:t>Text</w:t></w:r></w:p>{SECT_PR}'))
+    new = extract_docx_structure(_write_docx(
+        tmp_path / "new.docx",
+        body=(f'<w:p><w:pPr><w:sectPr>{cover}</w:sectPr></w:pPr><w:r><w:t>Cover page</w:t></w:r></w:p>'
+              f'<w:p><w:r><w:t>Text</w:t></w:r></w:p>{SECT_PR}'),
+        rels=DOCUMENT_RELS.replace("</Relationships>", cover_rel),
+        parts={"word/header2.xml": f'<w:hdr {W}><w:p><w:r><w:t>Cover</w:t></w:r></w:p></w:hdr>'},
+    ))
+
+    changed = [b for b in compare_blocks(old, new) if b["change"] != "unchanged"]
+
+    assert [(b["change"], b["scope"], b["text"]) for b in changed] == [
+        ("added", "body", "Cover page"), ("added", "header-default", "Cover"),
+    ]
+
+
+@pytest.mark.unit
+def test_merge_scope_order_keeps_old_only_scopes_in_place():
+    assert merge_scope_order(["body", "h", "notes"], ["body", "notes"]) == ["body", "h", "notes"]
+    assert merge_scope_order(["h"], ["body"]) == ["h", "body"]
@@ -108,3 +108,68 @@ def test_xlsx_extractor_class_wrapper(monkeypatch, tmp_path):
     assert isinstance(res, list)
     assert res[0]["sheet"] == "SheetA"
     assert res[0]["table"] == [["val"]]
+
+
+@pytest.mark.unit
+def test_xlsx_chunked_mode_splits_rows(monkeypatch, tmp_path):
+    """chunk_rows streams each sheet as several table blocks with hashes."""
+    p = tmp_path / "big.xlsx"
+    p.write_text("dummy")
+    ws = FakeWS(rows=[(i, "v") for i in range(200)], title="Big")
+    monkeypatch.setattr("docdiff.extractors.extract_xlsx.load_workbook", lambda filename, data_only, read_only: FakeWB([ws]))
+
+    blocks = XlsxExtractor(chunk_rows=8).extract_blocks(p)
+
+    offsets = [b["row_offset"] for b in blocks]
+    assert offsets == [0] + [o + len(b["table"]) for o, b in zip(offsets, blocks)][:-1]
+    assert sum(len(b["table"]) for b in blocks) == 200
+    assert all(2 <= len(b["table"]) <= 32 for b in blocks[:-1])
+    assert all(b["sheet"] == "Big" for b in blocks)
+    assert len({b["chunk_hash"] for b in blocks}) == len(blocks)
+
+
+@pytest.mark.unit
+def test_xlsx_chunked_mode_skips_empty_chunks(monkeypatch, tmp_path):
+    """Chunks made only of empty rows are not emitted."""
+    p = tmp_path / "gaps.xlsx"
+    p.write_text("dummy")
+    ws = FakeWS(rows=[("a",), (None,), (None,), ("b",)], title="Gaps")
+    monkeypatch.setattr("docdiff.extractors.extract_xlsx.load_workbook", lambda filename, data_only, read_only: FakeWB([ws]))
+
+    blocks = XlsxExtractor(chunk_rows=1).extract_blocks(p)
+    assert [b["row_offset"] for b in blocks] == [0, 3]
+
+
+@pytest.mark.unit
+def test_xlsx_inserted_row_changes_one_chunk(monkeypatch, tmp_path):
+    """Chunk boundaries follow the content: an inserted row leaves the other chunks unchanged."""
+    from docdiff.diff_engine import compare_blocks
+
+    p = tmp_path / "same.xlsx"
+    p.write_text("dummy")
+    rows = [(i, f"item {i}") for i in range(200)]
+    monkeypatch.setattr(
+        "docdiff.extractors.extract_xlsx.load_workbook",
+        lambda filename, data_only, read_only: FakeWB([FakeWS(rows=rows, title="S")]),
+    )
+    old = XlsxExtractor(chunk_rows=8).extract_blocks(p)
+
+    changed_rows = rows[:100] + [("new", "row")] + rows[100:]
+    monkeypatch.setattr(
+        "docdiff.extractors.extract_xlsx.load_workbook",
+        lambda filename, data_only, read_only: FakeWB([FakeWS(rows=changed_rows, title="S")]),
+    )
+    new = XlsxExtractor(chunk_rows=8).extract_blocks(p)
+
+    assert len({b["chunk_hash"] for b in old} - {b["chunk_hash"] for b in new}) == 1
+    changes = [r for r in compare_blocks(old, new) if r["change"] != "unchanged"]
+    assert [r["change"] for r in changes] == ["changed"]
+    # row indices are sheet rows, not chunk rows
+    assert changes[0]["table_rows"] == [{"op": "row_added", "old_row": None, "new_row": 100}]
+
+
+@pytest.mark.unit
+def test_xlsx_invalid_chunk_rows():
+    """chunk_rows must be positive."""
+    with pytest.raises(ValueError):
+        XlsxExtractor(chunk_rows=0)
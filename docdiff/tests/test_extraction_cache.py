@@ -0,0 +1,119 @@
+import pytest
+from unittest.mock import MagicMock
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from docdiff import extraction_cache as ec
+from docdiff.extractors.extract_txt import TxtExtractor
+from docdiff.extractors.extract_xlsx import XlsxExtractor
+from docdiff.extractors.serialization import dump_blocks, load_blocks
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+# ================================================================
+# Serialization
+# ================================================================
+
+@pytest.mark.unit
+def test_dump_and_load_blocks_roundtrip():
+    """Serialized blocks load back unchanged (including non-ASCII text)."""
+    blocks = [
+        {"type": "paragraph", "text": "Zażółć gęślą jaźń", "bold": True},
+        {"type": "table", "table": [["a", ""]], "sheet": "S"},
+    ]
+    data = dump_blocks(blocks)
+    assert isinstance(data, bytes)
+    assert load_blocks(data) == blocks
+
+
+# ================================================================
+# Cache keys and storage
+# ================================================================
+
+@pytest.mark.unit
+def test_cache_key_depends_on_extractor_options():
+    """Extractor class, version and options are part of the key."""
+    keys = {
+        ec.cache_key("abc", TxtExtractor()),
+        ec.cache_key("abc", XlsxExtractor()),
+        ec.cache_key("abc", XlsxExtractor(chunk_rows=100)),
+    }
+    assert len(keys) == 3
+
+
+@pytest.mark.unit
+def test_extract_cached_parses_only_once(tmp_path):
+    """The second extraction of identical bytes is served from the cache."""
+    p = tmp_path / "a.txt"
+    p.write_text("one\ntwo\n")
+    extractor = TxtExtractor()
+    extractor.extract_blocks = MagicMock(wraps=extractor.extract_blocks)
+
+    first = ec.extract_cached(extractor, p)
+    second = ec.extract_cached(extractor, p)
+
+    assert first == second == [{"type": "paragraph", "text": "one"}, {"type": "paragraph", "text": "two"}]
+    assert extractor.extract_blocks.call_count == 1
+
+
+@pytest.mark.unit
+def test_extract_pair_cached_extracts_only_misses(tmp_path, monkeypatch):
+    """A pair with one cached side extracts only the other one."""
+    old, new = tmp_path / "old.txt", tmp_path / "new.txt"
+    old.write_text("same")
+    new.write_text("changed")
+    ec.extract_cached(TxtExtractor(), old)
+    pair = MagicMock(side_effect=AssertionError("both sides must not be re-extracted"))
+    monkeypatch.setattr(ec, "extract_pair", pair)
+
+    old_blocks, new_blocks = ec.extract_pair_cached(TxtExtractor(), old, TxtExtractor(), new)
+
+    assert old_blocks == [{"type": "paragraph", "text": "same"}]
+    assert new_blocks == [{"type": "paragraph", "text": "changed"}]
+    pair.assert_not_called()
+
+
+@pytest.mark.unit
+def test_cache_disabled_with_zero_ttl(settings):
+    """TTL 0 disables reads and writes."""
+    settings.DOCDIFF_EXTRACTION_CACHE_TTL_SECONDS = 0
+    ec.set_cached_blocks("d", TxtExtractor(), [{"type": "paragraph", "text": "x"}])
+    assert ec.get_cached_blocks("d", TxtExtractor()) is None
+
+
+@pytest.mark.unit
+def test_cache_errors_are_ignored(monkeypatch):
+    """Cache backend failures fall back to a miss."""
+    monkeypatch.setattr(ec.cache, "get", MagicMock(side_effect=ConnectionError("down")))
+    assert ec.get_cached_blocks("d", TxtExtractor()) is None
+
+
+# ================================================================
+# View integration
+# ================================================================
+
+@pytest.mark.django_db
+def test_view_reuses_cached_extraction(client, monkeypatch, settings):
+    """Uploading the same file again does not parse it a second time."""
+    settings.DOCDIFF_JOBS_BACKEND = "eager"
+    calls = []
+    original = TxtExtractor.extract_blocks
+
+    def counting(self, path):
+        calls.append(path.name)
+        return original(self, path)
+
+    monkeypatch.setattr(TxtExtractor, "extract_blocks", counting)
+    url = reverse("docdiff:compare")
+
+    client.post(url, {"file_old": SimpleUploadedFile("old.txt", b"base"), "file_new": SimpleUploadedFile("new.txt", b"rev 1")})
+    client.post(url, {"file_old": SimpleUploadedFile("old.txt", b"base"), "file_new": SimpleUploadedFile("new.txt", b"rev 2")})
+
+    assert calls == ["old.txt", "new.txt", "new.txt"]
@@ -127,6 +127,161 @@ def test_analyze_change_fallback_on_exception(monkeypatch):
     assert result["change_type"] in ("substantive", "formal", "editorial", "technical")
 
 
+# ================================================================
+# Batch pipeline (pipe_docs / analyze_changes)
+# ================================================================
+
+class FakeBatchNLP:
+    """nlp stub that records pipe() calls and refuses per-text calls."""
+
+    pipe_names = ["tok2vec", "morphologizer", "parser", "lemmatizer", "ner"]
+
+    def __init__(self):
+        self.pipe_calls = []
+
+    def __call__(self, text):
+        raise AssertionError("per-text nlp() call in batch mode")
+
+    def pipe(self, texts, batch_size=None, disable=None):
+        texts = list(texts)
+        self.pipe_calls.append({"texts": texts, "batch_size": batch_size, "disable": disable})
+        for t in texts:
+            doc = MagicMock()
+            doc.ents = [types.SimpleNamespace(label_="DATE")] if "2024" in t else []
+            doc.similarity.return_value = 0.9
+            doc.vector = np.array([float(len(t)), 1.0, 0.0])
+            doc.has_vector = True
+            yield doc
+
+
+def test_pipe_docs_single_batched_call_with_disabled_pipes(monkeypatch):
+    """Distinct non-empty texts are processed once with unneeded pipes disabled."""
+    nlp = FakeBatchNLP()
+    monkeypatch.setattr(ai, "get_nlp", lambda: nlp)
+
+    docs = ai.pipe_docs(["a", "b", "a", "", "  "], batch_size=16)
+
+    assert set(docs) == {"a", "b"}
+    assert len(nlp.pipe_calls) == 1
+    call = nlp.pipe_calls[0]
+    assert call["texts"] == ["a", "b"]
+    assert call["batch_size"] == 16
+    assert set(call["disable"]) == {"morphologizer", "parser", "lemmatizer"}
+
+
+def test_pipe_docs_without_model(monkeypatch):
+    """Return None when spaCy is unavailable."""
+    monkeypatch.setattr(ai, "get_nlp", lambda: None)
+    assert ai.pipe_docs(["a"]) is None
+
+
+def test_analyze_changes_reuses_batch_docs(monkeypatch):
+    """analyze_changes runs the pipeline once for all blocks."""
+    nlp = FakeBatchNLP()
+    monkeypatch.setattr(ai, "get_nlp", lambda: nlp)
+    blocks = [
+        {"change": "changed", "old": {"text": f"umowa {i}"}, "new": {"text": f"umowa {i} 2024"}}
+        for i in range(5)
+    ]
+
+    results = ai.analyze_changes(blocks)
+
+    # similarity is the cosine of the stacked vectors [7, 1, 0] and [12, 1, 0]
+    expected = round((1 - 85 / np.sqrt(50 * 145)) * 10, 2)
+    assert len(nlp.pipe_calls) == 1
+    assert len(results) == 5
+    assert all(r["labels"] == ["date", "numbers"] for r in results)
+    assert all(r["semantic_score"] == expected for r in results)
+
+
+def _vector_doc(vector):
+    doc = MagicMock()
+    doc.vector = np.array(vector, dtype=float)
+    doc.similarity.side_effect = AssertionError("per-pair similarity in vectorized path")
+    return doc
+
+
+def test_paired_similarities_match_per_pair_cosine():
+    """All pairs are compared in one pass with the same values as the cosine per pair."""
+    rng = np.random.default_rng(0)
+    texts = [f"t{i}" for i in range(20)]
+    docs = {t: _vector_doc(rng.normal(size=8)) for t in texts}
+    blocks = [{"old": {"text": texts[i]}, "new": {"text": texts[i + 10]}} for i in range(10)]
+
+    sims = ai.paired_similarities(blocks, docs)
+
+    for b, sim in zip(blocks, sims):
+        a, c = docs[b["old"]["text"]].vector, docs[b["new"]["text"]].vector
+        assert sim == pytest.approx(a @ c / (np.linalg.norm(a) * np.linalg.norm(c)), abs=1e-6)
+
+
+def test_paired_similarities_edge_cases():
+    """Empty texts and zero vectors give 0.0, texts without a Doc fall back to SequenceMatcher."""
+    docs = {"a": _vector_doc([1, 0]), "zero": _vector_doc([0, 0])}
+    blocks = [
+        {"old": {"text": ""}, "new": {"text": "a"}},
+        {"old": {"text": "a"}, "new": {"text": "zero"}},
+        {"old": {"text": "abc"}, "new": {"text": "abd"}},
+        {"old": {"text": "a"}, "new": {"text": "a"}},
+    ]
+    assert ai.paired_similarities(blocks, docs) == pytest.approx([0.0, 0.0, 2 / 3, 1.0])
+
+
+def test_analysis_memo_passes_precomputed_similarity():
+    """AnalysisMemo.for_blocks hands each block its precomputed similarity."""
+    docs = {"a": _vector_doc([1, 0]), "b": _vector_doc([1, 1])}
+    docs["a b"] = _vector_doc([1, 1])
+    docs["a b"].ents = []
+    block = {"change": "changed", "old": {"text": "a"}, "new": {"text": "b"}}
+
+    memo = ai.AnalysisMemo.for_blocks([block], docs)
+    result = memo.analyze(block)
+
+    assert result["semantic_score"] == round((1 - np.sqrt(0.5)) * 10, 2)
+
+
+def test_cluster_changes_reuses_docs(monkeypatch):
+    """cluster_changes takes vectors from precomputed Docs."""
+    nlp = FakeBatchNLP()
+    monkeypatch.setattr(ai, "get_nlp", lambda: nlp)
+    blocks = [{"change": "changed", "old": {"text": "x"}, "new": {"text": "t" * (i + 1)}} for i in range(6)]
+    docs = ai.pipe_docs(ai.change_texts(blocks))
+
+    mock_kmeans = MagicMock()
+    mock_kmeans.labels_ = np.array([0, 0, 1, 1, 0, 1])
+    monkeypatch.setattr(ai, "KMeans", MagicMock(return_value=MagicMock(fit=MagicMock(return_value=mock_kmeans))))
+
+    result = ai.cluster_changes(blocks, docs=docs)
+    assert sorted(i for v in result.values() for i in v) == list(range(6))
+    assert len(nlp.pipe_calls) == 1
+
+
+def test_analysis_memo_analyzes_identical_blocks_once():
+    """AnalysisMemo calls the analyzer once per distinct block content."""
+    calls = []
+
+    def analyzer(block, docs):
+        calls.append(block)
+        return {"labels": [], "semantic_score": 0.5, "change_type": "formal", "confidence": 0.6}
+
+    memo = ai.AnalysisMemo(docs={"x": object()})
+    same = [{"change": "changed", "old": {"text": "a"}, "new": {"text": "b"}} for _ in range(3)]
+    other = {"change": "changed", "old": {"text": "a"}, "new": {"text": "c"}}
+    results = [memo.analyze(b, analyzer) for b in same + [other]]
+
+    assert len(calls) == 2
+    assert memo.hits == 2 and len(memo) == 2
+    results[0]["labels"].append("mutated")
+    assert memo.analyze(same[0], analyzer)["confidence"] == 0.6
+
+
+def test_precomputed_analysis_requires_all_fields():
+    """Only blocks carrying a complete analysis are reused."""
+    full = {"labels": ["date"], "semantic_score": 0.2, "change_type": "substantive", "confidence": 0.9}
+    assert ai.precomputed_analysis(dict(full)) == full
+    assert ai.precomputed_analysis({"labels": ["date"]}) is None
+
+
 # ================================================================
 # cluster_changes
 # ================================================================
@@ -0,0 +1,95 @@
+import types
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.utils import timezone
+
+import docdiff.heuristics_ai as ai
+from docdiff import history
+from docdiff.models import BlockAnalysis
+from docdiff.pipeline import run_pipeline
+
+
+class RecordingNLP:
+    """nlp stub that records every text sent through pipe()."""
+
+    pipe_names = ["tok2vec", "ner"]
+
+    def __init__(self):
+        self.texts = []
+
+    def pipe(self, texts, batch_size=None, disable=None):
+        for t in texts:
+            self.texts.append(t)
+            yield types.SimpleNamespace(ents=[], vector=np.array([float(len(t)), 1.0]), has_vector=True)
+
+
+ANALYSIS = {"labels": [], "semantic_score": 1.0, "change_type": "formal", "confidence": 0.5}
+
+
+# ================================================================
+# Storage
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_history_disabled_with_zero_ttl(settings):
+    """TTL 0 neither stores nor reads history."""
+    settings.DOCDIFF_HISTORY_TTL_SECONDS = 0
+    history.store_analyses({"f" * 32: ANALYSIS})
+    assert not BlockAnalysis.objects.exists()
+    assert history.load_analyses(["f" * 32]) == {}
+
+
+# ================================================================
+# Incremental re-diff
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_next_revision_only_analyzes_new_changes(tmp_path, monkeypatch):
+    """Comparing revision 3 after revision 2 sends only unseen changes through spaCy."""
+    nlp = RecordingNLP()
+    monkeypatch.setattr(ai, "get_nlp", lambda: nlp)
+    revisions = [
+        "intro\nart 1 old\nart 2 old\nend",
+        "intro\nart 1 new\nart 2 old\nend",
+        "intro\nart 1 new\nart 2 new\nend",
+    ]
+    paths = []
+    for i, text in enumerate(revisions):
+        paths.append(tmp_path / f"r{i}.txt")
+        paths[-1].write_text(text)
+
+    run_pipeline(paths[0], paths[2])
+    nlp.texts.clear()
+    blocks = run_pipeline(paths[1], paths[2])
+
+    # "art 1" is unchanged between r1 and r2, "art 2 old -> new" was analyzed in the first run
+    assert nlp.texts == []
+    changed = [b for b in blocks if b["change"] == "changed"]
+    assert [b["new"]["text"] for b in changed] == ["art 2 new"]
+    assert changed[0]["change_type"] in ("substantive", "formal", "editorial", "technical")
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_analyses_are_not_stored_without_spacy(tmp_path, monkeypatch):
+    """Fallback results (no spaCy model) are not kept for later comparisons."""
+    monkeypatch.setattr(ai, "get_nlp", lambda: None)
+    (tmp_path / "a.txt").write_text("one\ntwo")
+    (tmp_path / "b.txt").write_text("one\nthree")
+    run_pipeline(tmp_path / "a.txt", tmp_path / "b.txt")
+    assert not BlockAnalysis.objects.exists()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_purge_history_drops_unused_entries():
+    """Entries unused for longer than the TTL are deleted."""
+    history.store_analyses({"o" * 32: ANALYSIS, "f" * 32: ANALYSIS})
+    BlockAnalysis.objects.filter(fingerprint="o" * 32).update(last_used_at=timezone.now() - timedelta(days=2))
+
+    assert history.purge_history(ttl=24 * 3600) == 1
+    assert list(BlockAnalysis.objects.values_list("fingerprint", flat=True)) == ["f" * 32]
@@ -0,0 +1,193 @@
+import hashlib
+import pytest
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from docdiff import jobs
+from docdiff.models import DiffJob
+from docdiff.pipeline import PipelineError, run_pipeline
+
+
+def _job(old=b"alpha\nbeta", new=b"alpha\ngamma", **kwargs):
+    """Creates a queued job with two txt uploads."""
+    return DiffJob.objects.create(
+        old_name="old.txt", new_name="new.txt", old_data=old, new_data=new,
+        old_sha256=hashlib.sha256(old).hexdigest(), new_sha256=hashlib.sha256(new).hexdigest(), **kwargs
+    )
+
+
+# ================================================================
+# Pipeline
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_run_pipeline_reports_progress_and_analysis(tmp_path):
+    """The pipeline reports every stage and stores the AI analysis in changed blocks."""
+    (tmp_path / "a.txt").write_text("alpha\nbeta")
+    (tmp_path / "b.txt").write_text("alpha\nbeta 2024")
+    stages = []
+
+    blocks = run_pipeline(tmp_path / "a.txt", tmp_path / "b.txt", progress=lambda s, p: stages.append((s, p)))
+
+    assert [s for s, _ in stages] == ["extract", "diff", "analyze"]
+    changed = [b for b in blocks if b["change"] == "changed"]
+    assert changed and "change_type" in changed[0]
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_run_pipeline_empty_documents(tmp_path):
+    """Two empty documents fail with the frontend error code."""
+    (tmp_path / "a.txt").write_text("")
+    (tmp_path / "b.txt").write_text("\n")
+    with pytest.raises(PipelineError) as exc:
+        run_pipeline(tmp_path / "a.txt", tmp_path / "b.txt")
+    assert exc.value.code == "empty_documents"
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_run_pipeline_identical_uploads_short_circuit(tmp_path, monkeypatch):
+    """Byte-identical uploads are extracted once and neither diffed nor analyzed."""
+    import docdiff.pipeline as pipeline
+    monkeypatch.setattr(pipeline, "compare_blocks", lambda *a, **k: pytest.fail("diffed identical uploads"))
+    monkeypatch.setattr(pipeline, "analyze_blocks", lambda *a, **k: pytest.fail("analyzed identical uploads"))
+    (tmp_path / "a.txt").write_text("alpha\nbeta")
+    (tmp_path / "b.txt").write_text("alpha\nbeta")
+
+    blocks = run_pipeline(tmp_path / "a.txt", tmp_path / "b.txt")
+
+    assert [(b["change"], b["text"]) for b in blocks] == [("unchanged", "alpha"), ("unchanged", "beta")]
+
+
+# ================================================================
+# Job execution
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_run_job_stores_result_and_removes_uploads():
+    """A finished job holds the diff and its uploads are deleted."""
+    job = _job()
+
+    assert jobs.run_job(job.pk)
+    job.refresh_from_db()
+    assert job.status == DiffJob.Status.DONE and job.progress == 100
+    assert [b["change"] for b in jobs.job_result(job)] == ["unchanged", "changed"]
+    assert job.old_data is None and job.new_data is None
+    # a job runs only once
+    assert not jobs.run_job(job.pk)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_run_job_failure_sets_error_code():
+    """Pipeline errors end the job as failed with the error code."""
+    job = _job(old=b"", new=b"")
+    jobs.run_job(job.pk)
+    job.refresh_from_db()
+    assert job.status == DiffJob.Status.FAILED
+    assert job.error_code == "empty_documents"
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_worker_backend_leaves_job_queued_for_worker(settings):
+    """With the worker backend submit only queues; run_worker drains the queue."""
+    settings.DOCDIFF_JOBS_BACKEND = "worker"
+    job = _job()
+    jobs.submit_job(job)
+    job.refresh_from_db()
+    assert job.status == DiffJob.Status.QUEUED
+
+    assert jobs.run_worker(max_jobs=5) == 1
+    job.refresh_from_db()
+    assert job.status == DiffJob.Status.DONE
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_purge_expired_jobs(settings):
+    """Finished jobs older than DOCDIFF_JOB_TTL_SECONDS are deleted; unfinished ones are kept."""
+    settings.DOCDIFF_JOB_TTL_SECONDS = 60
+    old = _job(status=DiffJob.Status.DONE)
+    queued = _job()
+    DiffJob.objects.update(created_at=timezone.now() - timedelta(hours=1))
+    assert jobs.purge_expired_jobs() == 1
+    assert not DiffJob.objects.filter(pk=old.pk).exists()
+    assert DiffJob.objects.filter(pk=queued.pk).exists()
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+def test_fail_stale_jobs(settings):
+    """Jobs queued or running past DOCDIFF_JOB_TIMEOUT_SECONDS fail; their late result is dropped."""
+    settings.DOCDIFF_JOB_TIMEOUT_SECONDS = 60
+    stale = _job(status=DiffJob.Status.RUNNING, started_at=timezone.now() - timedelta(hours=1))
+    fresh = _job(status=DiffJob.Status.RUNNING, started_at=timezone.now())
+    queued = _job()
+    DiffJob.objects.filter(pk=queued.pk).update(created_at=timezone.now() - timedelta(hours=1))
+    fresh_queued = _job()
+
+    assert jobs.fail_stale_jobs() == 2
+    stale.refresh_from_db()
+    assert stale.status == DiffJob.Status.FAILED and stale.error_code == "job_timeout"
+    assert stale.old_data is None
+    queued.refresh_from_db()
+    assert queued.status == DiffJob.Status.FAILED and queued.error_code == "job_timeout"
+    fresh_queued.refresh_from_db()
+    assert fresh_queued.status == DiffJob.Status.QUEUED
+
+    jobs.run_job(stale.pk, claimed=True)
+    stale.refresh_from_db()
+    assert stale.status == DiffJob.Status.FAILED
+    fresh.refresh_from_db()
+    assert fresh.status == DiffJob.Status.RUNNING
+
+
+# ================================================================
+# Job endpoints
+# ================================================================
+
+@pytest.mark.django_db
+def test_job_status_and_progress_page(client, settings):
+    """Queued jobs show the progress page; status is served as JSON."""
+    job = _job()
+
+    page = client.get(reverse("docdiff:job", args=[job.pk]))
+    assert page.status_code == 200
+    assert reverse("docdiff:job_status", args=[job.pk]) in page.content.decode()
+
+    status = client.get(reverse("docdiff:job_status", args=[job.pk])).json()
+    assert status["status"] == "queued" and status["result_url"] is None
+
+    assert f'data-max-wait-seconds="{settings.DOCDIFF_JOB_TIMEOUT_SECONDS + 60}"' in page.content.decode()
+
+    # the report only exists once the job is done
+    assert client.get(reverse("docdiff:job_result", args=[job.pk])).status_code == 404
+    jobs.run_job(job.pk)
+    status = client.get(reverse("docdiff:job_status", args=[job.pk])).json()
+    assert status["result_url"] == reverse("docdiff:job_result", args=[job.pk])
+
+
+@pytest.mark.django_db
+def test_failed_job_page_shows_error_code(client):
+    """A failed job renders the upload form with its error code."""
+    job = _job(old=b"", new=b"")
+    jobs.run_job(job.pk)
+    page = client.get(reverse("docdiff:job", args=[job.pk]))
+    assert "empty_documents" in page.content.decode()
+
+
+@pytest.mark.django_db
+def test_status_of_stale_job_reports_timeout(client, settings):
+    """Polling a job whose worker died returns it as failed."""
+    settings.DOCDIFF_JOB_TIMEOUT_SECONDS = 60
+    job = _job(status=DiffJob.Status.RUNNING, started_at=timezone.now() - timedelta(hours=1))
+
+    status = client.get(reverse("docdiff:job_status", args=[job.pk])).json()
+
+    assert status["status"] == "failed" and status["error_code"] == "job_timeout"
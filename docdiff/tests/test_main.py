@@ -54,6 +54,13 @@ def test_choose_extractor_valid(ext, expected_cls, tmp_path):
     assert isinstance(ex, expected_cls)
 
 
+@pytest.mark.unit
+def test_choose_extractor_xlsx_chunk_rows(tmp_path):
+    """--xlsx-chunk-rows reaches the xlsx extractor only."""
+    assert main.choose_extractor(tmp_path / "a.xlsx", xlsx_chunk_rows=500).chunk_rows == 500
+    assert isinstance(main.choose_extractor(tmp_path / "a.txt", xlsx_chunk_rows=500), main.TxtExtractor)
+
+
 @pytest.mark.unit
 def test_choose_extractor_invalid(tmp_path):
     """Verify that unsupported extensions raise ValueError."""
@@ -63,6 +70,28 @@ def test_choose_extractor_invalid(tmp_path):
         main.choose_extractor(f)
 
 
+@pytest.mark.unit
+def test_import_does_not_load_parsers_or_ai():
+    """Importing the CLI loads no extractor libraries and no AI stack (cold start)."""
+    import subprocess
+    probe = (
+        "import sys, docdiff.main as m; m.choose_extractor(m.Path('a.txt')); "
+        "print(sorted(x for x in ('docx', 'openpyxl', 'spacy', 'numpy') if x in sys.modules))"
+    )
+    root = Path(__file__).resolve().parents[2]
+    out = subprocess.run([sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+@pytest.mark.unit
+def test_ai_flag_defaults_off(monkeypatch):
+    """AI analysis runs only with --ai."""
+    monkeypatch.setattr(sys, "argv", ["prog", "a.txt", "b.txt"])
+    assert main.parse_args().ai is False
+    monkeypatch.setattr(sys, "argv", ["prog", "a.txt", "b.txt", "--ai"])
+    assert main.parse_args().ai is True
+
+
 # --- MAIN FUNCTION: FILE EXISTENCE ERRORS ---
 
 @pytest.mark.unit
@@ -178,3 +207,17 @@ def test_main_ok(monkeypatch, tmp_path):
 
     code = main.main()
     assert code == main.ExitCode.OK
+
+
+@pytest.mark.unit
+def test_compare_pair_identical_files_skip_diff(monkeypatch, tmp_path):
+    """Byte-identical inputs are extracted once and reported as unchanged."""
+    old, new = tmp_path / "old.txt", tmp_path / "new.txt"
+    old.write_text("same")
+    new.write_text("same")
+    monkeypatch.setattr(main, "compare_blocks", MagicMock(side_effect=AssertionError("diffed identical files")))
+    html = MagicMock()
+    monkeypatch.setattr(main, "generate_html_report", html)
+
+    assert main.compare_pair(old, new, tmp_path / "r.html") == main.ExitCode.OK
+    assert html.call_args[0][0] == [{"change": "unchanged", "type": "paragraph", "text": "same"}]
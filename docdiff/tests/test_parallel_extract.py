@@ -0,0 +1,51 @@
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
+
+from docdiff import parallel_extract as pe
+from docdiff.extractors.extract_txt import TxtExtractor
+
+
+@pytest.fixture
+def pair(tmp_path):
+    old, new = tmp_path / "old.txt", tmp_path / "new.txt"
+    old.write_text("alpha\nbeta\n")
+    new.write_text("alpha\ngamma\n")
+    return old, new
+
+
+@pytest.mark.unit
+def test_small_pair_is_extracted_inline(pair, monkeypatch):
+    """Below min_bytes no worker process is involved."""
+    monkeypatch.setattr(pe, "get_pool", MagicMock(side_effect=AssertionError("pool used")))
+    ex = MagicMock()
+    ex.extract_blocks.side_effect = lambda p: [{"type": "paragraph", "text": p.name}]
+
+    old_blocks, new_blocks = pe.extract_pair(ex, pair[0], ex, pair[1])
+
+    assert old_blocks == [{"type": "paragraph", "text": "old.txt"}]
+    assert new_blocks == [{"type": "paragraph", "text": "new.txt"}]
+
+
+@pytest.mark.unit
+def test_pair_is_extracted_in_worker_processes(pair, monkeypatch):
+    """Both documents come back from the pool, deserialized."""
+    monkeypatch.setattr(pe, "POOL_WORKERS", 2)
+    try:
+        old_blocks, new_blocks = pe.extract_pair(TxtExtractor(), pair[0], TxtExtractor(), pair[1], min_bytes=0)
+    finally:
+        pe.shutdown_pool()
+    assert [b["text"] for b in old_blocks] == ["alpha", "beta"]
+    assert [b["text"] for b in new_blocks] == ["alpha", "gamma"]
+
+
+@pytest.mark.unit
+def test_broken_pool_falls_back_to_inline(pair, monkeypatch):
+    """A dead worker pool does not fail the extraction."""
+    broken = MagicMock()
+    broken.submit.side_effect = BrokenProcessPool("worker died")
+    monkeypatch.setattr(pe, "POOL_WORKERS", 2)
+    monkeypatch.setattr(pe, "get_pool", lambda: broken)
+
+    old_blocks, _ = pe.extract_pair(TxtExtractor(), pair[0], TxtExtractor(), pair[1], min_bytes=0)
+    assert [b["text"] for b in old_blocks] == ["alpha", "beta"]
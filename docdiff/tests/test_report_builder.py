@@ -110,6 +110,23 @@ def test_render_table_with_table_changes_and_plain():
     assert "a" in html2 and "b" in html2
 
 
+def test_render_table_with_row_records():
+    """Aligned table diffs render header, row classes and hidden row count."""
+    b = {
+        "table_header": ["id", "name"],
+        "table_changes": [[{"type": "added", "text": "3", "inline_html": "<ins>3</ins>"},
+                           {"type": "added", "text": "z", "inline_html": "<ins>z</ins>"}]],
+        "table_rows": [{"op": "row_added", "old_row": None, "new_row": 3}],
+        "rows_unchanged": 2,
+    }
+    f = io.StringIO()
+    rb._render_table(f, b, "changed")
+    out = f.getvalue()
+    assert "<th>id</th>" in out
+    assert "<tr class='row_added'>" in out
+    assert "rows_unchanged" in out and ": 2" in out
+
+
 def test_render_image_with_and_without_sha():
     """Image render should include SHA when available."""
     b1 = {"sha1": "1234567890abcdef"}
@@ -179,6 +196,70 @@ def test_generate_html_report_escapes_ai_summary(mock_summary, mock_analyze, tmp
     assert "&lt;script&gt;" in html
 
 
+@patch("docdiff.report_builder.analyze_change")
+@patch("docdiff.report_builder.generate_ai_summary", return_value="Summary OK")
+def test_generate_html_report_reuses_precomputed_analysis(mock_summary, mock_analyze, tmp_path):
+    """Blocks analyzed upstream are not analyzed again; duplicates hit the memo."""
+    mock_analyze.return_value = {
+        "labels": [], "semantic_score": 0.4,
+        "change_type": "formal", "confidence": 0.5
+    }
+    analyzed = {"change": "changed", "type": "paragraph", "old": {"text": "a"}, "new": {"text": "b"},
+                "labels": ["date"], "semantic_score": 0.7, "change_type": "substantive", "confidence": 0.9}
+    dupes = [{"change": "changed", "type": "paragraph", "old": {"text": "x"}, "new": {"text": "y"}}
+             for _ in range(3)]
+    memo = rb.AnalysisMemo()
+    rb.generate_html_report([analyzed] + dupes, output_path=str(tmp_path / "r.html"), analysis_memo=memo)
+
+    assert mock_analyze.call_count == 1
+    assert memo.hits == 2
+    assert analyzed["_ai_labels"] == ["date"]
+    assert all(b["_ai_type"] == "formal" for b in dupes)
+
+
+@patch("docdiff.report_builder.generate_ai_summary", return_value="ok")
+def test_iter_html_report_streams_chunks(mock_summary):
+    """The report is produced as head + block chunks + footer."""
+    blocks = [{"change": "unchanged", "type": "paragraph", "text": f"p{i}"} for i in range(5)]
+    chunks = list(rb.iter_html_report(blocks, chunk_blocks=2))
+    assert len(chunks) == 1 + 2 + 1
+    assert chunks[0].startswith("<!DOCTYPE html>")
+    assert "p4" in "".join(chunks) and chunks[-1].endswith("</html>")
+
+
+@patch("docdiff.report_builder.generate_ai_summary", return_value="ok")
+def test_iter_html_report_collapses_unchanged_runs(mock_summary):
+    """Long unchanged runs become placeholders pointing at the fragment URL."""
+    blocks = [{"change": "unchanged", "type": "paragraph", "text": f"p{i}"} for i in range(10)]
+    blocks.insert(2, {"change": "added", "type": "paragraph", "text": "new"})
+    out = "".join(rb.iter_html_report(blocks, fragment_url="/frag/", collapse_min_run=4))
+    assert "data-fragment='/frag/?start=3&amp;end=11'" in out
+    assert "p0" in out and "p5" not in out
+    assert list(rb.unchanged_runs(blocks, 4)) == [(3, 11)]
+
+
+def test_render_report_fragment_pages_long_runs():
+    """Fragments render at most page_size blocks and re-collapse the remainder."""
+    blocks = [{"change": "unchanged", "type": "paragraph", "text": f"p{i}"} for i in range(10)]
+    out = rb.render_report_fragment(blocks, 2, 10, fragment_url="/frag/", page_size=3)
+    assert "id='blk2'" in out and "id='blk4'" in out and "id='blk5'" not in out
+    assert "start=5&amp;end=10" in out
+
+
+@patch("docdiff.report_builder.generate_ai_summary")
+@patch("docdiff.report_builder.analyze_change")
+def test_generate_html_report_without_ai(mock_analyze, mock_summary, tmp_path):
+    """ai=False renders the report without analyzing any block or summarizing."""
+    analyzed = {"change": "changed", "type": "paragraph", "old": {"text": "c"}, "new": {"text": "d"},
+                "labels": ["date"], "semantic_score": 0.7, "change_type": "substantive", "confidence": 0.9}
+    blocks = [{"change": "changed", "type": "paragraph", "old": {"text": "a"}, "new": {"text": "b"}}, analyzed]
+    rb.generate_html_report(blocks, output_path=str(tmp_path / "r.html"), ai=False)
+    mock_analyze.assert_not_called()
+    mock_summary.assert_not_called()
+    assert "_ai_labels" not in blocks[0]
+    assert analyzed["_ai_type"] == "substantive"
+
+
 # --- JSON EXPORT ---
 
 def test_generate_json_report_success(tmp_path):
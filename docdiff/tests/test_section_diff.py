@@ -0,0 +1,167 @@
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor
+
+import pytest
+
+from docdiff import main, section_diff
+from docdiff.diff_engine import compare_blocks
+from docdiff.section_diff import heading_fingerprint, heading_level
+
+
+def _p(text, style="Normal"):
+    return {"type": "paragraph", "text": text, "style": style}
+
+
+def _doc(*chapters, style="Heading 1"):
+    """Numbered chapters of (title, paragraph texts)."""
+    blocks = [_p("Contract")]
+    for k, (title, paras) in enumerate(chapters, 1):
+        blocks.append(_p(f"{k}. {title}", style))
+        blocks.extend(_p(text) for text in paras)
+    return blocks
+
+
+def _changes(diffs):
+    return [b for b in diffs if b["change"] != "unchanged"]
+
+
+def _text(entry):
+    return entry.get("text") or entry["new"]["text"]
+
+
+SCOPE = ("Scope", ["s1", "s2", "s3"])
+TERMS = ("Terms", ["t1", "t2", "t3"])
+FEES = ("Fees", ["f1", "f2", "f3"])
+
+
+# ================================================================
+# Headings
+# ================================================================
+
+@pytest.mark.unit
+def test_heading_level_from_style():
+    assert heading_level(_p("x", "Heading 2")) == 2
+    assert heading_level(_p("x", "Nagłówek 1")) == 1
+    assert heading_level(_p("x", "Title")) == 0
+    assert heading_level(_p("x", "Normal")) is None
+    assert heading_level({"type": "table", "table": [], "style": "Heading 1"}) is None
+
+
+@pytest.mark.unit
+def test_heading_fingerprint_ignores_numbering_and_case():
+    assert heading_fingerprint("3.2.1  Payment  Terms") == heading_fingerprint("1. payment terms")
+    assert heading_fingerprint("IV. Fees") == heading_fingerprint("a) Fees") == "fees"
+    # a heading that is only a number keeps it
+    assert heading_fingerprint("12") == "12"
+
+
+# ================================================================
+# Section alignment
+# ================================================================
+
+@pytest.mark.unit
+def test_moved_chapter_is_matched_not_deleted_and_inserted():
+    """Reordered chapters: only the renumbered headings and the real edit are changes."""
+    old = _doc(SCOPE, TERMS, FEES)
+    new = _doc(FEES, SCOPE, ("Terms", ["t1", "t2 revised", "t3"]))
+
+    diffs = compare_blocks(old, new, sections=True)
+
+    assert [_text(b) for b in diffs] == [_text(b) for b in compare_blocks(new, new)]
+    assert [(b["change"], _text(b)) for b in _changes(diffs)] == [
+        ("changed", "1. Fees"), ("changed", "2. Scope"), ("changed", "3. Terms"), ("changed", "t2 revised"),
+    ]
+    assert {_text(b) for b in diffs if b.get("moved")} == {"1. Fees", "f1", "f2", "f3"}
+    # the flat alignment deletes and re-inserts the moved chapter
+    assert len(_changes(compare_blocks(old, new))) > len(_changes(diffs))
+
+
+@pytest.mark.unit
+def test_unmatched_sections_are_diffed_together():
+    """A renamed chapter is compared with the old one around it, not dropped wholesale."""
+    old = _doc(SCOPE, TERMS)
+    new = _doc(SCOPE, ("Conditions", ["t1", "t2", "t3", "t4"]))
+
+    changes = _changes(compare_blocks(old, new, sections=True))
+
+    assert [(b["change"], _text(b)) for b in changes] == [("changed", "2. Conditions"), ("added", "t4")]
+
+
+@pytest.mark.unit
+def test_subsections_are_aligned_within_their_chapter():
+    old = [_p("1. Scope", "Heading 1"), _p("1.1 Goods", "Heading 2"), _p("g"), _p("1.2 Services", "Heading 2"), _p("s")]
+    new = [_p("1. Scope", "Heading 1"), _p("1.1 Services", "Heading 2"), _p("s"), _p("1.2 Goods", "Heading 2"), _p("g")]
+
+    diffs = compare_blocks(old, new, sections=True)
+
+    assert [b["change"] for b in diffs] == ["unchanged", "changed", "unchanged", "changed", "unchanged"]
+    # one of the two swapped subsections keeps its place, the other one moved
+    assert [_text(b) for b in diffs if b.get("moved")] == ["1.2 Goods", "g"]
+
+
+@pytest.mark.unit
+def test_documents_without_headings_diff_as_one_sequence():
+    old = [_p("a"), _p("b"), _p("c")]
+    new = [_p("a"), _p("B"), _p("c"), _p("d")]
+
+    assert compare_blocks(old, new, sections=True) == compare_blocks(old, new)
+
+
+@pytest.mark.unit
+def test_sections_stay_within_scopes():
+    """Scoped blocks (structural docx) are split into sections scope by scope."""
+    old = [dict(b, scope="body") for b in _doc(SCOPE, TERMS)] + [{**_p("Draft"), "scope": "header-default"}]
+    new = [dict(b, scope="body") for b in _doc(TERMS, SCOPE)] + [{**_p("Final"), "scope": "header-default"}]
+
+    diffs = compare_blocks(old, new, sections=True)
+
+    assert diffs[-1]["change"] == "changed"
+    assert diffs[-1]["new"]["scope"] == "header-default"
+    assert [b["new"]["text"] for b in _changes(diffs)] == ["1. Terms", "2. Scope", "Final"]
+
+
+# ================================================================
+# Executor
+# ================================================================
+
+@pytest.mark.unit
+def test_executor_gives_the_serial_result(monkeypatch):
+    """Section diffs batched into an executor come back in document order."""
+    monkeypatch.setattr(section_diff, "BATCH_BLOCKS", 3)
+    old = _doc(SCOPE, TERMS, FEES)
+    new = _doc(FEES, ("Terms", ["t1", "t2 revised"]), SCOPE)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parallel = compare_blocks(old, new, sections=True, executor=executor)
+
+    assert parallel == compare_blocks(old, new, sections=True)
+
+
+@pytest.mark.unit
+def test_broken_executor_falls_back_to_inline_diff():
+    class Broken:
+        def submit(self, *args, **kwargs):
+            raise BrokenExecutor("worker died")
+
+    old, new = _doc(SCOPE, TERMS), _doc(TERMS, SCOPE)
+
+    assert compare_blocks(old, new, sections=True, executor=Broken()) == compare_blocks(old, new, sections=True)
+
+
+@pytest.mark.unit
+def test_pool_only_for_large_documents(monkeypatch):
+    monkeypatch.setattr("docdiff.parallel_extract.POOL_WORKERS", 2)
+    monkeypatch.setattr("docdiff.parallel_extract.get_pool", lambda: "pool")
+    blocks = _doc(SCOPE)
+
+    assert section_diff.pool_for(blocks, blocks, min_blocks=len(blocks) * 2 + 1) is None
+    assert section_diff.pool_for(blocks, blocks, min_blocks=len(blocks) * 2) == "pool"
+
+
+@pytest.mark.unit
+def test_cli_diff_mode(monkeypatch):
+    import sys
+
+    monkeypatch.setattr(sys, "argv", ["prog", "a.docx", "b.docx"])
+    assert main.parse_args().diff_mode == "flat"
+    monkeypatch.setattr(sys, "argv", ["prog", "a.docx", "b.docx", "--diff-mode", "sections"])
+    assert main.parse_args().diff_mode == "sections"
@@ -0,0 +1,162 @@
+from difflib import SequenceMatcher
+import shutil
+import subprocess
+from unittest.mock import MagicMock
+
+import pytest
+
+from docdiff import main
+from docdiff import txt_engine as te
+from docdiff.diff_engine import compare_blocks
+from docdiff.extractors.extract_txt import TxtExtractor
+
+
+def _write(path, *lines):
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+# ================================================================
+# Line index
+# ================================================================
+
+@pytest.mark.unit
+def test_line_index_follows_txt_extractor(tmp_path):
+    """Indexed lines are the stripped, non-empty lines TxtExtractor returns."""
+    path = _write(tmp_path / "a.txt", "  first ", "", "second\r", "   ", "zażółć")
+    with te.LineIndex(path) as index:
+        assert [index.text(i) for i in range(len(index))] == [
+            b["text"] for b in TxtExtractor().extract_blocks(path)
+        ]
+        assert list(index.linenos) == [1, 3, 5]
+        assert index.hashes.typecode == "Q"
+
+
+@pytest.mark.unit
+def test_line_index_empty_and_missing_files(tmp_path):
+    (tmp_path / "empty.txt").write_bytes(b"")
+    with te.LineIndex(tmp_path / "empty.txt") as index:
+        assert len(index) == 0
+    with pytest.raises(FileNotFoundError):
+        te.LineIndex(tmp_path / "missing.txt")
+
+
+# ================================================================
+# Hunks
+# ================================================================
+
+@pytest.mark.unit
+@pytest.mark.parametrize("context", [0, 1, 3])
+def test_group_hunks_matches_difflib(context):
+    """Hunks are grouped like SequenceMatcher.get_grouped_opcodes."""
+    a = list("abcdefghijklmnopqrstuvwxyz")
+    b = a[:2] + ["X"] + a[3:12] + a[13:20] + ["Y", "Z"] + a[20:]
+    sm = SequenceMatcher(None, a, b)
+    assert te.group_hunks(sm.get_opcodes(), context) == [list(h) for h in sm.get_grouped_opcodes(context)]
+
+
+@pytest.mark.unit
+def test_group_hunks_no_changes():
+    assert te.group_hunks([("equal", 0, 5, 0, 5)]) == []
+
+
+# ================================================================
+# Diff results
+# ================================================================
+
+@pytest.mark.unit
+def test_diff_text_files_reports_changes_with_context(tmp_path):
+    """Only changed lines and their context are turned into blocks."""
+    lines = [f"line {i}" for i in range(100)]
+    old = _write(tmp_path / "old.txt", *lines)
+    new_lines = list(lines)
+    new_lines[10] = "line 10 changed"
+    del new_lines[80]
+    new = _write(tmp_path / "new.txt", *new_lines)
+
+    result = te.diff_text_files(old, new, context=2)
+
+    full = compare_blocks(TxtExtractor().extract_blocks(old), TxtExtractor().extract_blocks(new))
+    assert [b["change"] for b in result if b["change"] != "unchanged"] == \
+        [b["change"] for b in full if b["change"] != "unchanged"]
+    assert sum(b["change"] == "unchanged" for b in result) == 8
+    changed = next(b for b in result if b["change"] == "changed")
+    assert (changed["old"]["line"], changed["new"]["text"]) == (11, "line 10 changed")
+    assert "<ins>" in changed["inline_html"]
+
+
+@pytest.mark.unit
+def test_unified_diff_uses_file_line_numbers(tmp_path):
+    old = _write(tmp_path / "old.txt", "a", "", "b", "c", "d")
+    new = _write(tmp_path / "new.txt", "a", "", "b", "C", "d", "e")
+
+    assert list(te.unified_diff(old, new, context=1, old_label="old", new_label="new")) == [
+        "--- old", "+++ new", "@@ -3,3 +3,4 @@", " b", "-c", "-d", "\\ No newline at end of file",
+        "+C", "+d", "+e", "\\ No newline at end of file",
+    ]
+    assert list(te.unified_diff(old, old)) == []
+
+
+@pytest.mark.unit
+@pytest.mark.skipif(shutil.which("patch") is None, reason="needs the patch tool")
+def test_unified_diff_applies_with_patch(tmp_path):
+    """Blank lines, whitespace-only edits and CRLF lines survive a round trip through patch."""
+    old_lines = [f"row {i}" if i % 4 else "" for i in range(1, 60)]
+    new_lines = list(old_lines)
+    new_lines[18:20] = ["row 19!", "", "", "inserted"]
+    new_lines[30] = "  " + new_lines[30]
+    del new_lines[40:44]
+    old = _write(tmp_path / "old.txt", *old_lines, "crlf\r", "")
+    new = _write(tmp_path / "new.txt", *new_lines, "crlf changed\r", "")
+    te.write_unified_diff(old, new, tmp_path / "r.diff", context=2)
+
+    subprocess.run(["patch", "-s", str(old), str(tmp_path / "r.diff")], check=True, capture_output=True)
+
+    assert old.read_bytes() == new.read_bytes()
+
+
+# ================================================================
+# CLI
+# ================================================================
+
+@pytest.mark.unit
+def test_compare_pair_uses_txt_engine_for_large_files(monkeypatch, tmp_path):
+    """Text files above the threshold skip the block extraction and write a unified diff."""
+    old = _write(tmp_path / "old.txt", *(f"row {i}" for i in range(50)))
+    new = _write(tmp_path / "new.txt", *(f"row {i}" for i in range(49)), "row 49!")
+    monkeypatch.setattr(main, "extract_pair", MagicMock(side_effect=AssertionError("extracted blocks")))
+    html = MagicMock()
+    monkeypatch.setattr(main, "generate_html_report", html)
+
+    code = main.compare_pair(old, new, tmp_path / "r.html", unified_output=tmp_path / "r.diff", txt_min_bytes=0)
+
+    assert code == main.ExitCode.OK
+    assert len(html.call_args[0][0]) == 4
+    assert (tmp_path / "r.diff").read_text(encoding="utf-8").splitlines()[-4:] == [
+        "-row 49", "\\ No newline at end of file", "+row 49!", "\\ No newline at end of file",
+    ]
+
+
+@pytest.mark.unit
+def test_compact_json_of_large_text_files_covers_every_line(tmp_path):
+    """The compact edit script of the txt engine rebuilds the whole new file, not just its hunks."""
+    from docdiff.compact_report import apply_compact_ops, read_compact_report
+
+    lines = [f"row {i}" if i % 7 else "" for i in range(38)]
+    old = _write(tmp_path / "old.txt", *lines)
+    new = _write(tmp_path / "new.txt", "head", *lines[:10], "row 10!", *lines[12:30], *lines[31:])
+    report = tmp_path / "r.jsonl"
+
+    code = main.compare_pair(old, new, tmp_path / "r.html", report, json_format="compact", txt_min_bytes=0)
+
+    assert code == main.ExitCode.OK
+    old_blocks = TxtExtractor().extract_blocks(old)
+    assert apply_compact_ops(old_blocks, read_compact_report(report)) == TxtExtractor().extract_blocks(new)
+
+
+@pytest.mark.unit
+def test_unified_output_rejected_for_other_formats(tmp_path):
+    old, new = tmp_path / "a.docx", tmp_path / "b.docx"
+    old.touch()
+    new.touch()
+    assert main.compare_pair(old, new, tmp_path / "r.html", unified_output=tmp_path / "r.diff") == main.FILE_TYPE_MISMATCH
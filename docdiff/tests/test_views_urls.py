@@ -1,7 +1,10 @@
+import html
+import re
 import pytest
 from django.urls import reverse, resolve
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
+from docdiff.models import DiffJob
 from docdiff.views import docdiff_view
 
 
@@ -9,6 +12,11 @@ from docdiff.views import docdiff_view
 class TestDocDiffView:
     """Integration tests for the main DocDiff view (docdiff_view)."""
 
+    @pytest.fixture(autouse=True)
+    def eager_jobs(self, settings):
+        """Run comparison jobs inside the request."""
+        settings.DOCDIFF_JOBS_BACKEND = "eager"
+
     def test_get_returns_upload_page(self, client):
         """GET request should render the upload form page (200 OK)."""
         url = reverse("docdiff:index")
@@ -39,10 +47,13 @@ class TestDocDiffView:
         old_file = SimpleUploadedFile("old.txt", b"Hello world")
         new_file = SimpleUploadedFile("new.txt", b"Hello brave new world")
 
-        response = client.post(url, {"file_old": old_file, "file_new": new_file})
+        response = client.post(url, {"file_old": old_file, "file_new": new_file}, follow=True)
 
+        # POST queues a job and redirects: job page -> finished report
+        assert response.redirect_chain[0][0].startswith("/docdiff/jobs/")
         assert response.status_code == 200
-        content = response.content.decode("utf-8").lower()
+        assert response.streaming
+        content = b"".join(response.streaming_content).decode("utf-8").lower()
 
         # Response should be an HTML page containing the report
         assert "<html" in content
@@ -80,28 +91,63 @@ class TestDocDiffView:
             old_file = SimpleUploadedFile("old.txt", b"a")
             new_file = SimpleUploadedFile("new.txt", b"b")
             response = client.post(url, {"file_old": old_file, "file_new": new_file}, **post_kwargs)
-            assert response.status_code == 200
+            assert response.status_code == 302
 
         old_file = SimpleUploadedFile("old.txt", b"a")
         new_file = SimpleUploadedFile("new.txt", b"b")
         response = client.post(url, {"file_old": old_file, "file_new": new_file}, **post_kwargs)
         assert response.status_code == 403
 
+    def test_long_unchanged_runs_are_served_as_fragments(self, client, settings):
+        """Unchanged runs are collapsed in the streamed report and loaded from the fragment URL."""
+        settings.DOCDIFF_REPORT_COLLAPSE_MIN_RUN = 5
+        url = reverse("docdiff:compare")
+        lines = [f"line {i}" for i in range(20)]
+        old_file = SimpleUploadedFile("old.txt", "\n".join(lines).encode())
+        new_file = SimpleUploadedFile("new.txt", "\n".join(lines + ["extra"]).encode())
+
+        response = client.post(url, {"file_old": old_file, "file_new": new_file}, REMOTE_ADDR="203.0.113.12", follow=True)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        assert "collapsed-run" in content
+        assert "line 7" not in content
+
+        match = re.search(r"data-fragment='([^']+)'", content)
+        fragment = client.get(html.unescape(match.group(1)))
+        assert fragment.status_code == 200
+        assert "line 7" in fragment.content.decode("utf-8")
+
+    def test_job_fragment_unknown_job_returns_404(self, client):
+        url = reverse("docdiff:job_fragment", args=["00000000-0000-0000-0000-000000000000"])
+        assert client.get(url).status_code == 404
+
     def test_filename_path_traversal_does_not_create_outside_file(self, client, monkeypatch, tmp_path):
         url = reverse("docdiff:compare")
-        monkeypatch.setattr("docdiff.views.tempfile.mkdtemp", lambda: str(tmp_path))
+        monkeypatch.setattr("docdiff.jobs.tempfile.mkdtemp", lambda *a, **k: str(tmp_path))
 
         traversal_name = "../../outside.txt"
         old_file = SimpleUploadedFile(traversal_name, b"old")
         new_file = SimpleUploadedFile("new.txt", b"new")
 
         response = client.post(url, {"file_old": old_file, "file_new": new_file}, REMOTE_ADDR="203.0.113.11")
-        assert response.status_code == 200
+        assert response.status_code == 302
 
         outside_candidate = (tmp_path / ".." / ".." / "outside.txt").resolve()
         assert not outside_candidate.exists()
 
 
+    def test_uploads_are_stored_in_the_job(self, client, settings):
+        """With the worker backend the uploads wait in the job row for the worker."""
+        settings.DOCDIFF_JOBS_BACKEND = "worker"
+        url = reverse("docdiff:compare")
+        old_file = SimpleUploadedFile("old.txt", b"old")
+        new_file = SimpleUploadedFile("new.txt", b"new")
+
+        response = client.post(url, {"file_old": old_file, "file_new": new_file}, REMOTE_ADDR="203.0.113.13")
+
+        assert response.status_code == 302
+        job = DiffJob.objects.get()
+        assert bytes(job.old_data) == b"old" and bytes(job.new_data) == b"new"
+
 class TestDocDiffUrls:
     """Basic tests for URL configuration of the docdiff app."""
 
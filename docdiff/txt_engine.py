@@ -0,0 +1,294 @@
+"""
+Native diff for large .txt files.
+
+TxtExtractor turns every line into a block dict, which for logs or exports
+of hundreds of MB costs far more memory than the file itself. This engine
+memory-maps both files and keeps only flat arrays per line (a 64-bit hash,
+the byte offset and the line number), aligns the hash arrays and decodes
+text only for the changed regions plus `context` unchanged lines around
+them. Line semantics follow TxtExtractor: lines are stripped (ASCII
+whitespace) and blank lines are skipped for the alignment. The unified
+diff maps that alignment back onto every line of the files (blank lines
+and whitespace included), so it applies with `patch`.
+
+Hashes come from the built-in hash() and are only compared within one
+process, so they never need to be stable across runs.
+"""
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+import mmap
+
+from .alignment import DEFAULT_ENGINE, Opcode, align
+from .diff_engine import entries_from_opcodes
+
+# Pairs of .txt files at least this large are diffed with this engine by the CLI
+TXT_ENGINE_MIN_BYTES = 8 * 1024 * 1024
+
+DEFAULT_CONTEXT = 3
+
+_HASH_MASK = (1 << 64) - 1
+
+
+class LineIndex:
+    """Hashes and offsets of the non-empty lines of a memory-mapped text file."""
+
+    def __init__(self, path: Union[str, Path]):
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"File does not exist: {path}")
+        self.path = path
+        self.hashes = array("Q")
+        self.starts = array("Q")
+        self.linenos = array("Q")
+        # byte offset of every line, blank ones included
+        self.offsets = array("Q")
+        self._file = open(path, "rb")
+        try:
+            # mmap cannot map an empty file
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if path.stat().st_size else None
+        except Exception:
+            self._file.close()
+            raise
+        if self._buf is not None:
+            self._build()
+
+    def _build(self) -> None:
+        hashes, starts, linenos, offsets = self.hashes, self.starts, self.linenos, self.offsets
+        pos = 0
+        for lineno, line in enumerate(iter(self._buf.readline, b""), 1):
+            offsets.append(pos)
+            text = line.strip()
+            if text:
+                hashes.append(hash(text) & _HASH_MASK)
+                starts.append(pos)
+                linenos.append(lineno)
+            pos += len(line)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def text(self, i: int) -> str:
+        """Decoded, stripped text of the i-th non-empty line."""
+        start = self.starts[i]
+        end = self._buf.find(b"\n", start)
+        line = self._buf[start:end if end != -1 else len(self._buf)]
+        return line.decode("utf-8", errors="replace").strip()
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines in the file, blank ones included."""
+        return len(self.offsets)
+
+    def raw(self, n: int) -> bytes:
+        """The n-th (0-based) line of the file as stored, with its line break."""
+        end = self.offsets[n + 1] if n + 1 < len(self.offsets) else len(self._buf)
+        return self._buf[self.offsets[n]:end]
+
+    def block(self, i: int) -> Dict[str, Any]:
+        return {"type": "paragraph", "text": self.text(i), "line": self.linenos[i]}
+
+    def close(self) -> None:
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+        self._file.close()
+
+    def __enter__(self) -> "LineIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def group_hunks(opcodes: Sequence[Opcode], context: int = DEFAULT_CONTEXT) -> List[List[Opcode]]:
+    """
+    Groups opcodes into hunks with at most `context` unchanged lines
+    on each side (as SequenceMatcher.get_grouped_opcodes does).
+    """
+    codes = [op for op in opcodes if op[1] != op[2] or op[3] != op[4]]
+    if not codes or all(op[0] == "equal" for op in codes):
+        return []
+
+    # trim the leading and trailing unchanged runs to the context
+    tag, i1, i2, j1, j2 = codes[0]
+    if tag == "equal":
+        codes[0] = (tag, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    tag, i1, i2, j1, j2 = codes[-1]
+    if tag == "equal":
+        codes[-1] = (tag, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+
+    hunks: List[List[Opcode]] = []
+    hunk: List[Opcode] = []
+    for tag, i1, i2, j1, j2 in codes:
+        # unchanged runs longer than two contexts split the hunk
+        if tag == "equal" and i2 - i1 > 2 * context:
+            hunk.append((tag, i1, i1 + context, j1, j1 + context))
+            hunks.append(hunk)
+            hunk = []
+            i1, j1 = i2 - context, j2 - context
+        hunk.append((tag, i1, i2, j1, j2))
+    if hunk and not (len(hunk) == 1 and hunk[0][0] == "equal"):
+        hunks.append(hunk)
+    return hunks
+
+
+def diff_line_indexes(old: LineIndex, new: LineIndex, context: int = DEFAULT_CONTEXT, engine: str = DEFAULT_ENGINE) -> List[List[Opcode]]:
+    """Aligns the line hashes of two files and returns the hunks."""
+    return group_hunks(align(old.hashes, new.hashes, engine), context)
+
+
+def diff_text_files(
+    old_path: Union[str, Path],
+    new_path: Union[str, Path],
+    context: int = DEFAULT_CONTEXT,
+    engine: str = DEFAULT_ENGINE,
+) -> List[Dict[str, Any]]:
+    """
+    compare_blocks()-style result for two text files, limited to the changed
+    regions and `context` unchanged lines around them. Every block carries
+    the 1-based line number it comes from in its file ("line").
+    """
+    result: List[Dict[str, Any]] = []
+    with LineIndex(old_path) as old, LineIndex(new_path) as new:
+        for hunk in diff_line_indexes(old, new, context, engine):
+            i1, i2 = hunk[0][1], hunk[-1][2]
+            j1, j2 = hunk[0][3], hunk[-1][4]
+            # only the hunk's lines are decoded; opcodes are shifted to them
+            result.extend(entries_from_opcodes(
+                [(tag, a1 - i1, a2 - i1, b1 - j1, b2 - j1) for tag, a1, a2, b1, b2 in hunk],
+                [old.block(i) for i in range(i1, i2)],
+                [new.block(j) for j in range(j1, j2)],
+                engine,
+            ))
+    return result
+
+
+def iter_line_entries(
+    old_path: Union[str, Path],
+    new_path: Union[str, Path],
+    engine: str = DEFAULT_ENGINE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    compare_blocks()-style entries for all lines of two text files, for the
+    compact report (compact_report.iter_compact_ops): entries carry their
+    line indices (`_old_index` / `_new_index`, as TxtExtractor numbers its
+    blocks) and unchanged lines no text, so only changed lines are decoded.
+    """
+    with LineIndex(old_path) as old, LineIndex(new_path) as new:
+        for tag, i1, i2, j1, j2 in align(old.hashes, new.hashes, engine):
+            if tag == "equal":
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    yield {"change": "unchanged", "_old_index": i, "_new_index": j}
+                continue
+            pairs = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+            for k in range(pairs):
+                yield {
+                    "change": "changed",
+                    "old": {"type": "paragraph", "text": old.text(i1 + k)},
+                    "new": {"type": "paragraph", "text": new.text(j1 + k)},
+                    "_old_index": i1 + k,
+                    "_new_index": j1 + k,
+                }
+            for i in range(i1 + pairs, i2):
+                yield {"change": "deleted", "_old_index": i}
+            for j in range(j1 + pairs, j2):
+                yield {"change": "added", "type": "paragraph", "text": new.text(j), "_new_index": j}
+
+
+def line_opcodes(old: LineIndex, new: LineIndex, opcodes: Sequence[Opcode]) -> List[Opcode]:
+    """
+    Maps opcodes of the non-blank lines onto all lines of both files.
+    Aligned lines stay equal only when stored identically (whitespace and
+    line break included); the lines between two aligned ones are matched
+    where identical at the edges and replaced otherwise.
+    """
+    out: List[Opcode] = []
+
+    def emit(tag: str, i1: int, i2: int, j1: int, j2: int) -> None:
+        if i1 == i2 and j1 == j2:
+            return
+        if out and out[-1][0] == tag and out[-1][2] == i1 and out[-1][4] == j1:
+            out[-1] = (tag, out[-1][1], i2, out[-1][3], j2)
+        else:
+            out.append((tag, i1, i2, j1, j2))
+
+    def gap(i1: int, i2: int, j1: int, j2: int) -> None:
+        head = 0
+        while i1 + head < i2 and j1 + head < j2 and old.raw(i1 + head) == new.raw(j1 + head):
+            head += 1
+        tail = 0
+        while i2 - tail > i1 + head and j2 - tail > j1 + head and old.raw(i2 - tail - 1) == new.raw(j2 - tail - 1):
+            tail += 1
+        emit("equal", i1, i1 + head, j1, j1 + head)
+        a1, a2, b1, b2 = i1 + head, i2 - tail, j1 + head, j2 - tail
+        emit("replace" if a1 < a2 and b1 < b2 else "delete" if a1 < a2 else "insert", a1, a2, b1, b2)
+        emit("equal", a2, i2, b2, j2)
+
+    i = j = 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != "equal":
+            continue
+        for a, b in zip(range(i1, i2), range(j1, j2)):
+            n, m = old.linenos[a] - 1, new.linenos[b] - 1
+            gap(i, n, j, m)
+            emit("equal" if old.raw(n) == new.raw(m) else "replace", n, n + 1, m, m + 1)
+            i, j = n + 1, m + 1
+    gap(i, old.line_count, j, new.line_count)
+    return out
+
+
+def _hunk_range(lo: int, hi: int) -> str:
+    if lo == hi:
+        # empty side: the line before the hunk, as in unified diff
+        return f"{lo},0"
+    return f"{lo + 1},{hi - lo}"
+
+
+def _diff_lines(index: LineIndex, prefix: str, lo: int, hi: int) -> Iterator[str]:
+    for n in range(lo, hi):
+        raw = index.raw(n)
+        if raw.endswith(b"\n"):
+            yield prefix + raw[:-1].decode("utf-8", errors="replace")
+        else:
+            yield prefix + raw.decode("utf-8", errors="replace")
+            yield "\\ No newline at end of file"
+
+
+def unified_diff(
+    old_path: Union[str, Path],
+    new_path: Union[str, Path],
+    context: int = DEFAULT_CONTEXT,
+    engine: str = DEFAULT_ENGINE,
+    old_label: Optional[str] = None,
+    new_label: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Yields a unified diff of two text files, line by line (without newlines).
+    Lines are compared as TxtExtractor sees them, but hunks list the lines
+    as stored, so the diff applies to the old file with `patch`.
+    """
+    with LineIndex(old_path) as old, LineIndex(new_path) as new:
+        hunks = group_hunks(line_opcodes(old, new, align(old.hashes, new.hashes, engine)), context)
+        if not hunks:
+            return
+        yield f"--- {old_label or old_path}"
+        yield f"+++ {new_label or new_path}"
+        for hunk in hunks:
+            i1, i2 = hunk[0][1], hunk[-1][2]
+            j1, j2 = hunk[0][3], hunk[-1][4]
+            yield f"@@ -{_hunk_range(i1, i2)} +{_hunk_range(j1, j2)} @@"
+            for tag, a1, a2, b1, b2 in hunk:
+                if tag == "equal":
+                    yield from _diff_lines(old, " ", a1, a2)
+                    continue
+                yield from _diff_lines(old, "-", a1, a2)
+                yield from _diff_lines(new, "+", b1, b2)
+
+
+def write_unified_diff(old_path: Union[str, Path], new_path: Union[str, Path], output_path: Union[str, Path],
+                       context: int = DEFAULT_CONTEXT, engine: str = DEFAULT_ENGINE) -> None:
+    # no newline translation: lines keep their own carriage returns
+    with open(output_path, "w", encoding="utf-8", newline="") as f:
+        for line in unified_diff(old_path, new_path, context, engine):
+            f.write(line + "\n")
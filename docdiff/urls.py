@@ -7,4 +7,8 @@ app_name = "docdiff"
 urlpatterns = [
     path("", count_visit(views.docdiff_view), name="index"),        # główny formularz uploadu
     path("compare/", views.docdiff_view, name="compare"),  # POST z plikami idzie tutaj
+    path("jobs/<uuid:job_id>/", views.job_view, name="job"),
+    path("jobs/<uuid:job_id>/status/", views.job_status_view, name="job_status"),
+    path("jobs/<uuid:job_id>/result/", views.job_result_view, name="job_result"),
+    path("jobs/<uuid:job_id>/fragment/", views.job_fragment_view, name="job_fragment"),
 ]
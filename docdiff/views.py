@@ -1,20 +1,21 @@
-from django.shortcuts import render
-from django.http import HttpResponse
+from django.conf import settings
+from django.shortcuts import get_object_or_404, redirect, render
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django_ratelimit.decorators import ratelimit
 from pathlib import Path
-import tempfile
-import shutil
+import hashlib
+from typing import Tuple
+import logging
 
-from .extractors.extract_docx import DocxExtractor
-from .extractors.extract_xlsx import XlsxExtractor
-from .extractors.extract_txt import TxtExtractor
-from .diff_engine import compare_blocks
-from .report_builder import generate_html_report
-from .heuristics_ai import analyze_change
+from .jobs import fail_stale_jobs, job_result, submit_job
+from .models import DiffJob
+from .report_builder import iter_html_report, render_report_fragment, unchanged_runs
 
+_LOGGER = logging.getLogger(__name__)
 
-# Upload validation parameters
+# Upload validation parameters (the size limit can be overridden by DOCDIFF_MAX_FILE_SIZE_MB)
 MAX_FILE_SIZE_MB = 10
 ALLOWED_EXTENSIONS = {".docx", ".xlsx", ".txt"}
 ALLOWED_MIME = {
@@ -39,6 +40,8 @@ ERROR_CODES = {
     "extract_failed": "extract_failed",
     "empty_documents": "empty_documents",
     "too_many_changes": "too_many_changes",
+    "job_failed": "job_failed",
+    "job_timeout": "job_timeout",
 }
 
 
@@ -60,12 +63,16 @@ def _has_valid_signature(upload, ext: str) -> bool:
 
     return False
 
+def max_file_size_mb() -> int:
+    return getattr(settings, "DOCDIFF_MAX_FILE_SIZE_MB", MAX_FILE_SIZE_MB)
+
+
 def validate_upload(upload):
     """Validate uploaded file extension, MIME and size."""
     ext = Path(upload.name).suffix.lower()
     if ext not in ALLOWED_EXTENSIONS:
         raise ValueError(ERROR_CODES["unsupported_type"])
-    if upload.size > MAX_FILE_SIZE_MB * 1024 * 1024:
+    if upload.size > max_file_size_mb() * 1024 * 1024:
         raise ValueError(ERROR_CODES["file_too_large"])
     if hasattr(upload, "content_type"):
         if upload.content_type != ALLOWED_MIME.get(ext, ""):
@@ -80,12 +87,27 @@ def validate_file_pair(file_old, file_new):
     if FORMAT_GROUP.get(ext_old) != FORMAT_GROUP.get(ext_new):
         raise ValueError(ERROR_CODES["format_mismatch"])
 
+def _read_upload(upload) -> Tuple[bytes, str]:
+    """Returns the bytes of an upload and their SHA-256."""
+    h = hashlib.sha256()
+    chunks = []
+    for chunk in upload.chunks():
+        h.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), h.hexdigest()
+
+def _render_upload(request, **context):
+    context.setdefault("max_file_size_mb", max_file_size_mb())
+    return render(request, "docdiff/upload.html", context)
+
+
 @require_http_methods(["GET", "POST"])
 @ratelimit(key="ip", rate="10/h", method="POST", block=True)
 def docdiff_view(request):
     """
     Main DocDiff view:
-    Handles upload of two files, performs diff and returns rendered HTML report.
+    Handles upload of two files and queues a DiffJob comparing them;
+    the browser is redirected to the job page, which polls its progress.
     Rate-limited: max 10 POST requests/hour per IP.
     """
     if request.method == "POST":
@@ -93,11 +115,7 @@ def docdiff_view(request):
         file_new = request.FILES.get("file_new")
 
         if not file_old or not file_new:
-            return render(
-                request,
-                "docdiff/upload.html",
-                {"error_code": ERROR_CODES["missing_files"]}
-            )
+            return _render_upload(request, error_code=ERROR_CODES["missing_files"])
 
         # Validate uploads
         try:
@@ -105,115 +123,105 @@ def docdiff_view(request):
             validate_upload(file_new)
             validate_file_pair(file_old, file_new)
         except ValueError as e:
-            return render(
-                request,
-                "docdiff/upload.html",
-                {"error_code": str(e)}
-            )
-
-        temp_dir = Path(tempfile.mkdtemp())
-        try:
-            # SECURITY: use only the basename to prevent path traversal
-            old_filename = Path(file_old.name).name
-            new_filename = Path(file_new.name).name
-            # Ensure unique names in case both files share the same basename
-            if old_filename == new_filename:
-                old_filename = "old_" + old_filename
-                new_filename = "new_" + new_filename
-            old_path = temp_dir / old_filename
-            new_path = temp_dir / new_filename
-
-            with open(old_path, "wb") as f:
-                for chunk in file_old.chunks():
-                    f.write(chunk)
-            with open(new_path, "wb") as f:
-                for chunk in file_new.chunks():
-                    f.write(chunk)
-
-            # Select extractor by extension
-            def get_extractor(path: Path):
-                ext = path.suffix.lower()
-                if ext == ".docx":
-                    return DocxExtractor()
-                elif ext == ".xlsx":
-                    return XlsxExtractor()
-                elif ext == ".txt":
-                    return TxtExtractor()
-                raise ValueError(f"Unsupported extension: {ext}")
-
-            old_extractor = get_extractor(old_path)
-            new_extractor = get_extractor(new_path)
-
-            # Extraction and comparison
-            try:
-                old_blocks = old_extractor.extract_blocks(old_path)
-                new_blocks = new_extractor.extract_blocks(new_path)
-            except Exception:
-                return render(
-                    request,
-                    "docdiff/upload.html",
-                    {"error_code": ERROR_CODES["extract_failed"]}
-                )
-
-            if not old_blocks and not new_blocks:
-                return render(
-                    request,
-                    "docdiff/upload.html",
-                    {"error_code": ERROR_CODES["empty_documents"]}
-                )
-
-            diff_result = compare_blocks(old_blocks, new_blocks)
-
-            # Prevent excessive AI processing
-            changed_blocks = [b for b in diff_result if b.get("change") == "changed"]
-            if len(changed_blocks) > 300:
-                return render(
-                    request,
-                    "docdiff/upload.html",
-                    {"error_code": ERROR_CODES["too_many_changes"]}
-                )
-
-            # AI semantic analysis
-            for block in diff_result:
-                if block.get("change") != "changed":
-                    continue
-
-                old_type = block.get("old", {}).get("type")
-                new_type = block.get("new", {}).get("type")
-
-                # AI text only
-                if old_type != "paragraph" or new_type != "paragraph":
-                    block.update({
-                        "labels": [],
-                        "semantic_score": None,
-                        "change_type": "structural",
-                        "confidence": 1.0,
-                    })
-                    continue
-
-                try:
-                    ai_info = analyze_change(block)
-                    block.update(ai_info)
-                except Exception:
-                    block.update({
-                        "labels": [],
-                        "semantic_score": None,
-                        "change_type": "ai_error",
-                        "confidence": 0.0,
-                    })
-
-            # Generate report
-            output_html = temp_dir / "report.html"
-            generate_html_report(diff_result, str(output_html))
-
-            with open(output_html, "r", encoding="utf-8") as f:
-                html_content = f.read()
-
-        finally:
-            # Always clean up temp files, even on error
-            shutil.rmtree(temp_dir, ignore_errors=True)
-
-        return HttpResponse(html_content)
+            return _render_upload(request, error_code=str(e))
+
+        # SECURITY: use only the basename to prevent path traversal
+        old_filename = Path(file_old.name).name
+        new_filename = Path(file_new.name).name
+        # Ensure unique names in case both files share the same basename
+        if old_filename == new_filename:
+            old_filename = "old_" + old_filename
+            new_filename = "new_" + new_filename
+
+        # The uploads are stored in the job, so any worker process can run it
+        old_data, old_sha256 = _read_upload(file_old)
+        new_data, new_sha256 = _read_upload(file_new)
+        job = DiffJob.objects.create(
+            old_name=old_filename,
+            new_name=new_filename,
+            old_data=old_data,
+            new_data=new_data,
+            old_sha256=old_sha256,
+            new_sha256=new_sha256,
+        )
+
+        # Extraction, diff and AI analysis never run in the request
+        submit_job(job)
+        return redirect("docdiff:job", job_id=job.pk)
 
     # GET → upload form
-    return render(request, "docdiff/upload.html")
+    return _render_upload(request)
+
+
+def _report_response(job: DiffJob) -> StreamingHttpResponse:
+    blocks = job_result(job)
+    # Long unchanged runs are collapsed and served by job_fragment_view
+    collapse_min_run = getattr(settings, "DOCDIFF_REPORT_COLLAPSE_MIN_RUN", 50)
+    fragment_url = None
+    if next(unchanged_runs(blocks, collapse_min_run), None):
+        fragment_url = reverse("docdiff:job_fragment", args=[job.pk])
+
+    # The report is streamed straight from the stored diff, no temp file
+    return StreamingHttpResponse(
+        # the job stored the analysis in the blocks; the web process never loads spaCy
+        iter_html_report(blocks, fragment_url=fragment_url, collapse_min_run=collapse_min_run, ai=False),
+        content_type="text/html; charset=utf-8",
+    )
+
+
+def _job_status(job: DiffJob) -> dict:
+    return {
+        "id": str(job.pk),
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress,
+        "error_code": job.error_code,
+        "result_url": reverse("docdiff:job_result", args=[job.pk]) if job.status == DiffJob.Status.DONE else None,
+    }
+
+
+@require_http_methods(["GET"])
+def job_view(request, job_id):
+    """Progress page of a job; redirects to the report (or the upload form with an error) when finished."""
+    job = get_object_or_404(DiffJob.objects.defer("result", "old_data", "new_data"), pk=job_id)
+    if job.status == DiffJob.Status.DONE:
+        return redirect("docdiff:job_result", job_id=job.pk)
+    if job.status == DiffJob.Status.FAILED:
+        return _render_upload(request, error_code=job.error_code)
+    return render(request, "docdiff/job.html", {
+        "job": job,
+        "status_url": reverse("docdiff:job_status", args=[job.pk]),
+        # the page stops polling a bit after the server would time the job out
+        "max_wait_seconds": getattr(settings, "DOCDIFF_JOB_TIMEOUT_SECONDS", 30 * 60) + 60,
+    })
+
+
+@require_http_methods(["GET"])
+def job_status_view(request, job_id):
+    """JSON status and progress of a job (polled by the job page)."""
+    job = get_object_or_404(DiffJob.objects.defer("result", "old_data", "new_data"), pk=job_id)
+    if job.status in (DiffJob.Status.QUEUED, DiffJob.Status.RUNNING) and fail_stale_jobs():
+        job.refresh_from_db()
+    return JsonResponse(_job_status(job))
+
+
+@require_http_methods(["GET"])
+def job_result_view(request, job_id):
+    """Streams the HTML report of a finished job."""
+    job = get_object_or_404(DiffJob, pk=job_id, status=DiffJob.Status.DONE)
+    return _report_response(job)
+
+
+@require_http_methods(["GET"])
+def job_fragment_view(request, job_id):
+    """Returns the HTML of collapsed unchanged blocks [start, end) of a job report."""
+    job = get_object_or_404(DiffJob, pk=job_id, status=DiffJob.Status.DONE)
+    blocks = job_result(job)
+    try:
+        start = int(request.GET.get("start", 0))
+        end = int(request.GET.get("end", len(blocks)))
+    except ValueError:
+        return HttpResponseBadRequest("start/end must be integers")
+
+    fragment_url = reverse("docdiff:job_fragment", args=[job.pk])
+    return HttpResponse(render_report_fragment(blocks, start, end, fragment_url))
@@ -8,6 +8,8 @@ import wikipedia
 from django.core.cache import cache
 from django.conf import settings
 
+from core.nlp import service as nlp_service
+
 
 class Chatbot:
     """
@@ -16,7 +18,6 @@ class Chatbot:
     """
 
     def __init__(self):
-        self._nlp = None  # lazy init
         self.keyword_responses = self.load_data("tonguetwister/data/keywords.pkl")
         self.negative_words = self.load_data("tonguetwister/data/negative_words.pkl")
         self.positive_words = self.load_data("tonguetwister/data/positive_words.pkl")
@@ -28,11 +29,11 @@ class Chatbot:
 
     @property
     def nlp(self):
-        """Lazy load spaCy model on first access."""
-        if self._nlp is None:
-            import spacy
-            self._nlp = spacy.load("pl_core_news_sm")
-        return self._nlp
+        """The process-wide spaCy model shared with docdiff (core.nlp)."""
+        model = nlp_service.get()
+        if model is None:
+            raise RuntimeError("spaCy model is not available")
+        return model
 
     @staticmethod
     def load_data(filepath):
@@ -55,7 +56,7 @@ class Chatbot:
             cache.set(redis_key, pickle.dumps(self.unanswered_questions), timeout=cache_ttl)
 
     def lemmatize_input(self, text):
-        doc = self.nlp(text.lower())  # spaCy
+        doc = nlp_service.process(text.lower(), profile="lemma")  # spaCy, lemmatizer only
         return " ".join([token.lemma_ for token in doc])
 
     def get_custom_sentiment(self, user_input):